@@ -6,65 +6,179 @@ Handles code generation, verification, and expiry using SQLite.
 import sqlite3
 import secrets
 import string
-from datetime import datetime, timedelta
+import threading
+import time
+from datetime import datetime
 from typing import Optional, List, Dict
 
 
 DB_PATH = "access_codes.db"
 
+# One long-lived connection per thread so the page cache stays warm
+_local = threading.local()
+
+# Hot-path statements, kept as constants so the connection's statement
+# cache always hits on the same SQL text
+_SELECT_CODE_SQL = "SELECT * FROM access_codes WHERE code = ?"
+_FLUSH_USES_SQL = "UPDATE access_codes SET use_count = use_count + ?, last_used = ? WHERE code = ?"
+
+# Successful verifications are counted in memory and written out in one
+# transaction every few seconds instead of one UPDATE per request.
+_USE_FLUSH_INTERVAL = 2.0  # seconds
+_pending_uses: Dict[str, list] = {}  # code -> [count_delta, last_used]
+_pending_lock = threading.Lock()
+_use_flusher = None
+
 
 def _get_db():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(DB_PATH, cached_statements=256)
+        conn.row_factory = sqlite3.Row
+        # journal_mode=WAL persists on the file (set in init_access_db);
+        # the rest are per-connection settings.
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-64000")
+        conn.execute("PRAGMA mmap_size=268435456")
+        _local.conn = conn
+    elif conn.in_transaction:
+        # A previous call failed mid-write; don't keep holding the lock
+        conn.rollback()
     return conn
 
 
 def init_access_db():
     """Create the access codes table if it doesn't exist."""
     conn = _get_db()
+    conn.execute("PRAGMA journal_mode=WAL")
+
+    # Older installs used a rowid table with a UNIQUE code column and ISO
+    # text timestamps; move them to the code-keyed WITHOUT ROWID layout with
+    # unix-second timestamps so lookups are one B-tree search and expiry
+    # checks are integer compares
+    col_types = {r[1]: r[2] for r in conn.execute("PRAGMA table_info(access_codes)").fetchall()}
+    legacy = "id" in col_types or col_types.get("expires_at") == "TEXT"
+    if legacy:
+        conn.execute("ALTER TABLE access_codes RENAME TO access_codes_old")
+
     conn.execute("""
         CREATE TABLE IF NOT EXISTS access_codes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            code TEXT UNIQUE NOT NULL,
+            code TEXT PRIMARY KEY,
             label TEXT DEFAULT '',
-            created_at TEXT NOT NULL,
-            expires_at TEXT NOT NULL,
+            created_at INTEGER NOT NULL,
+            expires_at INTEGER NOT NULL,
             is_active INTEGER DEFAULT 1,
-            last_used TEXT,
+            last_used INTEGER,
             use_count INTEGER DEFAULT 0
-        )
+        ) WITHOUT ROWID
     """)
+
+    if legacy:
+        # Stored ISO strings are naive local time, hence the 'utc' modifier
+        conn.execute("""
+            INSERT INTO access_codes (code, label, created_at, expires_at, is_active, last_used, use_count)
+            SELECT code, label,
+                   CAST(strftime('%s', created_at, 'utc') AS INTEGER),
+                   CAST(strftime('%s', expires_at, 'utc') AS INTEGER),
+                   is_active,
+                   CAST(strftime('%s', last_used, 'utc') AS INTEGER),
+                   use_count
+            FROM access_codes_old
+        """)
+        conn.execute("DROP TABLE access_codes_old")
     conn.commit()
-    conn.close()
+
+
+def _iso(ts: Optional[int]) -> Optional[str]:
+    """Format a stored unix timestamp the way the API has always returned it."""
+    return datetime.fromtimestamp(ts).isoformat() if ts is not None else None
+
+
+def flush_use_counts():
+    """Write accumulated verify_code() use counts to the database.
+    If the write fails the counts are put back, to be retried on the next flush.
+    """
+    global _pending_uses
+    with _pending_lock:
+        if not _pending_uses:
+            return
+        batch, _pending_uses = _pending_uses, {}
+    conn = _get_db()
+    try:
+        conn.executemany(_FLUSH_USES_SQL, [(delta, last_used, code) for code, (delta, last_used) in batch.items()])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        with _pending_lock:
+            for code, (delta, last_used) in batch.items():
+                pending = _pending_uses.get(code)
+                if pending:
+                    pending[0] += delta
+                    pending[1] = max(pending[1], last_used)
+                else:
+                    _pending_uses[code] = [delta, last_used]
+        raise
+
+
+def _use_flusher_loop():
+    while True:
+        time.sleep(_USE_FLUSH_INTERVAL)
+        try:
+            flush_use_counts()
+        except Exception as e:
+            print(f"[WARN] Failed to flush access code use counts: {e}")
+
+
+def _record_use(code: str):
+    global _use_flusher
+    now = int(time.time())
+    with _pending_lock:
+        pending = _pending_uses.get(code)
+        if pending:
+            pending[0] += 1
+            pending[1] = now
+        else:
+            _pending_uses[code] = [1, now]
+        if _use_flusher is None:
+            _use_flusher = threading.Thread(target=_use_flusher_loop, name="access-code-use-flusher", daemon=True)
+            _use_flusher.start()
+
+
+# Uppercase letters and digits without the ambiguous 0/O, 1/I/L
+_CODE_ALPHABET = "".join(c for c in string.ascii_uppercase + string.digits if c not in "0O1IL")
+# Bytes at or above this are rejected so every character stays equally likely
+_CODE_BYTE_LIMIT = 256 - 256 % len(_CODE_ALPHABET)
 
 
 def generate_code(length=8) -> str:
     """Generate a random alphanumeric access code."""
-    chars = string.ascii_uppercase + string.digits
-    # Remove ambiguous characters (0/O, 1/I/L)
-    chars = chars.replace("0", "").replace("O", "").replace("1", "").replace("I", "").replace("L", "")
-    return "".join(secrets.choice(chars) for _ in range(length))
+    n = len(_CODE_ALPHABET)
+    chars = []
+    while len(chars) < length:
+        # One read from the OS CSPRNG per batch instead of one per character
+        chars.extend(_CODE_ALPHABET[b % n] for b in secrets.token_bytes(length * 2) if b < _CODE_BYTE_LIMIT)
+    return "".join(chars[:length])
 
 
 def create_access_code(days_valid: int = 30, label: str = "") -> Dict:
     """Create a new access code valid for N days."""
     conn = _get_db()
     code = generate_code()
-    now = datetime.now()
-    expires = now + timedelta(days=days_valid)
+    now = int(time.time())
+    expires = now + days_valid * 86400
 
     conn.execute(
         "INSERT INTO access_codes (code, label, created_at, expires_at) VALUES (?, ?, ?, ?)",
-        (code, label, now.isoformat(), expires.isoformat()),
+        (code, label, now, expires),
     )
     conn.commit()
-    conn.close()
 
     return {
         "code": code,
         "label": label,
-        "created_at": now.isoformat(),
-        "expires_at": expires.isoformat(),
+        "created_at": _iso(now),
+        "expires_at": _iso(expires),
         "days_valid": days_valid,
     }
 
@@ -72,64 +186,57 @@ def create_access_code(days_valid: int = 30, label: str = "") -> Dict:
 def verify_code(code: str) -> Dict:
     """Verify an access code. Returns status and info."""
     conn = _get_db()
-    row = conn.execute(
-        "SELECT * FROM access_codes WHERE code = ?", (code.upper().strip(),)
-    ).fetchone()
+    row = conn.execute(_SELECT_CODE_SQL, (code.upper().strip(),)).fetchone()
 
     if not row:
-        conn.close()
         return {"valid": False, "reason": "Invalid access code"}
 
     if not row["is_active"]:
-        conn.close()
         return {"valid": False, "reason": "This code has been revoked"}
 
-    expires_at = datetime.fromisoformat(row["expires_at"])
-    if datetime.now() > expires_at:
-        conn.close()
+    now = time.time()
+    if now > row["expires_at"]:
         return {"valid": False, "reason": "This code has expired"}
 
-    # Update last used and use count
-    conn.execute(
-        "UPDATE access_codes SET last_used = ?, use_count = use_count + 1 WHERE code = ?",
-        (datetime.now().isoformat(), code.upper().strip()),
-    )
-    conn.commit()
-    conn.close()
+    # Update last used and use count (batched, see flush_use_counts)
+    _record_use(row["code"])
 
     return {
         "valid": True,
         "label": row["label"],
-        "expires_at": row["expires_at"],
-        "days_remaining": (expires_at - datetime.now()).days,
+        "expires_at": _iso(row["expires_at"]),
+        "days_remaining": int((row["expires_at"] - now) // 86400),
     }
 
 
 def list_all_codes() -> List[Dict]:
     """List all access codes with their status."""
+    flush_use_counts()
     conn = _get_db()
+    now = int(time.time())
+    # Expiry, status, days remaining and the ISO timestamps the API returns
+    # are all computed by SQLite in the same pass
     rows = conn.execute(
-        "SELECT * FROM access_codes ORDER BY created_at DESC"
+        """SELECT ac.code, ac.label,
+                  strftime('%Y-%m-%dT%H:%M:%S', ac.created_at, 'unixepoch', 'localtime') AS created_at,
+                  strftime('%Y-%m-%dT%H:%M:%S', ac.expires_at, 'unixepoch', 'localtime') AS expires_at,
+                  ac.is_active,
+                  strftime('%Y-%m-%dT%H:%M:%S', ac.last_used, 'unixepoch', 'localtime') AS last_used,
+                  ac.use_count,
+                  ac.expires_at < :now AS is_expired,
+                  CASE WHEN ac.expires_at < :now THEN 'expired'
+                       WHEN ac.is_active THEN 'active' ELSE 'revoked' END AS status,
+                  MAX(0, (ac.expires_at - :now) / 86400) AS days_remaining
+           FROM access_codes ac ORDER BY ac.created_at DESC""",
+        {"now": now},
     ).fetchall()
-    conn.close()
 
     codes = []
     for row in rows:
-        expires_at = datetime.fromisoformat(row["expires_at"])
-        is_expired = datetime.now() > expires_at
-        codes.append({
-            "id": row["id"],
-            "code": row["code"],
-            "label": row["label"],
-            "created_at": row["created_at"],
-            "expires_at": row["expires_at"],
-            "is_active": bool(row["is_active"]),
-            "is_expired": is_expired,
-            "status": "expired" if is_expired else ("active" if row["is_active"] else "revoked"),
-            "last_used": row["last_used"],
-            "use_count": row["use_count"],
-            "days_remaining": max(0, (expires_at - datetime.now()).days),
-        })
+        code = dict(row)
+        code["is_active"] = bool(code["is_active"])
+        code["is_expired"] = bool(code["is_expired"])
+        codes.append(code)
 
     return codes
 
@@ -142,7 +249,6 @@ def revoke_code(code: str) -> bool:
     )
     conn.commit()
     affected = result.rowcount
-    conn.close()
     return affected > 0
 
 
@@ -154,5 +260,4 @@ def delete_code(code: str) -> bool:
     )
     conn.commit()
     affected = result.rowcount
-    conn.close()
     return affected > 0
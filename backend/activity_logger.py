@@ -5,23 +5,157 @@ Logs are immutable - only the owner can view, nobody can edit/delete.
 """
 
 import sqlite3
-import json
+import queue
+import re
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Optional, Dict, List
-from functools import wraps
+from functools import lru_cache
+from typing import Any, Optional, Dict, List
 
-DB_PATH = "users.db"
+import orjson
 
+DB_PATH = "users.db"
 
-def _get_db():
-    conn = sqlite3.connect(DB_PATH)
+# details dicts may use non-string keys, which stdlib json.dumps accepted
+_ORJSON_OPTS = orjson.OPT_NON_STR_KEYS
+
+# WAL lets readers and the writer run concurrently on separate connections:
+# all writes go through one lock-guarded connection (SQLite only allows one
+# writer anyway), reads borrow from a small pool of read-only connections.
+_READER_POOL_SIZE = 4
+_writer_conn = None
+_writer_lock = threading.RLock()
+_reader_pool = queue.LifoQueue()
+_readers_opened = 0
+_readers_lock = threading.Lock()
+
+# Hot-path statements, kept as constants so the connection's statement
+# cache always hits on the same SQL text
+_INSERT_LOG_SQL = """INSERT INTO activity_logs (user_id, action, module, target_type, target_id, details, ip_address, user_agent, created_at)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+_TOUCH_SESSION_SQL = "UPDATE staff_sessions SET last_active_at = ? WHERE user_id = ? AND is_active = 1"
+_LAST_ACTIVE_SQL = "SELECT last_active_at FROM staff_sessions WHERE user_id = ? AND is_active = 1 ORDER BY last_active_at DESC LIMIT 1"
+
+
+def _connect():
+    conn = sqlite3.connect(DB_PATH, cached_statements=256, check_same_thread=False)
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA journal_mode=WAL")
     return conn
 
 
+@contextmanager
+def _writer():
+    """Hold the shared write connection for the duration of the block."""
+    global _writer_conn
+    with _writer_lock:
+        if _writer_conn is None:
+            _writer_conn = _connect()
+        elif _writer_conn.in_transaction:
+            # A previous call failed mid-write; don't keep holding the lock
+            _writer_conn.rollback()
+        yield _writer_conn
+
+
+@contextmanager
+def _reader():
+    """Borrow a read-only connection from the pool for the duration of the block."""
+    global _readers_opened
+    try:
+        conn = _reader_pool.get_nowait()
+    except queue.Empty:
+        conn = None
+        with _readers_lock:
+            if _readers_opened < _READER_POOL_SIZE:
+                _readers_opened += 1
+                conn = _connect()
+                conn.execute("PRAGMA query_only=1")
+        if conn is None:
+            conn = _reader_pool.get()
+    try:
+        yield conn
+    finally:
+        _reader_pool.put(conn)
+
+
 # ─── Core Logging ───
 
+# Timestamp for the logging hot paths, re-formatted at most every 100ms
+_NOW_GRANULARITY = 0.1
+_now_cache = (0.0, "")
+
+
+def _now_iso() -> str:
+    global _now_cache
+    t = time.time()
+    cached_t, cached_iso = _now_cache
+    if 0 <= t - cached_t < _NOW_GRANULARITY:
+        return cached_iso
+    iso = datetime.fromtimestamp(t).isoformat()
+    _now_cache = (t, iso)
+    return iso
+
+
+# log_action() rows are queued and written by one background thread in
+# batches, so a burst of admin requests shares a single commit.
+_LOG_BATCH_SIZE = 100
+_LOG_FLUSH_INTERVAL = 0.05  # seconds
+_log_queue = queue.Queue()
+_log_writer = None
+_log_writer_lock = threading.Lock()
+
+
+def _write_log_rows(rows: List[tuple]):
+    """Insert a batch of activity_logs rows in one transaction."""
+    with _writer() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(_INSERT_LOG_SQL, rows)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+
+def _log_writer_loop():
+    while True:
+        rows = [_log_queue.get()]
+        deadline = time.monotonic() + _LOG_FLUSH_INTERVAL
+        while len(rows) < _LOG_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                rows.append(_log_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        try:
+            _write_log_rows(rows)
+        except Exception as e:
+            print(f"[WARN] Failed to write {len(rows)} activity log(s): {e}")
+        finally:
+            for _ in rows:
+                _log_queue.task_done()
+
+
+def _ensure_log_writer():
+    global _log_writer
+    if _log_writer is None:
+        with _log_writer_lock:
+            if _log_writer is None:
+                _log_writer = threading.Thread(target=_log_writer_loop, name="activity-log-writer", daemon=True)
+                _log_writer.start()
+
+
+def flush_logs():
+    """Block until every queued log_action() row has been written."""
+    if _log_writer is not None:
+        _log_queue.join()
+
+
 def log_action(
     user_id: int,
     action: str,
@@ -32,17 +166,14 @@ def log_action(
     ip_address: str = None,
     user_agent: str = None,
 ):
-    """Log an admin action. This is the primary logging function."""
-    conn = _get_db()
-    conn.execute(
-        """INSERT INTO activity_logs (user_id, action, module, target_type, target_id, details, ip_address, user_agent, created_at)
-           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+    """Log an admin action. This is the primary logging function.
+    The row is queued and written in the background; call flush_logs() to wait for it."""
+    _ensure_log_writer()
+    _log_queue.put(
         (user_id, action, module, target_type, target_id,
-         json.dumps(details) if details else None,
-         ip_address, user_agent, datetime.now().isoformat()),
+         orjson.dumps(details, option=_ORJSON_OPTS).decode() if details else None,
+         ip_address, user_agent, _now_iso()),
     )
-    conn.commit()
-    conn.close()
 
 
 def log_system_event(
@@ -56,28 +187,71 @@ def log_system_event(
 ):
     """Log a system event (OTP failure, payment error, etc.) visible to admin/HOD.
     Uses user_id=0 for system-level events, or the affected user's ID when known.
-    Severity is stored in details for filtering: 'error', 'warning', 'info'."""
+    Severity is stored in details for filtering: 'error', 'warning', 'info'.
+    Written synchronously (not queued) so the event survives a crash."""
     if details is None:
         details = {}
     details["severity"] = severity
     details["system_event"] = True
     try:
-        log_action(
-            user_id=user_id,
-            action=action,
-            module=module,
-            target_type=target_type,
-            target_id=target_id,
-            details=details,
-            ip_address=None,
-            user_agent="system",
-        )
+        _write_log_rows([
+            (user_id, action, module, target_type, target_id,
+             orjson.dumps(details, option=_ORJSON_OPTS).decode(), None, "system", _now_iso()),
+        ])
     except Exception as e:
         print(f"[WARN] Failed to write system event log: {e}")
 
 
 # ─── Query Functions ───
 
+# Rows are built positionally, so the SELECTs below list columns in field order
+_LOG_COLUMNS = """al.id, al.user_id, al.action, al.module, al.target_type, al.target_id,
+                  al.details, al.ip_address, al.user_agent, al.created_at"""
+
+
+@dataclass(slots=True)
+class ActivityLogRow:
+    """One activity_logs row, as returned by get_user_activity."""
+    id: int
+    user_id: int
+    action: str
+    module: Optional[str]
+    target_type: Optional[str]
+    target_id: Optional[int]
+    details: Any
+    ip_address: Optional[str]
+    user_agent: Optional[str]
+    created_at: str
+
+
+@dataclass(slots=True)
+class LoginHistoryRow(ActivityLogRow):
+    """Activity row joined with the user's name, as returned by get_login_history."""
+    display_name: Optional[str]
+    email: Optional[str]
+
+
+@dataclass(slots=True)
+class ActivityLogListRow(ActivityLogRow):
+    """Activity row joined with the user's name and avatar, as returned by get_activity_logs."""
+    display_name: Optional[str]
+    avatar_color: Optional[str]
+    email: Optional[str]
+
+
+def _log_rows(rows, row_type=ActivityLogRow) -> list:
+    logs = []
+    for r in rows:
+        log = row_type(*r)
+        if log.details:
+            try:
+                log.details = orjson.loads(log.details)
+            except (orjson.JSONDecodeError, TypeError):
+                pass
+        logs.append(log)
+    return logs
+
+
 def get_activity_logs(
     user_id: int = None,
     action: str = None,
@@ -88,8 +262,6 @@ def get_activity_logs(
     per_page: int = 50,
 ) -> Dict:
     """Query activity logs with filters. Returns paginated results."""
-    conn = _get_db()
-
     where_clauses = []
     params = []
 
@@ -111,36 +283,26 @@ def get_activity_logs(
 
     where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
 
-    # Count total
-    count = conn.execute(
-        f"SELECT COUNT(*) as cnt FROM activity_logs al WHERE {where_sql}", params
-    ).fetchone()["cnt"]
-
-    # Fetch page
     offset = (page - 1) * per_page
-    rows = conn.execute(
-        f"""SELECT al.*, u.display_name, u.avatar_color, u.email
-            FROM activity_logs al
-            LEFT JOIN users u ON al.user_id = u.id
-            WHERE {where_sql}
-            ORDER BY al.created_at DESC
-            LIMIT ? OFFSET ?""",
-        params + [per_page, offset],
-    ).fetchall()
-    conn.close()
+    with _reader() as conn:
+        # Count total
+        count = conn.execute(
+            f"SELECT COUNT(*) as cnt FROM activity_logs al WHERE {where_sql}", params
+        ).fetchone()["cnt"]
 
-    logs = []
-    for r in rows:
-        log = dict(r)
-        if log.get("details"):
-            try:
-                log["details"] = json.loads(log["details"])
-            except (json.JSONDecodeError, TypeError):
-                pass
-        logs.append(log)
+        # Fetch page
+        rows = conn.execute(
+            f"""SELECT {_LOG_COLUMNS}, u.display_name, u.avatar_color, u.email
+                FROM activity_logs al
+                LEFT JOIN users u ON al.user_id = u.id
+                WHERE {where_sql}
+                ORDER BY al.created_at DESC
+                LIMIT ? OFFSET ?""",
+            params + [per_page, offset],
+        ).fetchall()
 
     return {
-        "logs": logs,
+        "logs": _log_rows(rows, ActivityLogListRow),
         "total": count,
         "page": page,
         "per_page": per_page,
@@ -148,138 +310,164 @@ def get_activity_logs(
     }
 
 
-def get_user_activity(user_id: int, days: int = 30) -> List[Dict]:
+def get_user_activity(user_id: int, days: int = 30) -> List[ActivityLogRow]:
     """Get a specific user's activity history."""
-    conn = _get_db()
     cutoff = (datetime.now() - timedelta(days=days)).isoformat()
-    rows = conn.execute(
-        """SELECT * FROM activity_logs
-           WHERE user_id = ? AND created_at >= ?
-           ORDER BY created_at DESC LIMIT 200""",
-        (user_id, cutoff),
-    ).fetchall()
-    conn.close()
-
-    logs = []
-    for r in rows:
-        log = dict(r)
-        if log.get("details"):
-            try:
-                log["details"] = json.loads(log["details"])
-            except (json.JSONDecodeError, TypeError):
-                pass
-        logs.append(log)
-    return logs
-
-
-def get_login_history(user_id: int = None, limit: int = 100) -> List[Dict]:
-    """Get login/logout history. If user_id is None, returns all staff login history."""
-    conn = _get_db()
-    if user_id:
+    with _reader() as conn:
         rows = conn.execute(
-            """SELECT al.*, u.display_name, u.email
-               FROM activity_logs al
-               LEFT JOIN users u ON al.user_id = u.id
-               WHERE al.user_id = ? AND al.action IN ('login', 'logout', 'login_failed')
-               ORDER BY al.created_at DESC LIMIT ?""",
-            (user_id, limit),
+            f"""SELECT {_LOG_COLUMNS} FROM activity_logs al
+               WHERE al.user_id = ? AND al.created_at >= ?
+               ORDER BY al.created_at DESC LIMIT 200""",
+            (user_id, cutoff),
         ).fetchall()
-    else:
-        rows = conn.execute(
-            """SELECT al.*, u.display_name, u.email
-               FROM activity_logs al
-               LEFT JOIN users u ON al.user_id = u.id
-               WHERE al.action IN ('login', 'logout', 'login_failed')
-               ORDER BY al.created_at DESC LIMIT ?""",
-            (limit,),
-        ).fetchall()
-    conn.close()
+    return _log_rows(rows)
 
-    logs = []
-    for r in rows:
-        log = dict(r)
-        if log.get("details"):
-            try:
-                log["details"] = json.loads(log["details"])
-            except (json.JSONDecodeError, TypeError):
-                pass
-        logs.append(log)
-    return logs
+
+def get_login_history(user_id: int = None, limit: int = 100) -> List[LoginHistoryRow]:
+    """Get login/logout history. If user_id is None, returns all staff login history."""
+    with _reader() as conn:
+        if user_id:
+            rows = conn.execute(
+                f"""SELECT {_LOG_COLUMNS}, u.display_name, u.email
+                   FROM activity_logs al
+                   LEFT JOIN users u ON al.user_id = u.id
+                   WHERE al.user_id = ? AND al.action IN ('login', 'logout', 'login_failed')
+                   ORDER BY al.created_at DESC LIMIT ?""",
+                (user_id, limit),
+            ).fetchall()
+        else:
+            rows = conn.execute(
+                f"""SELECT {_LOG_COLUMNS}, u.display_name, u.email
+                   FROM activity_logs al
+                   LEFT JOIN users u ON al.user_id = u.id
+                   WHERE al.action IN ('login', 'logout', 'login_failed')
+                   ORDER BY al.created_at DESC LIMIT ?""",
+                (limit,),
+            ).fetchall()
+    return _log_rows(rows, LoginHistoryRow)
 
 
 # ─── Staff Sessions ───
 
+@dataclass(slots=True)
+class StaffSessionRow:
+    """An active staff_sessions row joined with the staff member's profile."""
+    id: int
+    user_id: int
+    session_token_hash: str
+    ip_address: Optional[str]
+    user_agent: Optional[str]
+    device_info: Any
+    started_at: str
+    last_active_at: str
+    ended_at: Optional[str]
+    is_active: int
+    display_name: Optional[str]
+    email: Optional[str]
+    avatar_color: Optional[str]
+    staff_role: Optional[str]
+    role_display_name: Optional[str]
+    department: Optional[str]
+
+
 def create_staff_session(user_id: int, token_hash: str, ip_address: str = None, user_agent: str = None) -> int:
     """Create a new staff session record. Returns session ID."""
-    conn = _get_db()
-    now = datetime.now().isoformat()
+    now = _now_iso()
 
     # Parse device info from user agent
     device_info = _parse_user_agent(user_agent) if user_agent else None
 
-    conn.execute(
-        """INSERT INTO staff_sessions (user_id, session_token_hash, ip_address, user_agent, device_info, started_at, last_active_at, is_active)
-           VALUES (?, ?, ?, ?, ?, ?, ?, 1)""",
-        (user_id, token_hash, ip_address, user_agent,
-         json.dumps(device_info) if device_info else None, now, now),
-    )
-    conn.commit()
-    session_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
-    conn.close()
+    with _writer() as conn:
+        session_id = conn.execute(
+            """INSERT INTO staff_sessions (user_id, session_token_hash, ip_address, user_agent, device_info, started_at, last_active_at, is_active)
+               VALUES (?, ?, ?, ?, ?, ?, ?, 1) RETURNING id""",
+            (user_id, token_hash, ip_address, user_agent,
+             orjson.dumps(device_info).decode() if device_info else None, now, now),
+        ).fetchone()[0]
+        conn.commit()
     return session_id
 
 
+# Heartbeats only record the latest timestamp per user in memory; one
+# background thread writes them out together every few seconds. Readers of
+# last_active_at flush first, so they never see a stale value.
+_HEARTBEAT_FLUSH_INTERVAL = 10.0  # seconds
+_pending_heartbeats: Dict[int, str] = {}  # user_id -> last_active_at
+_heartbeat_lock = threading.Lock()
+_heartbeat_flusher = None
+
+
+def flush_session_activity():
+    """Write pending update_session_activity() timestamps to the database."""
+    with _heartbeat_lock:
+        if not _pending_heartbeats:
+            return
+        rows = [(ts, user_id) for user_id, ts in _pending_heartbeats.items()]
+        _pending_heartbeats.clear()
+    with _writer() as conn:
+        conn.executemany(_TOUCH_SESSION_SQL, rows)
+        conn.commit()
+
+
+def _heartbeat_flusher_loop():
+    while True:
+        time.sleep(_HEARTBEAT_FLUSH_INTERVAL)
+        try:
+            flush_session_activity()
+        except Exception as e:
+            print(f"[WARN] Failed to flush staff session activity: {e}")
+
+
 def update_session_activity(user_id: int):
-    """Update the last_active_at for a staff member's active session."""
-    conn = _get_db()
-    now = datetime.now().isoformat()
-    conn.execute(
-        "UPDATE staff_sessions SET last_active_at = ? WHERE user_id = ? AND is_active = 1",
-        (now, user_id),
-    )
-    conn.commit()
-    conn.close()
+    """Update the last_active_at for a staff member's active session (batched, see flush_session_activity)."""
+    global _heartbeat_flusher
+    now = _now_iso()
+    with _heartbeat_lock:
+        _pending_heartbeats[user_id] = now
+        if _heartbeat_flusher is None:
+            _heartbeat_flusher = threading.Thread(target=_heartbeat_flusher_loop, name="staff-heartbeat-flusher", daemon=True)
+            _heartbeat_flusher.start()
 
 
 def end_staff_session(user_id: int, session_id: int = None):
     """End a staff session (logout or forced)."""
-    conn = _get_db()
-    now = datetime.now().isoformat()
-    if session_id:
-        conn.execute(
-            "UPDATE staff_sessions SET ended_at = ?, is_active = 0 WHERE id = ?",
-            (now, session_id),
-        )
-    else:
-        conn.execute(
-            "UPDATE staff_sessions SET ended_at = ?, is_active = 0 WHERE user_id = ? AND is_active = 1",
-            (now, user_id),
-        )
-    conn.commit()
-    conn.close()
-
-
-def get_active_staff_sessions() -> List[Dict]:
+    with _writer() as conn:
+        now = datetime.now().isoformat()
+        if session_id:
+            conn.execute(
+                "UPDATE staff_sessions SET ended_at = ?, is_active = 0 WHERE id = ?",
+                (now, session_id),
+            )
+        else:
+            conn.execute(
+                "UPDATE staff_sessions SET ended_at = ?, is_active = 0 WHERE user_id = ? AND is_active = 1",
+                (now, user_id),
+            )
+        conn.commit()
+
+
+def get_active_staff_sessions() -> List[StaffSessionRow]:
     """Get all currently active staff sessions."""
-    conn = _get_db()
-    rows = conn.execute(
-        """SELECT ss.*, u.display_name, u.email, u.avatar_color, u.staff_role,
-                  r.display_name as role_display_name, r.department
-           FROM staff_sessions ss
-           JOIN users u ON ss.user_id = u.id
-           LEFT JOIN roles r ON u.role_id = r.id
-           WHERE ss.is_active = 1
-           ORDER BY ss.last_active_at DESC""",
-    ).fetchall()
-    conn.close()
+    flush_session_activity()
+    with _reader() as conn:
+        rows = conn.execute(
+            """SELECT ss.id, ss.user_id, ss.session_token_hash, ss.ip_address, ss.user_agent, ss.device_info,
+                      ss.started_at, ss.last_active_at, ss.ended_at, ss.is_active, u.display_name, u.email, u.avatar_color, u.staff_role,
+                      r.display_name as role_display_name, r.department
+               FROM staff_sessions ss
+               JOIN users u ON ss.user_id = u.id
+               LEFT JOIN roles r ON u.role_id = r.id
+               WHERE ss.is_active = 1
+               ORDER BY ss.last_active_at DESC""",
+        ).fetchall()
 
     sessions = []
     for r in rows:
-        s = dict(r)
-        if s.get("device_info"):
+        s = StaffSessionRow(*r)
+        if s.device_info:
             try:
-                s["device_info"] = json.loads(s["device_info"])
-            except (json.JSONDecodeError, TypeError):
+                s.device_info = orjson.loads(s.device_info)
+            except (orjson.JSONDecodeError, TypeError):
                 pass
         sessions.append(s)
     return sessions
@@ -287,26 +475,22 @@ def get_active_staff_sessions() -> List[Dict]:
 
 def terminate_session(user_id: int) -> Dict:
     """Force terminate all active sessions for a staff member."""
-    conn = _get_db()
-    now = datetime.now().isoformat()
-    result = conn.execute(
-        "UPDATE staff_sessions SET ended_at = ?, is_active = 0 WHERE user_id = ? AND is_active = 1",
-        (now, user_id),
-    )
-    conn.commit()
-    count = result.rowcount
-    conn.close()
+    with _writer() as conn:
+        now = datetime.now().isoformat()
+        result = conn.execute(
+            "UPDATE staff_sessions SET ended_at = ?, is_active = 0 WHERE user_id = ? AND is_active = 1",
+            (now, user_id),
+        )
+        conn.commit()
+        count = result.rowcount
     return {"success": True, "sessions_terminated": count}
 
 
 def check_session_timeout(user_id: int, timeout_minutes: int = 30) -> bool:
     """Check if a staff session has timed out due to inactivity. Returns True if still active."""
-    conn = _get_db()
-    session = conn.execute(
-        "SELECT last_active_at FROM staff_sessions WHERE user_id = ? AND is_active = 1 ORDER BY last_active_at DESC LIMIT 1",
-        (user_id,),
-    ).fetchone()
-    conn.close()
+    flush_session_activity()
+    with _reader() as conn:
+        session = conn.execute(_LAST_ACTIVE_SQL, (user_id,)).fetchone()
 
     if not session:
         return False
@@ -317,77 +501,157 @@ def check_session_timeout(user_id: int, timeout_minutes: int = 30) -> bool:
 
 # ─── Cleanup ───
 
+_CLEANUP_CHUNK = 5000
+
+
 def cleanup_old_logs(retention_days: int = 90):
-    """Delete activity logs older than retention period."""
-    conn = _get_db()
-    cutoff = (datetime.now() - timedelta(days=retention_days)).isoformat()
-    result = conn.execute("DELETE FROM activity_logs WHERE created_at < ?", (cutoff,))
-    conn.commit()
-    deleted = result.rowcount
-    conn.close()
+    """Delete activity logs older than retention period.
+    Deletes in small committed chunks so the write lock is never held for long
+    and the WAL stays small, then truncates the WAL."""
+    rolled_until = rollup_activity_stats()
+    cutoff_dt = datetime.now() - timedelta(days=retention_days)
+    cutoff = cutoff_dt.isoformat()
+    deleted = 0
+    while True:
+        with _writer() as conn:
+            result = conn.execute(
+                """DELETE FROM activity_logs WHERE rowid IN (
+                       SELECT rowid FROM activity_logs INDEXED BY idx_activity_created
+                       WHERE created_at < ? LIMIT ?)""",
+                (cutoff, _CLEANUP_CHUNK),
+            )
+            conn.commit()
+        deleted += result.rowcount
+        if result.rowcount < _CLEANUP_CHUNK:
+            break
+        time.sleep(0.01)  # let queued writers in between chunks
+    with _writer() as conn:
+        # Drop rolled-up hours that are gone from activity_logs, and re-count the
+        # hour the cutoff falls in from the rows that survived
+        boundary = _hour_floor(cutoff_dt)
+        conn.execute("DELETE FROM activity_stats_hourly WHERE hour_start <= ?", (boundary.isoformat(),))
+        if boundary.isoformat() < rolled_until:
+            _rollup_range(conn, boundary.isoformat(), (boundary + timedelta(hours=1)).isoformat())
+        conn.commit()
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
     return {"deleted": deleted}
 
 
 def cleanup_expired_sessions():
     """Close sessions that have been inactive for more than 30 minutes."""
-    conn = _get_db()
-    cutoff = (datetime.now() - timedelta(minutes=30)).isoformat()
-    result = conn.execute(
-        "UPDATE staff_sessions SET ended_at = ?, is_active = 0 WHERE is_active = 1 AND last_active_at < ?",
-        (datetime.now().isoformat(), cutoff),
-    )
-    conn.commit()
-    count = result.rowcount
-    conn.close()
+    flush_session_activity()
+    with _writer() as conn:
+        cutoff = (datetime.now() - timedelta(minutes=30)).isoformat()
+        result = conn.execute(
+            "UPDATE staff_sessions SET ended_at = ?, is_active = 0 WHERE is_active = 1 AND last_active_at < ?",
+            (datetime.now().isoformat(), cutoff),
+        )
+        conn.commit()
+        count = result.rowcount
     return {"expired": count}
 
 
 # ─── Log Summary / Stats ───
 
+# Hours are only rolled up once they are this far in the past, so rows still
+# sitting in the log_action() queue land before their hour is counted.
+_ROLLUP_GRACE = timedelta(minutes=5)
+
+# Per (action, module, user_id, is_system) counts since :cutoff: rolled-up
+# hours in [:lo, :hi) plus raw rows for the partial hours on either side.
+_STATS_COUNTS_CTE = """WITH counts AS (
+        SELECT action, NULLIF(module, '') AS module, user_id, is_system, cnt
+        FROM activity_stats_hourly WHERE hour_start >= :lo AND hour_start < :hi
+        UNION ALL
+        SELECT action, module, user_id, user_agent IS 'system', COUNT(*)
+        FROM activity_logs WHERE created_at >= :cutoff AND created_at < :lo
+        GROUP BY 1, 2, 3, 4
+        UNION ALL
+        SELECT action, module, user_id, user_agent IS 'system', COUNT(*)
+        FROM activity_logs WHERE created_at >= :hi
+        GROUP BY 1, 2, 3, 4
+    )"""
+
+
+def _hour_floor(dt: datetime) -> datetime:
+    return dt.replace(minute=0, second=0, microsecond=0)
+
+
+def _rollup_range(conn, since: str, until: str):
+    conn.execute(
+        """INSERT INTO activity_stats_hourly (hour_start, action, module, user_id, is_system, cnt)
+           SELECT strftime('%Y-%m-%dT%H:00:00', created_at), action, COALESCE(module, ''),
+                  user_id, user_agent IS 'system', COUNT(*)
+           FROM activity_logs WHERE created_at >= ? AND created_at < ?
+           GROUP BY 1, 2, 3, 4, 5
+           ON CONFLICT DO NOTHING""",
+        (since, until),
+    )
+
+
+def rollup_activity_stats() -> str:
+    """Fold completed hours of activity_logs into activity_stats_hourly.
+    Incremental: only hours after the latest rolled-up hour are scanned.
+    Returns the (exclusive) end of the rolled-up range."""
+    until = _hour_floor(datetime.now() - _ROLLUP_GRACE).isoformat()
+    with _writer() as conn:
+        last = conn.execute("SELECT MAX(hour_start) AS h FROM activity_stats_hourly").fetchone()["h"]
+        since = (datetime.fromisoformat(last) + timedelta(hours=1)).isoformat() if last else ""
+        if since < until:
+            _rollup_range(conn, since, until)
+            conn.commit()
+    return until
+
+
 def get_activity_stats(days: int = 7) -> Dict:
-    """Get activity summary statistics for the dashboard."""
-    conn = _get_db()
-    cutoff = (datetime.now() - timedelta(days=days)).isoformat()
+    """Get activity summary statistics for the dashboard.
+    Completed hours come from activity_stats_hourly; only the partial hours
+    at each end of the window are counted from activity_logs directly."""
+    rolled_until = rollup_activity_stats()
+    cutoff_dt = datetime.now() - timedelta(days=days)
+    cutoff = cutoff_dt.isoformat()
+    lo = _hour_floor(cutoff_dt)
+    if lo < cutoff_dt:
+        lo += timedelta(hours=1)
+    lo = lo.isoformat()
+    if lo >= rolled_until:
+        # Window is shorter than the rolled-up range; count raw rows only
+        lo = rolled_until = cutoff
+    params = {"cutoff": cutoff, "lo": lo, "hi": rolled_until}
+
+    with _reader() as conn:
+        # Headline numbers in one pass; system errors are OTP/email/payment failures
+        totals = conn.execute(
+            f"""{_STATS_COUNTS_CTE}
+               SELECT COALESCE(SUM(cnt), 0) as total,
+                      COALESCE(SUM(CASE WHEN action = 'login_failed' THEN cnt END), 0) as failed_logins,
+                      COALESCE(SUM(CASE WHEN is_system THEN cnt END), 0) as system_errors
+               FROM counts""",
+            params,
+        ).fetchone()
+
+        by_action = conn.execute(
+            f"{_STATS_COUNTS_CTE} SELECT action, SUM(cnt) as cnt FROM counts GROUP BY action ORDER BY cnt DESC",
+            params,
+        ).fetchall()
 
-    total = conn.execute(
-        "SELECT COUNT(*) as cnt FROM activity_logs WHERE created_at >= ?", (cutoff,)
-    ).fetchone()["cnt"]
-
-    by_action = conn.execute(
-        "SELECT action, COUNT(*) as cnt FROM activity_logs WHERE created_at >= ? GROUP BY action ORDER BY cnt DESC",
-        (cutoff,),
-    ).fetchall()
-
-    by_module = conn.execute(
-        "SELECT module, COUNT(*) as cnt FROM activity_logs WHERE created_at >= ? AND module IS NOT NULL GROUP BY module ORDER BY cnt DESC",
-        (cutoff,),
-    ).fetchall()
-
-    by_user = conn.execute(
-        """SELECT al.user_id, u.display_name, COUNT(*) as cnt
-           FROM activity_logs al LEFT JOIN users u ON al.user_id = u.id
-           WHERE al.created_at >= ?
-           GROUP BY al.user_id ORDER BY cnt DESC LIMIT 10""",
-        (cutoff,),
-    ).fetchall()
-
-    failed_logins = conn.execute(
-        "SELECT COUNT(*) as cnt FROM activity_logs WHERE action = 'login_failed' AND created_at >= ?",
-        (cutoff,),
-    ).fetchone()["cnt"]
-
-    # Count system errors (OTP failures, email failures, payment failures)
-    system_errors = conn.execute(
-        "SELECT COUNT(*) as cnt FROM activity_logs WHERE user_agent = 'system' AND created_at >= ?",
-        (cutoff,),
-    ).fetchone()["cnt"]
-
-    conn.close()
+        by_module = conn.execute(
+            f"{_STATS_COUNTS_CTE} SELECT module, SUM(cnt) as cnt FROM counts WHERE module IS NOT NULL GROUP BY module ORDER BY cnt DESC",
+            params,
+        ).fetchall()
+
+        by_user = conn.execute(
+            f"""{_STATS_COUNTS_CTE}
+               SELECT c.user_id, u.display_name, SUM(c.cnt) as cnt
+               FROM counts c LEFT JOIN users u ON c.user_id = u.id
+               GROUP BY c.user_id ORDER BY cnt DESC LIMIT 10""",
+            params,
+        ).fetchall()
 
     return {
-        "total_actions": total,
-        "failed_logins": failed_logins,
-        "system_errors": system_errors,
+        "total_actions": totals["total"],
+        "failed_logins": totals["failed_logins"],
+        "system_errors": totals["system_errors"],
         "by_action": [dict(r) for r in by_action],
         "by_module": [dict(r) for r in by_module],
         "top_users": [dict(r) for r in by_user],
@@ -396,40 +660,58 @@ def get_activity_stats(days: int = 7) -> Dict:
 
 # ─── Helpers ───
 
-def _parse_user_agent(ua: str) -> dict:
-    """Parse a basic device info from user agent string."""
-    info = {"raw": ua[:200]}
-    ua_lower = ua.lower()
-
-    if "mobile" in ua_lower or "android" in ua_lower or "iphone" in ua_lower:
-        info["type"] = "mobile"
-    elif "tablet" in ua_lower or "ipad" in ua_lower:
-        info["type"] = "tablet"
+# Every keyword _parse_user_agent cares about, found in one scan. The
+# lookahead lets overlapping keywords all match, same as separate `in` checks.
+_UA_TOKEN_RE = re.compile(
+    r"(?=(mobile|android|iphone|tablet|ipad|chrome|firefox|safari|edg|windows|mac|linux))",
+    re.IGNORECASE,
+)
+_UA_MOBILE = {"mobile", "android", "iphone"}
+_UA_TABLET = {"tablet", "ipad"}
+_UA_IOS = {"iphone", "ipad"}
+
+
+@lru_cache(maxsize=1024)
+def _classify_user_agent(ua: str) -> tuple:
+    """(type, browser, os) for a user agent. Cached: staff log in from the same few browsers."""
+    found = {t.lower() for t in _UA_TOKEN_RE.findall(ua)}
+
+    if found & _UA_MOBILE:
+        device_type = "mobile"
+    elif found & _UA_TABLET:
+        device_type = "tablet"
     else:
-        info["type"] = "desktop"
-
-    if "chrome" in ua_lower and "edg" not in ua_lower:
-        info["browser"] = "Chrome"
-    elif "firefox" in ua_lower:
-        info["browser"] = "Firefox"
-    elif "safari" in ua_lower and "chrome" not in ua_lower:
-        info["browser"] = "Safari"
-    elif "edg" in ua_lower:
-        info["browser"] = "Edge"
+        device_type = "desktop"
+
+    if "chrome" in found and "edg" not in found:
+        browser = "Chrome"
+    elif "firefox" in found:
+        browser = "Firefox"
+    elif "safari" in found and "chrome" not in found:
+        browser = "Safari"
+    elif "edg" in found:
+        browser = "Edge"
     else:
-        info["browser"] = "Other"
-
-    if "windows" in ua_lower:
-        info["os"] = "Windows"
-    elif "mac" in ua_lower:
-        info["os"] = "macOS"
-    elif "linux" in ua_lower:
-        info["os"] = "Linux"
-    elif "android" in ua_lower:
-        info["os"] = "Android"
-    elif "iphone" in ua_lower or "ipad" in ua_lower:
-        info["os"] = "iOS"
+        browser = "Other"
+
+    if "windows" in found:
+        os_name = "Windows"
+    elif "mac" in found:
+        os_name = "macOS"
+    elif "linux" in found:
+        os_name = "Linux"
+    elif "android" in found:
+        os_name = "Android"
+    elif found & _UA_IOS:
+        os_name = "iOS"
     else:
-        info["os"] = "Other"
+        os_name = "Other"
+
+    return device_type, browser, os_name
 
-    return info
+
+def _parse_user_agent(ua: str) -> dict:
+    """Parse a basic device info from user agent string."""
+    device_type, browser, os_name = _classify_user_agent(ua)
+    # ua[:200] returns ua itself (no copy) for the usual sub-200-char agent
+    return {"raw": ua[:200], "type": device_type, "browser": browser, "os": os_name}
@@ -1,4 +1,5 @@
 """Add privacy policy route to main.py on VPS."""
+import mmap
 import sys
 
 MAIN_PY = "/root/Soccer_Prediction_AI/backend/main.py"
@@ -73,19 +74,22 @@ ul{padding-left:20px}
 
 '''
 
-with open(MAIN_PY, "r") as f:
-    content = f.read()
+marker = b"# ==================== SERVE FRONTEND IN PRODUCTION ===================="
 
-marker = "# ==================== SERVE FRONTEND IN PRODUCTION ===================="
-if "privacy_policy" in content:
-    print("Privacy route already exists, skipping")
-    sys.exit(0)
+# Scan main.py as raw bytes through mmap instead of decoding it to a str
+with open(MAIN_PY, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+    if mm.find(b"privacy_policy") != -1:
+        print("Privacy route already exists, skipping")
+        sys.exit(0)
+    offset = mm.find(marker)
+    if offset == -1:
+        print("ERROR: Could not find insertion marker")
+        sys.exit(1)
+    # Copy both halves out before the file is truncated for writing
+    head, tail = mm[:offset], mm[offset:]
 
-if marker in content:
-    content = content.replace(marker, PRIVACY_ROUTE + marker)
-    with open(MAIN_PY, "w") as f:
-        f.write(content)
-    print("Privacy route added successfully")
-else:
-    print("ERROR: Could not find insertion marker")
-    sys.exit(1)
+with open(MAIN_PY, "wb") as f:
+    f.write(head)
+    f.write(PRIVACY_ROUTE.encode())
+    f.write(tail)
+print("Privacy route added successfully")
@@ -3,23 +3,268 @@ Role-Based Access Control (RBAC) Engine for Spark AI Admin Portal.
 Manages roles, permissions, hierarchy, and data scoping.
 """
 
+import inspect
 import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import wraps
 from datetime import datetime
-from typing import Optional, Dict, List
+from types import MappingProxyType
+from typing import Any, Callable, Optional, Dict, List
 
 DB_PATH = "users.db"
 
 
+# One long-lived connection per thread; permission checks run on every
+# admin request and shouldn't pay for a connect each time
+_local = threading.local()
+
+
 def _get_db():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA journal_mode=WAL")
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(DB_PATH, cached_statements=256)
+        conn.row_factory = sqlite3.Row
+        # journal_mode=WAL persists on the file (set by user_auth);
+        # the rest are per-connection settings.
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-16000")
+        conn.execute("PRAGMA mmap_size=67108864")
+        # Shrink the WAL back after checkpoints instead of leaving it at its high-water mark
+        conn.execute("PRAGMA journal_size_limit=67108864")
+        _local.conn = conn
+    elif conn.in_transaction:
+        # A previous call failed mid-write; don't keep holding the lock
+        conn.rollback()
     return conn
 
 
+# Role assignment writers queue here rather than racing each other for
+# SQLite's write lock and retrying on SQLITE_BUSY
+_write_lock = threading.Lock()
+
+
+@contextmanager
+def _write_txn():
+    """One writer at a time per process, with the database write lock taken up front."""
+    conn = _get_db()
+    with _write_lock:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+
+# Bit per action in a flattened permission mask: read=1, write=2, ... approve=32
+ACTION_BIT = {action: 1 << i for i, action in enumerate(("read", "write", "edit", "delete", "export", "approve"))}
+_ACTION_COLS = tuple(f"can_{action}" for action in ACTION_BIT)
+
+# Data scopes. Scopes read from the database are interned onto these same
+# objects, so callers can compare with `is` as well as `==`.
+SCOPE_OWN = sys.intern("own")
+SCOPE_DEPARTMENT = sys.intern("department")
+SCOPE_COMPANY = sys.intern("company")
+
+
+def _scope(value: Optional[str]) -> str:
+    return sys.intern(value) if value else SCOPE_OWN
+
+
+def _fetch_dicts(sql: str, params: tuple = ()) -> List[Dict]:
+    """Run a query and build plain dicts straight from the tuples, skipping sqlite3.Row."""
+    cur = _get_db().cursor()
+    cur.row_factory = None
+    rows = cur.execute(sql, params).fetchall()
+    cols = [d[0] for d in cur.description]
+    return [dict(zip(cols, row)) for row in rows]
+
+
+# ─── Permission Cache ───
+# Permission lookups are cached in-process. Keys carry _perm_version, so a
+# result computed before a mutation can never be served after it; the TTL
+# bounds staleness for writes made outside this module.
+
+_PERM_CACHE_TTL = 60
+# Role permission matrices only change through this module's own writes
+# (which bump the version), so they can live longer than user lookups
+_ROLE_PERMS_TTL = 300
+_PERM_CACHE_MAX = 100_000
+_perm_cache: Dict[tuple, tuple] = {}
+_perm_version = 0
+_perm_lock = threading.Lock()
+# Callbacks for caches outside this module (route-level caches, other
+# instances) that must drop their copies when roles or permissions change
+_invalidation_listeners: List[Callable[[str, Dict], None]] = []
+
+
+def on_permission_change(fn: Callable[[str, Dict], None]) -> Callable[[str, Dict], None]:
+    """Register fn(event, info) to run after every role/permission change. Usable as a decorator."""
+    _invalidation_listeners.append(fn)
+    return fn
+
+
+def invalidate_permission_cache(event: str = "permission_change", info: Optional[Dict] = None):
+    """Drop every cached permission lookup and notify listeners. Call after changing roles or permissions."""
+    global _perm_version
+    with _perm_lock:
+        _perm_version += 1
+        _perm_cache.clear()
+    for fn in _invalidation_listeners:
+        try:
+            fn(event, info or {})
+        except Exception as e:
+            print(f"[WARN] Permission change listener failed: {e}")
+
+
+class _Flight:
+    __slots__ = ("done", "ok", "value")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.ok = False
+        self.value = None
+
+
+# Loads in progress, so concurrent misses on the same key share one
+# computation instead of all hitting the database at once
+_inflight: Dict[tuple, _Flight] = {}
+_INFLIGHT_WAIT = 5.0
+
+
+def _singleflight(key: tuple, compute: Callable[[], Any]) -> Any:
+    with _perm_lock:
+        flight = _inflight.get(key)
+        leader = flight is None
+        if leader:
+            flight = _inflight[key] = _Flight()
+    if not leader:
+        # If the leader fails or stalls, compute independently
+        if flight.done.wait(_INFLIGHT_WAIT) and flight.ok:
+            return flight.value
+        return compute()
+    try:
+        flight.value = compute()
+        flight.ok = True
+        return flight.value
+    finally:
+        with _perm_lock:
+            _inflight.pop(key, None)
+        flight.done.set()
+
+
+def _cached(key: tuple, compute: Callable[[], Any], ttl: float = _PERM_CACHE_TTL) -> Any:
+    key = (_perm_version,) + key
+    now = time.monotonic()
+    hit = _perm_cache.get(key)
+    if hit is not None and hit[0] > now:
+        return hit[1]
+    value = _singleflight(key, compute)
+    if len(_perm_cache) >= _PERM_CACHE_MAX:
+        _perm_cache.clear()
+    _perm_cache[key] = (now + ttl, value)
+    return value
+
+
+# Per-request memo: auth helpers call reset_request_cache() when a request
+# starts, and repeated checks within it return the first answer. Outside a
+# request (background jobs, startup) nothing is memoized.
+_request_memo: ContextVar[Optional[dict]] = ContextVar("rbac_request_memo", default=None)
+
+
+def reset_request_cache():
+    """Start a fresh permission memo for the current request context."""
+    _request_memo.set({})
+
+
+def _request_memoized(fn):
+    sig = inspect.signature(fn)
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        memo = _request_memo.get()
+        if memo is None:
+            return fn(*args, **kwargs)
+        # Key on the bound arguments so f(u, m), f(u, m, "read") and
+        # f(u, m, action="read") share one entry
+        bound = sig.bind(*args, **kwargs)
+        bound.apply_defaults()
+        key = (_perm_version, fn.__name__) + bound.args
+        if key not in memo:
+            memo[key] = fn(*bound.args)
+        return memo[key]
+    return wrapper
+
+
+@dataclass(slots=True, frozen=True)
+class _PermSnapshot:
+    """The whole RBAC read model, rebuilt after any change. Permission checks
+    are answered from it without SQL."""
+    version: int
+    built_at: float
+    masks: Dict[tuple, tuple]          # (role_id, module) -> (perm_bits, data_scope)
+    overrides: Dict[int, Dict[str, tuple]]  # user_id -> module -> (grant_bits, deny_bits)
+    staff_roles: Dict[int, int]        # user_id -> role_id
+    role_levels: Dict[int, int]        # role_id -> level
+    role_names: Dict[int, str]         # role_id -> name
+
+
+_snapshot = _PermSnapshot(-1, 0.0, {}, {}, {}, {}, {})
+
+
+def _get_snapshot() -> _PermSnapshot:
+    snap = _snapshot
+    if snap.version == _perm_version and time.monotonic() - snap.built_at < _PERM_CACHE_TTL:
+        return snap
+    version = _perm_version
+    return _singleflight(("snapshot", version), lambda: _build_snapshot(version))
+
+
+def _build_snapshot(version: int) -> _PermSnapshot:
+    global _snapshot
+    conn = _get_db()
+    masks = {
+        (row["role_id"], row["module"]): (row["perm_bits"], _scope(row["data_scope"]))
+        for row in conn.execute("SELECT role_id, module, perm_bits, data_scope FROM permissions")
+    }
+    # Custom overrides: 1=grant, 0=deny, -1=inherit from role
+    overrides = {}
+    for row in conn.execute(
+        "SELECT user_id, module, can_read, can_write, can_edit, can_delete, can_export, can_approve FROM user_permissions"
+    ):
+        grant = deny = 0
+        for col, bit in zip(_ACTION_COLS, ACTION_BIT.values()):
+            if row[col] == 1:
+                grant |= bit
+            elif row[col] == 0:
+                deny |= bit
+        overrides.setdefault(row["user_id"], {})[row["module"]] = (grant, deny)
+    staff_roles = dict(conn.execute("SELECT id, role_id FROM users WHERE role_id IS NOT NULL").fetchall())
+    role_levels = {}
+    role_names = {}
+    for role_id, level, name in conn.execute("SELECT id, level, name FROM roles"):
+        role_levels[role_id] = level
+        role_names[role_id] = name
+    snap = _PermSnapshot(version, time.monotonic(), masks, overrides, staff_roles, role_levels, role_names)
+    _snapshot = snap
+    return snap
+
+
+def load_permission_snapshot():
+    """Build the in-memory permission snapshot now instead of on the first check."""
+    _get_snapshot()
+
+
 # ─── Role Hierarchy ───
 
-ROLE_HIERARCHY = [
+ROLE_HIERARCHY = (
     {"name": "owner", "display_name": "Owner", "level": 0, "department": None, "description": "Full unrestricted access to everything"},
     {"name": "general_manager", "display_name": "General Manager", "level": 1, "department": None, "description": "Operational oversight across all departments"},
     {"name": "sales_hod", "display_name": "Sales HOD", "level": 2, "department": "sales", "description": "Head of Sales department"},
@@ -31,22 +276,34 @@ ROLE_HIERARCHY = [
     {"name": "customer_support_agent", "display_name": "Customer Support Agent", "level": 3, "department": "customer_care", "description": "Customer support team member"},
     {"name": "prediction_analyst", "display_name": "Prediction Analyst", "level": 3, "department": "predictions", "description": "Predictions team member"},
     {"name": "technical_support_agent", "display_name": "Technical Support Agent", "level": 3, "department": "technical", "description": "Technical support team member"},
-]
+)
 
 # Modules that can have permissions
-ALL_MODULES = [
+ALL_MODULES = (
     "dashboard", "online_users", "users", "subscriptions", "transactions",
     "withdrawals", "community", "referrals", "access_codes", "support",
     "broadcast", "employees", "activity_logs", "security", "predictions",
     "sales", "settings", "pricing", "bots", "analytics",
     "documentation", "extension", "social_media",
     "blog", "finance", "technical",
-]
+)
+_ALL_MODULES_SET = frozenset(ALL_MODULES)
+
+
+def _frozen(d: Dict) -> MappingProxyType:
+    """Read-only view of a nested dict; module-level tables are shared by every caller."""
+    return MappingProxyType({k: _frozen(v) if isinstance(v, dict) else v for k, v in d.items()})
+
+
+def _thawed(d) -> Dict:
+    """Plain, mutable deep copy of a _frozen() mapping, safe to hand to callers."""
+    return {k: _thawed(v) if isinstance(v, MappingProxyType) else v for k, v in d.items()}
+
 
 # Default permission matrix: role_name -> {module: {perms}}
 # R=read, W=write, E=edit, D=delete, X=export, A=approve
 # Scope: own, department, company
-DEFAULT_PERMISSIONS = {
+DEFAULT_PERMISSIONS = _frozen({
     "owner": {
         "dashboard":     {"read": 1, "write": 1, "edit": 1, "delete": 1, "export": 1, "approve": 1, "scope": "company"},
         "users":         {"read": 1, "write": 1, "edit": 1, "delete": 1, "export": 1, "approve": 1, "scope": "company"},
@@ -175,271 +432,315 @@ DEFAULT_PERMISSIONS = {
         "community":     {"read": 1, "write": 0, "edit": 0, "delete": 0, "export": 0, "approve": 0, "scope": "own"},
         "activity_logs": {"read": 1, "write": 0, "edit": 0, "delete": 0, "export": 0, "approve": 0, "scope": "own"},
     },
+})
+
+
+
+def _perm_mask(perms: Dict) -> int:
+    mask = 0
+    for action, bit in ACTION_BIT.items():
+        if perms.get(action):
+            mask |= bit
+    return mask
+
+
+# DEFAULT_PERMISSIONS flattened per role into parallel tuples aligned with
+# ALL_MODULES: role_name -> (masks, scopes)
+_DEFAULT_MASKS = {
+    role_name: (
+        tuple(_perm_mask(modules.get(module, {})) for module in ALL_MODULES),
+        tuple(_scope(modules.get(module, {}).get("scope")) for module in ALL_MODULES),
+    )
+    for role_name, modules in DEFAULT_PERMISSIONS.items()
+}
+_NO_MASKS = ((0,) * len(ALL_MODULES), (SCOPE_OWN,) * len(ALL_MODULES))
+
+# Every {read, write, ..., scope} dict get_effective_permissions can return,
+# keyed by (mask, scope); callers get copies
+_PERM_TEMPLATES = {
+    (mask, scope): {**{action: 1 if mask & bit else 0 for action, bit in ACTION_BIT.items()}, "scope": scope}
+    for mask in range(1 << len(ACTION_BIT))
+    for scope in (SCOPE_OWN, SCOPE_DEPARTMENT, SCOPE_COMPANY)
 }
 
+# Static payload for get_all_roles_permissions()
+_ALL_ROLES_PERMISSIONS = _frozen({
+    role["name"]: {
+        "display_name": role["display_name"],
+        "level": role["level"],
+        "department": role["department"],
+        "description": role["description"],
+        "permissions": _thawed(DEFAULT_PERMISSIONS.get(role["name"], {})),
+    }
+    for role in ROLE_HIERARCHY
+})
+
+
+# Legacy users.staff_role written alongside each RBAC role for backward
+# compatibility; stored on roles.legacy_staff_role at seed time. Roles not
+# listed here (including custom roles) fall back to super_admin.
+LEGACY_STAFF_ROLES = {
+    "owner": "super_admin",
+    "general_manager": "accounting",
+    "customer_care_hod": "technical_support",
+    "customer_support_agent": "customer_care",
+    "sales_hod": "accounting",
+    "predictions_hod": "super_admin",
+    "marketing_hod": "super_admin",
+    "sales_agent": "accounting",
+    "prediction_analyst": "super_admin",
+}
+
+# Legacy users.staff_role values and the RBAC role each migrates to
+MIGRATION_MAP = {
+    "super_admin": "owner",
+    "customer_care": "customer_support_agent",
+    "technical_support": "technical_hod",
+    "accounting": "general_manager",
+}
+
+# Resolves every legacy user's target role in one statement
+_MIGRATE_LEGACY_SQL = f"""
+    WITH m(legacy, new_name) AS (VALUES {", ".join("(?, ?)" for _ in MIGRATION_MAP)})
+    UPDATE users SET role_id = r.id, department = r.department
+    FROM m JOIN roles r ON r.name = m.new_name
+    WHERE users.staff_role = m.legacy AND users.role_id IS NULL
+"""
+_MIGRATE_LEGACY_PARAMS = tuple(v for pair in MIGRATION_MAP.items() for v in pair)
+
 
 # ─── Seed Functions ───
 
 def seed_default_roles():
     """Populate the roles table with the default hierarchy. Idempotent."""
     conn = _get_db()
+    existing = {r[0]: r[1] for r in conn.execute("SELECT name, legacy_staff_role FROM roles")}
+    missing = [role for role in ROLE_HIERARCHY if role["name"] not in existing]
+    # Roles seeded before legacy_staff_role existed
+    backfill = [(legacy, name) for name, legacy in LEGACY_STAFF_ROLES.items()
+                if name in existing and existing[name] is None]
+    if not missing and not backfill:
+        return
     now = datetime.now().isoformat()
-    for role in ROLE_HIERARCHY:
-        existing = conn.execute("SELECT id FROM roles WHERE name = ?", (role["name"],)).fetchone()
-        if not existing:
-            conn.execute(
-                "INSERT INTO roles (name, display_name, level, department, description, is_system, created_at) VALUES (?, ?, ?, ?, ?, 1, ?)",
-                (role["name"], role["display_name"], role["level"], role["department"], role["description"], now),
-            )
+    conn.executemany(
+        """INSERT OR IGNORE INTO roles (name, display_name, level, department, description, is_system, created_at, legacy_staff_role)
+           VALUES (?, ?, ?, ?, ?, 1, ?, ?)""",
+        [(role["name"], role["display_name"], role["level"], role["department"], role["description"], now,
+          LEGACY_STAFF_ROLES.get(role["name"]))
+         for role in missing],
+    )
+    conn.executemany("UPDATE roles SET legacy_staff_role = ? WHERE name = ?", backfill)
     conn.commit()
-    conn.close()
+    invalidate_permission_cache("roles_seeded")
 
 
 def seed_default_permissions():
     """Populate the permissions table with the default permission matrix. Idempotent."""
     conn = _get_db()
-    for role_name, modules in DEFAULT_PERMISSIONS.items():
-        role = conn.execute("SELECT id FROM roles WHERE name = ?", (role_name,)).fetchone()
-        if not role:
-            continue
-        role_id = role["id"]
-        for module, perms in modules.items():
-            existing = conn.execute(
-                "SELECT id FROM permissions WHERE role_id = ? AND module = ?",
-                (role_id, module),
-            ).fetchone()
-            if not existing:
-                conn.execute(
-                    """INSERT INTO permissions (role_id, module, can_read, can_write, can_edit, can_delete, can_export, can_approve, data_scope)
-                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                    (role_id, module, perms["read"], perms["write"], perms["edit"],
-                     perms["delete"], perms["export"], perms["approve"], perms["scope"]),
-                )
+    role_ids = {r["name"]: r["id"] for r in conn.execute("SELECT name, id FROM roles")}
+    existing = {(r[0], r[1]) for r in conn.execute("SELECT role_id, module FROM permissions")}
+    # Rows that already exist (including admin edits to them) are left alone
+    rows = [
+        (role_id, module, _perm_mask(perms), perms["scope"])
+        for role_name, modules in DEFAULT_PERMISSIONS.items()
+        if (role_id := role_ids.get(role_name)) is not None
+        for module, perms in modules.items()
+        if (role_id, module) not in existing
+    ]
+    if not rows:
+        return
+    conn.executemany(
+        "INSERT OR IGNORE INTO permissions (role_id, module, perm_bits, data_scope) VALUES (?, ?, ?, ?)",
+        rows,
+    )
     conn.commit()
-    conn.close()
+    invalidate_permission_cache("permissions_seeded")
 
 
 def migrate_legacy_roles():
     """Map existing staff_role text values to the new role_id system."""
-    MIGRATION_MAP = {
-        "super_admin": "owner",
-        "customer_care": "customer_support_agent",
-        "technical_support": "technical_hod",
-        "accounting": "general_manager",
-    }
     conn = _get_db()
-    staff = conn.execute("SELECT id, staff_role FROM users WHERE staff_role IS NOT NULL AND role_id IS NULL").fetchall()
-    for user in staff:
-        new_role_name = MIGRATION_MAP.get(user["staff_role"])
-        if new_role_name:
-            role = conn.execute("SELECT id, department FROM roles WHERE name = ?", (new_role_name,)).fetchone()
-            if role:
-                conn.execute(
-                    "UPDATE users SET role_id = ?, department = ? WHERE id = ?",
-                    (role["id"], role["department"], user["id"]),
-                )
+    cur = conn.execute(_MIGRATE_LEGACY_SQL, _MIGRATE_LEGACY_PARAMS)
     conn.commit()
-    conn.close()
+    if cur.rowcount:
+        invalidate_permission_cache("roles_migrated", {"count": cur.rowcount})
 
 
 # ─── Permission Checking ───
 
+def _user_role_id(user_id: int) -> Optional[int]:
+    role_id = _get_snapshot().staff_roles.get(user_id)
+    if role_id is not None:
+        return role_id
+    # Staff accounts created outside this module since the last rebuild
+    return _cached(("role_id", user_id), lambda: _load_role_id(user_id))
+
+
+def _load_role_id(user_id: int) -> Optional[int]:
+    row = _get_db().execute("SELECT role_id FROM users WHERE id = ?", (user_id,)).fetchone()
+    return row["role_id"] if row and row["role_id"] else None
+
+
+def _user_mask(snap: _PermSnapshot, user_id: int, role_id: int, module: str) -> int:
+    """Role bits for the module with the user's custom grants and denials applied."""
+    entry = snap.masks.get((role_id, module))
+    mask = entry[0] if entry else 0
+    user_overrides = snap.overrides.get(user_id)
+    if user_overrides:
+        grant, deny = user_overrides.get(module, (0, 0))
+        mask = (mask | grant) & ~deny
+    return mask
+
+
+@_request_memoized
 def has_permission(user_id: int, module: str, action: str = "read") -> bool:
     """Check if a user has permission to perform an action on a module.
     Checks custom user overrides first, then falls back to role defaults.
     """
-    action_col = f"can_{action}"
-    if action_col not in ("can_read", "can_write", "can_edit", "can_delete", "can_export", "can_approve"):
+    bit = ACTION_BIT.get(action)
+    if bit is None:
         return False
-
-    conn = _get_db()
-    user = conn.execute("SELECT role_id FROM users WHERE id = ?", (user_id,)).fetchone()
-    if not user or not user["role_id"]:
-        conn.close()
+    role_id = _user_role_id(user_id)
+    if role_id is None:
         return False
 
-    # Check custom user override first
-    custom = conn.execute(
-        f"SELECT {action_col} FROM user_permissions WHERE user_id = ? AND module = ?",
-        (user_id, module),
-    ).fetchone()
+    return bool(_user_mask(_get_snapshot(), user_id, role_id, module) & bit)
 
-    if custom and custom[action_col] != -1:
-        conn.close()
-        return bool(custom[action_col] == 1)
 
-    # Fall back to role default
-    perm = conn.execute(
-        f"SELECT {action_col} FROM permissions WHERE role_id = ? AND module = ?",
-        (user["role_id"], module),
-    ).fetchone()
-    conn.close()
-    return bool(perm and perm[action_col])
+def has_permission_batch(user_id: int, checks: List[tuple]) -> List[bool]:
+    """Check many (module, action) pairs for one user, same rules as has_permission."""
+    role_id = _user_role_id(user_id)
+    if role_id is None:
+        return [False] * len(checks)
+    snap = _get_snapshot()
+    return [
+        bool(_user_mask(snap, user_id, role_id, module) & ACTION_BIT.get(action, 0))
+        for module, action in checks
+    ]
 
 
+def has_permissions_bulk(user_ids: List[int], module: str, action: str = "read") -> Dict[int, bool]:
+    """Check one module/action for many users at once. Returns {user_id: bool}."""
+    bit = ACTION_BIT.get(action)
+    snap = _get_snapshot()
+    result = {}
+    for user_id in user_ids:
+        role_id = _user_role_id(user_id) if bit is not None else None
+        result[user_id] = role_id is not None and bool(_user_mask(snap, user_id, role_id, module) & bit)
+    return result
+
+
+@_request_memoized
 def get_data_scope(user_id: int, module: str) -> str:
     """Get the data scope for a user on a module: 'own', 'department', or 'company'."""
-    conn = _get_db()
-    user = conn.execute("SELECT role_id FROM users WHERE id = ?", (user_id,)).fetchone()
-    if not user or not user["role_id"]:
-        conn.close()
-        return "own"
-
-    perm = conn.execute(
-        "SELECT data_scope FROM permissions WHERE role_id = ? AND module = ?",
-        (user["role_id"], module),
-    ).fetchone()
-    conn.close()
-    return perm["data_scope"] if perm else "own"
+    role_id = _user_role_id(user_id)
+    if role_id is None:
+        return SCOPE_OWN
+    entry = _get_snapshot().masks.get((role_id, module))
+    return entry[1] if entry else SCOPE_OWN
 
 
+@_request_memoized
 def get_role_level(user_id: int) -> int:
     """Get the hierarchy level for a user. 0=owner, 1=gm, 2=hod, 3=staff. Returns 99 if no role."""
-    conn = _get_db()
-    user = conn.execute("SELECT role_id FROM users WHERE id = ?", (user_id,)).fetchone()
-    if not user or not user["role_id"]:
-        conn.close()
+    role_id = _user_role_id(user_id)
+    if role_id is None:
         return 99
-
-    role = conn.execute("SELECT level FROM roles WHERE id = ?", (user["role_id"],)).fetchone()
-    conn.close()
-    return role["level"] if role else 99
+    return _get_snapshot().role_levels.get(role_id, 99)
 
 
 def get_user_role(user_id: int) -> Optional[Dict]:
     """Get full role info for a user."""
-    conn = _get_db()
-    row = conn.execute(
+    row = _cached(("role", user_id), lambda: _load_user_role(user_id))
+    return dict(row) if row else None
+
+
+def _load_user_role(user_id: int) -> Optional[sqlite3.Row]:
+    return _get_db().execute(
         """SELECT r.id, r.name, r.display_name, r.level, r.department, r.description
            FROM users u JOIN roles r ON u.role_id = r.id
            WHERE u.id = ?""",
         (user_id,),
     ).fetchone()
-    conn.close()
-    return dict(row) if row else None
 
 
 def get_accessible_modules(user_id: int) -> List[Dict]:
     """Get all modules a user can access with their permission details (includes custom overrides)."""
-    effective = get_effective_permissions(user_id)
-    if not effective:
-        return []
-    result = []
-    for module, perms in effective.items():
-        if perms.get("read", 0) == 1:
-            result.append({
-                "module": module,
-                "can_read": perms.get("read", 0),
-                "can_write": perms.get("write", 0),
-                "can_edit": perms.get("edit", 0),
-                "can_delete": perms.get("delete", 0),
-                "can_export": perms.get("export", 0),
-                "can_approve": perms.get("approve", 0),
-                "data_scope": perms.get("scope", "own"),
-            })
-    return result
+    read = ACTION_BIT["read"]
+    return [
+        {
+            "module": module,
+            "can_read": 1,
+            "can_write": 1 if mask & ACTION_BIT["write"] else 0,
+            "can_edit": 1 if mask & ACTION_BIT["edit"] else 0,
+            "can_delete": 1 if mask & ACTION_BIT["delete"] else 0,
+            "can_export": 1 if mask & ACTION_BIT["export"] else 0,
+            "can_approve": 1 if mask & ACTION_BIT["approve"] else 0,
+            "data_scope": scope,
+        }
+        for module, mask, scope in _effective_masks(user_id)
+        if mask & read
+    ]
 
 
 # ─── Custom Per-User Permissions ───
 
 def get_role_permissions_by_name(role_name: str) -> Dict:
     """Get the default permission matrix for a role from DEFAULT_PERMISSIONS."""
-    return DEFAULT_PERMISSIONS.get(role_name, {})
+    return _thawed(DEFAULT_PERMISSIONS.get(role_name, {}))
 
 
 def get_all_roles_permissions() -> Dict:
     """Get all roles with their default permissions for display in role assignment modal."""
-    result = {}
-    for role in ROLE_HIERARCHY:
-        role_name = role["name"]
-        result[role_name] = {
-            "display_name": role["display_name"],
-            "level": role["level"],
-            "department": role["department"],
-            "description": role["description"],
-            "permissions": DEFAULT_PERMISSIONS.get(role_name, {}),
-        }
-    return result
+    return _thawed(_ALL_ROLES_PERMISSIONS)
 
 
 def get_user_custom_permissions(user_id: int) -> Dict:
     """Get custom permission overrides for a user from user_permissions table.
     Returns: {module: {can_read: -1|0|1, can_write: -1|0|1, ...}}
     """
-    conn = _get_db()
-    rows = conn.execute(
+    # The snapshot holds an entry for every user with override rows, so
+    # most users are answered without a query
+    if user_id not in _get_snapshot().overrides:
+        return {}
+    cur = _get_db().cursor()
+    cur.row_factory = None
+    rows = cur.execute(
         "SELECT module, can_read, can_write, can_edit, can_delete, can_export, can_approve FROM user_permissions WHERE user_id = ?",
         (user_id,),
     ).fetchall()
-    conn.close()
-    result = {}
-    for row in rows:
-        result[row["module"]] = {
-            "can_read": row["can_read"],
-            "can_write": row["can_write"],
-            "can_edit": row["can_edit"],
-            "can_delete": row["can_delete"],
-            "can_export": row["can_export"],
-            "can_approve": row["can_approve"],
-        }
-    return result
+    return {row[0]: dict(zip(_ACTION_COLS, row[1:])) for row in rows}
 
 
-def get_effective_permissions(user_id: int) -> Dict:
-    """Get merged permissions: role defaults + user custom overrides.
-    Returns: {module: {read: 0|1, write: 0|1, ..., scope: str}}
-    Custom overrides: 1=grant, 0=deny, -1=inherit from role.
-    """
-    conn = _get_db()
-    user = conn.execute("SELECT role_id FROM users WHERE id = ?", (user_id,)).fetchone()
-    if not user or not user["role_id"]:
-        conn.close()
-        return {}
+def _effective_masks(user_id: int) -> tuple:
+    """Role defaults merged with custom overrides as (module, mask, scope) rows."""
+    return _cached(("masks", user_id), lambda: _load_effective_masks(user_id))
 
-    role = conn.execute("SELECT name FROM roles WHERE id = ?", (user["role_id"],)).fetchone()
-    conn.close()
-    if not role:
-        return {}
 
-    role_name = role["name"]
-    role_perms = DEFAULT_PERMISSIONS.get(role_name, {})
-    custom_overrides = get_user_custom_permissions(user_id)
-
-    # Start with all modules from role defaults
-    effective = {}
-    all_modules_set = set(ALL_MODULES)
-
-    # First, apply role defaults
-    for module in all_modules_set:
-        role_mod = role_perms.get(module, {})
-        effective[module] = {
-            "read": role_mod.get("read", 0),
-            "write": role_mod.get("write", 0),
-            "edit": role_mod.get("edit", 0),
-            "delete": role_mod.get("delete", 0),
-            "export": role_mod.get("export", 0),
-            "approve": role_mod.get("approve", 0),
-            "scope": role_mod.get("scope", "own"),
-        }
+def _load_effective_masks(user_id: int) -> tuple:
+    # Role name and overrides both come from the snapshot, so no query is needed
+    role_id = _user_role_id(user_id)
+    snap = _get_snapshot()
+    role_name = snap.role_names.get(role_id)
+    if role_name is None:
+        return ()
 
-    # Then, apply custom overrides
-    for module, overrides in custom_overrides.items():
-        if module not in effective:
-            effective[module] = {"read": 0, "write": 0, "edit": 0, "delete": 0, "export": 0, "approve": 0, "scope": "own"}
+    masks, scopes = _DEFAULT_MASKS.get(role_name, _NO_MASKS)
+    rows = {module: [mask, scope] for module, mask, scope in zip(ALL_MODULES, masks, scopes)}
 
-        action_map = {
-            "can_read": "read", "can_write": "write", "can_edit": "edit",
-            "can_delete": "delete", "can_export": "export", "can_approve": "approve",
-        }
-        for db_col, action_key in action_map.items():
-            override_val = overrides.get(db_col, -1)
-            if override_val == 1:
-                effective[module][action_key] = 1
-            elif override_val == 0:
-                effective[module][action_key] = 0
-            # -1 means inherit, so keep role default
+    for module, (grant, deny) in snap.overrides.get(user_id, {}).items():
+        row = rows.setdefault(module, [0, SCOPE_OWN])
+        row[0] = (row[0] | grant) & ~deny
 
-    return effective
+    return tuple((module, mask, scope) for module, (mask, scope) in rows.items())
+
+
+def get_effective_permissions(user_id: int) -> Dict:
+    """Get merged permissions: role defaults + user custom overrides.
+    Returns: {module: {read: 0|1, write: 0|1, ..., scope: str}}
+    Custom overrides: 1=grant, 0=deny, -1=inherit from role.
+    """
+    return {module: _PERM_TEMPLATES[mask, scope].copy() for module, mask, scope in _effective_masks(user_id)}
 
 
 def set_user_custom_permissions(user_id: int, permissions: Dict) -> Dict:
@@ -450,50 +751,33 @@ def set_user_custom_permissions(user_id: int, permissions: Dict) -> Dict:
     conn = _get_db()
     user = conn.execute("SELECT id FROM users WHERE id = ?", (user_id,)).fetchone()
     if not user:
-        conn.close()
         return {"success": False, "error": "User not found"}
 
+    upserts = []
+    deletes = []
     for module, perms in permissions.items():
-        if module not in ALL_MODULES:
+        if module not in _ALL_MODULES_SET:
             continue
-
-        existing = conn.execute(
-            "SELECT id FROM user_permissions WHERE user_id = ? AND module = ?",
-            (user_id, module),
-        ).fetchone()
-
-        vals = {
-            "can_read": perms.get("can_read", -1),
-            "can_write": perms.get("can_write", -1),
-            "can_edit": perms.get("can_edit", -1),
-            "can_delete": perms.get("can_delete", -1),
-            "can_export": perms.get("can_export", -1),
-            "can_approve": perms.get("can_approve", -1),
-        }
-
+        vals = tuple(perms.get(col, -1) for col in _ACTION_COLS)
         # If all values are -1 (inherit), remove the row
-        if all(v == -1 for v in vals.values()):
-            if existing:
-                conn.execute("DELETE FROM user_permissions WHERE user_id = ? AND module = ?", (user_id, module))
-            continue
-
-        if existing:
-            conn.execute(
-                """UPDATE user_permissions SET can_read=?, can_write=?, can_edit=?, can_delete=?,
-                   can_export=?, can_approve=? WHERE user_id=? AND module=?""",
-                (vals["can_read"], vals["can_write"], vals["can_edit"],
-                 vals["can_delete"], vals["can_export"], vals["can_approve"], user_id, module),
-            )
+        if all(v == -1 for v in vals):
+            deletes.append((user_id, module))
         else:
-            conn.execute(
-                """INSERT INTO user_permissions (user_id, module, can_read, can_write, can_edit, can_delete, can_export, can_approve)
-                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
-                (user_id, module, vals["can_read"], vals["can_write"], vals["can_edit"],
-                 vals["can_delete"], vals["can_export"], vals["can_approve"]),
-            )
+            upserts.append((user_id, module) + vals)
+
+    # One transaction for the whole payload; rolled back if any row fails
+    with conn:
+        conn.executemany("DELETE FROM user_permissions WHERE user_id = ? AND module = ?", deletes)
+        conn.executemany(
+            """INSERT INTO user_permissions (user_id, module, can_read, can_write, can_edit, can_delete, can_export, can_approve)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT(user_id, module) DO UPDATE SET
+                   can_read=excluded.can_read, can_write=excluded.can_write, can_edit=excluded.can_edit,
+                   can_delete=excluded.can_delete, can_export=excluded.can_export, can_approve=excluded.can_approve""",
+            upserts,
+        )
 
-    conn.commit()
-    conn.close()
+    invalidate_permission_cache("user_permissions_change", {"user_id": user_id})
     return {"success": True}
 
 
@@ -502,7 +786,7 @@ def clear_user_custom_permissions(user_id: int) -> Dict:
     conn = _get_db()
     conn.execute("DELETE FROM user_permissions WHERE user_id = ?", (user_id,))
     conn.commit()
-    conn.close()
+    invalidate_permission_cache("user_permissions_change", {"user_id": user_id})
     return {"success": True}
 
 
@@ -510,45 +794,48 @@ def clear_user_custom_permissions(user_id: int) -> Dict:
 
 def get_all_roles() -> List[Dict]:
     """Get all roles with their permission counts."""
-    conn = _get_db()
-    roles = conn.execute(
-        """SELECT r.*, COUNT(p.id) as permission_count,
-                  (SELECT COUNT(*) FROM users u WHERE u.role_id = r.id) as staff_count
-           FROM roles r LEFT JOIN permissions p ON r.id = p.id
-           GROUP BY r.id ORDER BY r.level, r.name""",
-    ).fetchall()
-    conn.close()
-    return [dict(r) for r in roles]
+    return _fetch_dicts(
+        """WITH pc AS (SELECT role_id, COUNT(*) AS c FROM permissions GROUP BY role_id),
+                sc AS (SELECT role_id, COUNT(*) AS c FROM users WHERE role_id IS NOT NULL GROUP BY role_id)
+           SELECT r.id, r.name, r.display_name, r.level, r.department, r.description, r.is_system, r.created_at,
+                  COALESCE(pc.c, 0) AS permission_count, COALESCE(sc.c, 0) AS staff_count
+           FROM roles r
+           LEFT JOIN pc ON pc.role_id = r.id
+           LEFT JOIN sc ON sc.role_id = r.id
+           ORDER BY r.level, r.name""",
+    )
 
 
 def get_role_permissions(role_id: int) -> List[Dict]:
     """Get all permissions for a specific role."""
-    conn = _get_db()
-    rows = conn.execute(
-        "SELECT * FROM permissions WHERE role_id = ? ORDER BY module",
+    rows = _cached(("role_perms", role_id), lambda: tuple(_load_role_permissions(role_id)), _ROLE_PERMS_TTL)
+    return [dict(row) for row in rows]
+
+
+def _load_role_permissions(role_id: int) -> List[Dict]:
+    return _fetch_dicts(
+        """SELECT id, role_id, module, can_read, can_write, can_edit, can_delete, can_export, can_approve, data_scope
+           FROM permissions WHERE role_id = ? ORDER BY module""",
         (role_id,),
-    ).fetchall()
-    conn.close()
-    return [dict(r) for r in rows]
+    )
 
 
 def create_role(name: str, display_name: str, level: int, department: str = None, description: str = "") -> Dict:
     """Create a new custom role."""
     conn = _get_db()
-    existing = conn.execute("SELECT id FROM roles WHERE name = ?", (name,)).fetchone()
-    if existing:
-        conn.close()
-        return {"success": False, "error": "Role name already exists"}
-
     now = datetime.now().isoformat()
-    conn.execute(
-        "INSERT INTO roles (name, display_name, level, department, description, is_system, created_at) VALUES (?, ?, ?, ?, ?, 0, ?)",
+    # UNIQUE(name) turns a duplicate into an empty RETURNING set
+    row = conn.execute(
+        """INSERT INTO roles (name, display_name, level, department, description, is_system, created_at)
+           VALUES (?, ?, ?, ?, ?, 0, ?)
+           ON CONFLICT(name) DO NOTHING RETURNING id""",
         (name, display_name, level, department, description, now),
-    )
+    ).fetchone()
     conn.commit()
-    role_id = conn.execute("SELECT id FROM roles WHERE name = ?", (name,)).fetchone()["id"]
-    conn.close()
-    return {"success": True, "role_id": role_id}
+    if not row:
+        return {"success": False, "error": "Role name already exists"}
+    invalidate_permission_cache("role_created", {"role_id": row["id"]})
+    return {"success": True, "role_id": row["id"]}
 
 
 def update_role_permission(role_id: int, module: str, permissions: Dict) -> Dict:
@@ -556,33 +843,16 @@ def update_role_permission(role_id: int, module: str, permissions: Dict) -> Dict
     conn = _get_db()
     role = conn.execute("SELECT id FROM roles WHERE id = ?", (role_id,)).fetchone()
     if not role:
-        conn.close()
         return {"success": False, "error": "Role not found"}
 
-    existing = conn.execute(
-        "SELECT id FROM permissions WHERE role_id = ? AND module = ?",
-        (role_id, module),
-    ).fetchone()
-
-    if existing:
-        conn.execute(
-            """UPDATE permissions SET can_read=?, can_write=?, can_edit=?, can_delete=?,
-               can_export=?, can_approve=?, data_scope=? WHERE role_id=? AND module=?""",
-            (permissions.get("read", 0), permissions.get("write", 0), permissions.get("edit", 0),
-             permissions.get("delete", 0), permissions.get("export", 0), permissions.get("approve", 0),
-             permissions.get("scope", "own"), role_id, module),
-        )
-    else:
-        conn.execute(
-            """INSERT INTO permissions (role_id, module, can_read, can_write, can_edit, can_delete, can_export, can_approve, data_scope)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-            (role_id, module, permissions.get("read", 0), permissions.get("write", 0),
-             permissions.get("edit", 0), permissions.get("delete", 0), permissions.get("export", 0),
-             permissions.get("approve", 0), permissions.get("scope", "own")),
-        )
+    conn.execute(
+        """INSERT INTO permissions (role_id, module, perm_bits, data_scope) VALUES (?, ?, ?, ?)
+           ON CONFLICT(role_id, module) DO UPDATE SET perm_bits=excluded.perm_bits, data_scope=excluded.data_scope""",
+        (role_id, module, _perm_mask(permissions), permissions.get("scope", "own")),
+    )
 
     conn.commit()
-    conn.close()
+    invalidate_permission_cache("role_permission_change", {"role_id": role_id, "module": module})
     return {"success": True}
 
 
@@ -591,10 +861,8 @@ def delete_role(role_id: int) -> Dict:
     conn = _get_db()
     role = conn.execute("SELECT is_system FROM roles WHERE id = ?", (role_id,)).fetchone()
     if not role:
-        conn.close()
         return {"success": False, "error": "Role not found"}
     if role["is_system"]:
-        conn.close()
         return {"success": False, "error": "Cannot delete system roles"}
 
     # Unassign users from this role
@@ -602,52 +870,54 @@ def delete_role(role_id: int) -> Dict:
     conn.execute("DELETE FROM permissions WHERE role_id = ?", (role_id,))
     conn.execute("DELETE FROM roles WHERE id = ?", (role_id,))
     conn.commit()
-    conn.close()
+    invalidate_permission_cache("role_deleted", {"role_id": role_id})
     return {"success": True}
 
 
+# Assigns the role and returns it in one statement; also updates the legacy
+# staff_role for backward compatibility. No row comes back when either the
+# user or the role doesn't exist.
+_ASSIGN_ROLE_UPDATE = """
+    UPDATE users SET role_id = r.id, department = r.department,
+                     staff_role = COALESCE(r.legacy_staff_role, 'super_admin')
+    FROM roles r WHERE r.id = ?1 AND users.id = ?2
+"""
+_ASSIGN_ROLE_SQL = _ASSIGN_ROLE_UPDATE + """
+    RETURNING users.role_id AS id, (SELECT name FROM roles WHERE id = ?1) AS name, users.department
+"""
+
+
 def assign_role(user_id: int, role_id: int) -> Dict:
     """Assign a role to a user."""
-    conn = _get_db()
-    user = conn.execute("SELECT id FROM users WHERE id = ?", (user_id,)).fetchone()
-    if not user:
-        conn.close()
-        return {"success": False, "error": "User not found"}
+    with _write_txn() as conn:
+        cur = conn.cursor()
+        cur.row_factory = None
+        row = cur.execute(_ASSIGN_ROLE_SQL, (role_id, user_id)).fetchone()
+    if not row:
+        user_exists = conn.execute("SELECT EXISTS(SELECT 1 FROM users WHERE id = ?)", (user_id,)).fetchone()[0]
+        return {"success": False, "error": "Role not found" if user_exists else "User not found"}
 
-    role = conn.execute("SELECT id, name, department FROM roles WHERE id = ?", (role_id,)).fetchone()
-    if not role:
-        conn.close()
-        return {"success": False, "error": "Role not found"}
+    invalidate_permission_cache("role_change", {"user_id": user_id, "role_id": role_id})
+    _, role_name, department = row
+    return {"success": True, "role": {"id": role_id, "name": role_name, "department": department}}
 
-    # Also update legacy staff_role for backward compatibility
-    legacy_map = {
-        "owner": "super_admin",
-        "general_manager": "accounting",
-        "customer_care_hod": "technical_support",
-        "customer_support_agent": "customer_care",
-        "sales_hod": "accounting",
-        "predictions_hod": "super_admin",
-        "marketing_hod": "super_admin",
-        "sales_agent": "accounting",
-        "prediction_analyst": "super_admin",
-    }
 
-    conn.execute(
-        "UPDATE users SET role_id = ?, department = ?, staff_role = ? WHERE id = ?",
-        (role_id, role["department"], legacy_map.get(role["name"], "super_admin"), user_id),
-    )
-    conn.commit()
-    conn.close()
-    return {"success": True, "role": dict(role)}
+def assign_roles_bulk(assignments: List[tuple]) -> Dict:
+    """Assign roles to many users in one transaction. Takes (user_id, role_id) pairs.
+    Pairs whose user or role doesn't exist are skipped."""
+    with _write_txn() as conn:
+        cur = conn.executemany(_ASSIGN_ROLE_UPDATE, [(role_id, user_id) for user_id, role_id in assignments])
+    if cur.rowcount:
+        invalidate_permission_cache("role_change", {"count": cur.rowcount})
+    return {"success": True, "assigned": cur.rowcount}
 
 
 def remove_role(user_id: int) -> Dict:
     """Remove a user's role (demote to regular user)."""
-    conn = _get_db()
-    conn.execute(
-        "UPDATE users SET role_id = NULL, department = NULL, staff_role = NULL WHERE id = ?",
-        (user_id,),
-    )
-    conn.commit()
-    conn.close()
+    with _write_txn() as conn:
+        conn.execute(
+            "UPDATE users SET role_id = NULL, department = NULL, staff_role = NULL WHERE id = ?",
+            (user_id,),
+        )
+    invalidate_permission_cache("role_change", {"user_id": user_id, "role_id": None})
     return {"success": True}
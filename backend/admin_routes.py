@@ -3,16 +3,23 @@ Admin Routes for Spark AI - Extracted from main.py
 All /api/admin/* endpoints with RBAC integration and activity logging.
 """
 
-from fastapi import APIRouter, Header, HTTPException, UploadFile, File, Request, Query
-from fastapi.responses import FileResponse
-from pydantic import BaseModel
-from typing import Optional, List, Dict
+from fastapi import APIRouter, Depends, Header, HTTPException, UploadFile, File, Request, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, ORJSONResponse, Response
+from pydantic import BaseModel, ConfigDict
+from typing import Optional, List, Dict, Literal
 from pathlib import Path
 from datetime import datetime, timedelta, timezone
+import asyncio
+import hashlib
+import hmac
+import time
 import uuid
 import os
 import sqlite3
 
+import orjson
+
 import user_auth
 import access_codes
 import community
@@ -28,81 +35,97 @@ import social_media_hub
 import promotional_packages
 import blog
 
-admin_router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+class _AdminJSONResponse(ORJSONResponse):
+    """orjson-encoded response that, like json.dumps, accepts non-str dict keys."""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+# Dashboard and list endpoints return large payloads; encode them with orjson
+admin_router = APIRouter(prefix="/api/admin", tags=["admin"], default_response_class=_AdminJSONResponse)
 
 ADMIN_PASSWORD = os.environ.get("ADMIN_PASSWORD", "")
+_ADMIN_PASSWORD_BYTES = ADMIN_PASSWORD.encode()
 
 # Support file upload config
 SUPPORT_UPLOADS_DIR = Path(__file__).parent / "uploads" / "support"
 MAX_SUPPORT_FILE_SIZE = 10 * 1024 * 1024  # 10 MB
-ALLOWED_SUPPORT_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".pdf", ".doc", ".docx", ".txt", ".csv", ".xls", ".xlsx"}
+ALLOWED_SUPPORT_EXTENSIONS = frozenset({".jpg", ".jpeg", ".png", ".gif", ".webp", ".pdf", ".doc", ".docx", ".txt", ".csv", ".xls", ".xlsx"})
 
 
 # ─── Request Models ───
 
-class AdminLoginRequest(BaseModel):
+class _RequestModel(BaseModel):
+    """Base for request bodies: unknown fields are dropped and bodies are read-only."""
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
+class AdminLoginRequest(_RequestModel):
     password: str
 
-class CreateCodeRequest(BaseModel):
+class CreateCodeRequest(_RequestModel):
     days_valid: int = 30
     label: str = ""
 
-class AdminResetPasswordRequest(BaseModel):
+class AdminResetPasswordRequest(_RequestModel):
     new_password: str
 
-class SetTierRequest(BaseModel):
-    tier: str
+class SetTierRequest(_RequestModel):
+    tier: Literal["free", "pro"]
     days: int = None  # Optional: auto-expire pro after N days (1-30)
 
-class SetActiveRequest(BaseModel):
+class SetActiveRequest(_RequestModel):
     is_active: bool
     reason: Optional[str] = None
     custom_note: Optional[str] = None
 
-class SetRoleRequest(BaseModel):
+class SetRoleRequest(_RequestModel):
     role: Optional[str] = None
 
-class CreateStaffRequest(BaseModel):
+class CreateStaffRequest(_RequestModel):
     email: str
     password: str
     display_name: str
     role: str
 
-class SupportMessageRequest(BaseModel):
+class SupportMessageRequest(_RequestModel):
     content: str
     category: str = None
 
-class AdminWithdrawalAction(BaseModel):
+class AdminWithdrawalAction(_RequestModel):
     admin_notes: str = ""
 
-class AdjustBalanceRequest(BaseModel):
+class AdjustBalanceRequest(_RequestModel):
     amount_usd: float = 0.0
     amount_kes: float = 0.0
     reason: str = ""
     adjustment_type: str = "admin_adjust"
 
-class AssignRoleRequest(BaseModel):
+class AssignRoleRequest(_RequestModel):
     role_id: int
 
-class UserPermissionsRequest(BaseModel):
+class UserPermissionsRequest(_RequestModel):
     permissions: Dict  # {module: {can_read: -1|0|1, can_write: -1|0|1, ...}}
 
-class CreateRoleRequest(BaseModel):
+class CreateRoleRequest(_RequestModel):
     name: str
     display_name: str
     level: int
     department: Optional[str] = None
     description: str = ""
 
-class UpdatePermissionRequest(BaseModel):
+class UpdatePermissionRequest(_RequestModel):
     module: str
     read: int = 0
     write: int = 0
     edit: int = 0
     delete: int = 0
     export: int = 0
+    approve: int = 0
+    scope: Literal["own", "department", "company"] = "own"
 
-class BroadcastRequest(BaseModel):
+class BroadcastRequest(_RequestModel):
     title: str
     message: str
     channel: str = "email"
@@ -110,33 +133,31 @@ class BroadcastRequest(BaseModel):
     target_user_ids: Optional[List[int]] = None
     target_user_names: Optional[List[str]] = None
 
-class RejectBroadcastRequest(BaseModel):
+class RejectBroadcastRequest(_RequestModel):
     reason: str = ""
-    approve: int = 0
-    scope: str = "own"
 
-class CreateBotsRequest(BaseModel):
+class CreateBotsRequest(_RequestModel):
     count: int
     name_prefix: str = ""
 
-class BotIdsRequest(BaseModel):
+class BotIdsRequest(_RequestModel):
     bot_ids: List[int]
 
-class AssignBotsRequest(BaseModel):
+class AssignBotsRequest(_RequestModel):
     bot_ids: List[int]
     employee_user_id: int
 
-class BotActionRequest(BaseModel):
+class BotActionRequest(_RequestModel):
     bot_id: int
     action: str
     target_id: str = ""
     message: str = ""
     reaction: str = ""
 
-class UpdatePricingConfigRequest(BaseModel):
+class UpdatePricingConfigRequest(_RequestModel):
     updates: dict
 
-class CreatePlanRequest(BaseModel):
+class CreatePlanRequest(_RequestModel):
     plan_id: str
     name: str
     price: float
@@ -144,17 +165,17 @@ class CreatePlanRequest(BaseModel):
     duration_days: int
     features: list = []
 
-class DeletePlanRequest(BaseModel):
+class DeletePlanRequest(_RequestModel):
     plan_id: str
 
-class BotBatchActionRequest(BaseModel):
+class BotBatchActionRequest(_RequestModel):
     bot_ids: List[int]
     action: str
     target_id: str = ""
     message: str = ""
     reaction: str = ""
 
-class BotStaggeredBatchRequest(BaseModel):
+class BotStaggeredBatchRequest(_RequestModel):
     bot_ids: List[int]
     action: str
     target_id: str = ""
@@ -164,7 +185,7 @@ class BotStaggeredBatchRequest(BaseModel):
     delay_max: int = 40
     messages_list: List[str] = []
 
-class BotCreatePredictionRequest(BaseModel):
+class BotCreatePredictionRequest(_RequestModel):
     bot_id: int
     fixture_id: str
     team_a_name: str
@@ -176,7 +197,7 @@ class BotCreatePredictionRequest(BaseModel):
     predicted_btts: str = None
     odds: float = None
 
-class BotBatchCreatePredictionRequest(BaseModel):
+class BotBatchCreatePredictionRequest(_RequestModel):
     bot_ids: List[int]
     fixture_id: str
     team_a_name: str
@@ -189,6 +210,11 @@ class BotBatchCreatePredictionRequest(BaseModel):
 
 # ─── Auth Helpers ───
 
+def _is_admin_password(password: Optional[str]) -> bool:
+    """Constant-time comparison against ADMIN_PASSWORD."""
+    return password is not None and hmac.compare_digest(password.encode(), _ADMIN_PASSWORD_BYTES)
+
+
 def _get_current_user(authorization: str = None):
     """Extract user from Authorization header."""
     if not authorization or not authorization.startswith("Bearer "):
@@ -202,6 +228,60 @@ def _get_current_user(authorization: str = None):
     return payload
 
 
+# Verified staff identity per bearer token, so a warm admin request skips the
+# JWT decode and the staff_role/profile queries. Keyed by a digest so raw
+# tokens aren't kept in memory. Entries expire with the token at the latest.
+_AUTH_CACHE_TTL = 60
+_AUTH_CACHE_MAX = 4096
+_auth_cache: Dict[bytes, tuple] = {}  # digest -> (expires_at, user_id, legacy_role, display_name)
+
+
+@admin_rbac.on_permission_change
+def _drop_auth_cache(event: str, info: Dict):
+    # Role assignments also rewrite users.staff_role
+    _auth_cache.clear()
+
+
+def _auth_cache_key(token: str) -> bytes:
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+
+def _cached_staff_identity(authorization: str = None) -> Optional[tuple]:
+    """_get_staff_identity() answered from the cache only (no JWT decode, no DB); None on a miss."""
+    if not authorization or not authorization.startswith("Bearer "):
+        return None
+    hit = _auth_cache.get(_auth_cache_key(authorization.replace("Bearer ", "")))
+    if hit is not None and hit[0] > time.time():
+        return hit[1:]
+    return None
+
+
+def _get_staff_identity(authorization: str = None) -> Optional[tuple]:
+    """Resolve a bearer token to (user_id, legacy_role, display_name), cached briefly."""
+    if not authorization or not authorization.startswith("Bearer "):
+        return None
+    token = authorization.replace("Bearer ", "")
+    key = _auth_cache_key(token)
+    now = time.time()
+    hit = _auth_cache.get(key)
+    if hit is not None and hit[0] > now:
+        return hit[1:]
+
+    payload = user_auth.verify_token(token)
+    if not payload or not payload.get("user_id"):
+        return None
+    user_id = payload["user_id"]
+    # Staff role and display name come from the same users row
+    row = user_auth.get_staff_identity(user_id)
+    legacy_role, display_name = row if row else (None, f"Agent {user_id}")
+    identity = (user_id, legacy_role, display_name)
+    if len(_auth_cache) >= _AUTH_CACHE_MAX:
+        _auth_cache.clear()
+    expires = now + _AUTH_CACHE_TTL
+    _auth_cache[key] = (min(expires, payload.get("exp", expires)),) + identity
+    return identity
+
+
 def _check_admin_auth(
     x_admin_password: str = None,
     authorization: str = None,
@@ -214,7 +294,7 @@ def _check_admin_auth(
     Returns auth info dict or None.
     """
     # Legacy password auth (treated as owner)
-    if x_admin_password and x_admin_password == ADMIN_PASSWORD:
+    if x_admin_password and _is_admin_password(x_admin_password):
         return {
             "auth_type": "password",
             "user_id": None,
@@ -226,9 +306,10 @@ def _check_admin_auth(
 
     # JWT-based staff auth
     if authorization:
-        payload = _get_current_user(authorization)
-        if payload:
-            user_id = payload["user_id"]
+        admin_rbac.reset_request_cache()
+        identity = _get_staff_identity(authorization)
+        if identity:
+            user_id, legacy_role, display_name = identity
 
             # Try new RBAC system first
             role_info = admin_rbac.get_user_role(user_id)
@@ -239,45 +320,71 @@ def _check_admin_auth(
                         return None
                 elif required_roles:
                     # Legacy role check only when no RBAC module specified
-                    legacy_role = user_auth.get_staff_role(user_id)
                     if legacy_role and legacy_role not in required_roles:
                         return None
 
-                profile = user_auth.get_user_profile(user_id)
                 return {
                     "auth_type": "jwt",
                     "user_id": user_id,
-                    "staff_role": user_auth.get_staff_role(user_id) or role_info["name"],
+                    "staff_role": legacy_role or role_info["name"],
                     "role_name": role_info["name"],
                     "role_level": role_info["level"],
                     "department": role_info.get("department"),
-                    "display_name": profile["display_name"] if profile else f"Agent {user_id}",
+                    "display_name": display_name,
                 }
 
             # Fallback: legacy staff_role check (for unmigrated users)
-            legacy_role = user_auth.get_staff_role(user_id)
             if legacy_role:
                 if required_roles and legacy_role not in required_roles:
                     return None
-                profile = user_auth.get_user_profile(user_id)
                 return {
                     "auth_type": "jwt",
                     "user_id": user_id,
                     "staff_role": legacy_role,
                     "role_name": legacy_role,
                     "role_level": 3,
-                    "display_name": profile["display_name"] if profile else f"Agent {user_id}",
+                    "display_name": display_name,
                 }
 
     return None
 
 
+def require_admin(required_roles: set = None, required_module: str = None, required_action: str = "read",
+                  *, status_code: int = 401, detail: str = "Unauthorized"):
+    """Route dependency running _check_admin_auth; yields the auth dict or rejects the request.
+
+    Usage: auth: dict = Depends(require_admin(required_module="users", required_action="edit"))
+    """
+    # Plain def: cache misses hit SQLite (and can wait on another thread's
+    # load), so FastAPI must run this in the threadpool, not on the event loop
+    def dependency(x_admin_password: str = Header(None), authorization: str = Header(None)) -> dict:
+        auth = _check_admin_auth(x_admin_password, authorization, required_roles, required_module, required_action)
+        if not auth:
+            raise HTTPException(status_code=status_code, detail=detail)
+        return auth
+    return dependency
+
+
 def _get_client_ip(request: Request) -> str:
     """Extract client IP, checking X-Forwarded-For for proxied requests."""
-    forwarded = request.headers.get("x-forwarded-for")
-    if forwarded:
-        return forwarded.split(",")[0].strip()
-    return request.client.host if request.client else "unknown"
+    # Memoized on request.state: login logs the IP for both the session and the action
+    ip = getattr(request.state, "client_ip", None)
+    if ip is None:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            ip = forwarded.split(",")[0].strip()
+        else:
+            ip = request.client.host if request.client else "unknown"
+        request.state.client_ip = ip
+    return ip
+
+
+def _get_user_agent(request: Request) -> str:
+    """User-Agent header of the request, looked up once per request."""
+    ua = getattr(request.state, "user_agent", None)
+    if ua is None:
+        ua = request.state.user_agent = request.headers.get("user-agent", "")
+    return ua
 
 
 def _log_action(auth: dict, action: str, module: str, request: Request,
@@ -291,23 +398,42 @@ def _log_action(auth: dict, action: str, module: str, request: Request,
         target_id=target_id,
         details=details,
         ip_address=_get_client_ip(request),
-        user_agent=request.headers.get("user-agent", ""),
+        user_agent=_get_user_agent(request),
     )
 
 
+def _etag_json(request: Request, content) -> Response:
+    """JSON response with a content ETag; answers 304 when the client already has it.
+
+    For endpoints that dashboards poll but that rarely change (roles, codes, staff).
+    """
+    body = orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in (t.strip().removeprefix("W/") for t in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def _ok(result, default=None):
+    """Result of an asyncio.gather(..., return_exceptions=True) call, or default if it failed."""
+    return default if isinstance(result, Exception) else result
+
+
 # ═══════════════════════════════════════════════════════════
 #  AUTHENTICATION
 # ═══════════════════════════════════════════════════════════
 
 @admin_router.post("/login")
-async def admin_login(request: Request, body: AdminLoginRequest, authorization: str = Header(None)):
+def admin_login(request: Request, body: AdminLoginRequest, authorization: str = Header(None)):
     """Admin login - password or staff JWT."""
-    if body.password == ADMIN_PASSWORD:
+    if _is_admin_password(body.password):
         activity_logger.log_action(
             user_id=0, action="login", module="security",
             details={"method": "password", "role": "owner"},
             ip_address=_get_client_ip(request),
-            user_agent=request.headers.get("user-agent", ""),
+            user_agent=_get_user_agent(request),
         )
         return {"success": True, "message": "Admin authenticated", "role": "owner"}
 
@@ -320,19 +446,20 @@ async def admin_login(request: Request, body: AdminLoginRequest, authorization:
 
             if role_info or legacy_role:
                 # Create staff session
-                import hashlib
-                token_hash = hashlib.sha256(authorization.encode()).hexdigest()[:32]
+                # Opaque session label only (never looked up), so a 128-bit blake2b
+                # is plenty; same 32-char hex width as before
+                token_hash = hashlib.blake2b(authorization.encode(), digest_size=16).hexdigest()
                 activity_logger.create_staff_session(
                     user_id=user_id,
                     token_hash=token_hash,
                     ip_address=_get_client_ip(request),
-                    user_agent=request.headers.get("user-agent", ""),
+                    user_agent=_get_user_agent(request),
                 )
                 activity_logger.log_action(
                     user_id=user_id, action="login", module="security",
                     details={"method": "jwt", "role": role_info["name"] if role_info else legacy_role},
                     ip_address=_get_client_ip(request),
-                    user_agent=request.headers.get("user-agent", ""),
+                    user_agent=_get_user_agent(request),
                 )
 
                 return {
@@ -346,7 +473,7 @@ async def admin_login(request: Request, body: AdminLoginRequest, authorization:
 
 
 @admin_router.post("/logout")
-async def admin_logout(request: Request, authorization: str = Header(None)):
+def admin_logout(request: Request, authorization: str = Header(None)):
     """Admin logout - end session."""
     if authorization:
         payload = _get_current_user(authorization)
@@ -355,7 +482,7 @@ async def admin_logout(request: Request, authorization: str = Header(None)):
             activity_logger.log_action(
                 user_id=payload["user_id"], action="logout", module="security",
                 ip_address=_get_client_ip(request),
-                user_agent=request.headers.get("user-agent", ""),
+                user_agent=_get_user_agent(request),
             )
     return {"success": True}
 
@@ -365,44 +492,34 @@ async def admin_logout(request: Request, authorization: str = Header(None)):
 # ═══════════════════════════════════════════════════════════
 
 @admin_router.get("/my-permissions")
-async def get_my_permissions(x_admin_password: str = Header(None), authorization: str = Header(None)):
+def get_my_permissions(request: Request, auth: dict = Depends(require_admin())):
     """Get the current admin user's role and permissions."""
-    auth = _check_admin_auth(x_admin_password, authorization)
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-
     if auth["auth_type"] == "password":
         # Password auth = owner = all permissions
-        return {
+        return _etag_json(request, {
             "role": {"name": "owner", "display_name": "Owner", "level": 0, "department": None},
             "modules": [
                 {"module": m, "can_read": 1, "can_write": 1, "can_edit": 1,
                  "can_delete": 1, "can_export": 1, "can_approve": 1, "data_scope": "company"}
                 for m in admin_rbac.ALL_MODULES
             ],
-        }
+        })
 
     role_info = admin_rbac.get_user_role(auth["user_id"])
     modules = admin_rbac.get_accessible_modules(auth["user_id"])
-    return {"role": role_info, "modules": modules}
+    return _etag_json(request, {"role": role_info, "modules": modules})
 
 
 @admin_router.get("/roles")
-async def list_roles(x_admin_password: str = Header(None), authorization: str = Header(None)):
+def list_roles(request: Request, auth: dict = Depends(require_admin(required_module="employees", required_action="read"))):
     """List all roles with staff counts."""
-    auth = _check_admin_auth(x_admin_password, authorization, required_module="employees", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    return {"roles": admin_rbac.get_all_roles()}
+    return _etag_json(request, {"roles": admin_rbac.get_all_roles()})
 
 
 @admin_router.post("/roles")
-async def create_role(request: Request, body: CreateRoleRequest,
-                      x_admin_password: str = Header(None), authorization: str = Header(None)):
+def create_role(request: Request, body: CreateRoleRequest,
+                auth: dict = Depends(require_admin(required_module="security", required_action="write"))):
     """Create a new custom role (owner only)."""
-    auth = _check_admin_auth(x_admin_password, authorization, required_module="security", required_action="write")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     result = admin_rbac.create_role(body.name, body.display_name, body.level, body.department, body.description)
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["error"])
@@ -411,12 +528,9 @@ async def create_role(request: Request, body: CreateRoleRequest,
 
 
 @admin_router.put("/roles/{role_id}")
-async def update_role_permissions(role_id: int, request: Request, body: UpdatePermissionRequest,
-                                  x_admin_password: str = Header(None), authorization: str = Header(None)):
+def update_role_permissions(role_id: int, request: Request, body: UpdatePermissionRequest,
+                            auth: dict = Depends(require_admin(required_module="security", required_action="edit"))):
     """Update permissions for a role on a module (owner only)."""
-    auth = _check_admin_auth(x_admin_password, authorization, required_module="security", required_action="edit")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     result = admin_rbac.update_role_permission(role_id, body.module, {
         "read": body.read, "write": body.write, "edit": body.edit,
         "delete": body.delete, "export": body.export, "approve": body.approve, "scope": body.scope,
@@ -428,12 +542,9 @@ async def update_role_permissions(role_id: int, request: Request, body: UpdatePe
 
 
 @admin_router.get("/roles/{role_id}/permissions")
-async def get_role_perms(role_id: int, x_admin_password: str = Header(None), authorization: str = Header(None)):
+def get_role_perms(role_id: int, request: Request, auth: dict = Depends(require_admin(required_module="employees", required_action="read"))):
     """Get all permissions for a specific role."""
-    auth = _check_admin_auth(x_admin_password, authorization, required_module="employees", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    return {"permissions": admin_rbac.get_role_permissions(role_id)}
+    return _etag_json(request, {"permissions": admin_rbac.get_role_permissions(role_id)})
 
 
 # ═══════════════════════════════════════════════════════════
@@ -441,17 +552,13 @@ async def get_role_perms(role_id: int, x_admin_password: str = Header(None), aut
 # ═══════════════════════════════════════════════════════════
 
 @admin_router.get("/activity-logs")
-async def get_activity_logs(
+def get_activity_logs(
     user_id: int = None, action: str = None, module: str = None,
     from_date: str = None, to_date: str = None,
     page: int = 1, per_page: int = 50,
-    x_admin_password: str = Header(None), authorization: str = Header(None),
+    auth: dict = Depends(require_admin(required_module="activity_logs", required_action="read")),
 ):
     """Query activity logs with filters."""
-    auth = _check_admin_auth(x_admin_password, authorization, required_module="activity_logs", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-
     # Check data scope
     scope = "company"
     if auth.get("user_id"):
@@ -466,24 +573,18 @@ async def get_activity_logs(
 
 
 @admin_router.get("/activity-stats")
-async def get_activity_stats_endpoint(
+def get_activity_stats_endpoint(
     days: int = 7,
-    x_admin_password: str = Header(None), authorization: str = Header(None),
+    auth: dict = Depends(require_admin(required_module="activity_logs", required_action="read")),
 ):
     """Get activity log statistics for dashboard."""
-    auth = _check_admin_auth(x_admin_password, authorization, required_module="activity_logs", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     return activity_logger.get_activity_stats(days)
 
 
 @admin_router.get("/staff/{user_id}/activity")
-async def get_staff_activity(user_id: int, days: int = 30,
-                             x_admin_password: str = Header(None), authorization: str = Header(None)):
+def get_staff_activity(user_id: int, days: int = 30,
+                       auth: dict = Depends(require_admin(required_module="activity_logs", required_action="read"))):
     """Get a specific staff member's activity."""
-    auth = _check_admin_auth(x_admin_password, authorization, required_module="activity_logs", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     return {"activity": activity_logger.get_user_activity(user_id, days)}
 
 
@@ -492,42 +593,39 @@ async def get_staff_activity(user_id: int, days: int = 30,
 # ═══════════════════════════════════════════════════════════
 
 @admin_router.get("/staff/sessions")
-async def get_active_sessions(x_admin_password: str = Header(None), authorization: str = Header(None)):
+def get_active_sessions(auth: dict = Depends(require_admin(required_module="security", required_action="read"))):
     """Get all active staff sessions."""
-    auth = _check_admin_auth(x_admin_password, authorization, required_module="security", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     return {"sessions": activity_logger.get_active_staff_sessions()}
 
 
 @admin_router.post("/staff/{user_id}/terminate-session")
-async def terminate_staff_session(user_id: int, request: Request,
-                                  x_admin_password: str = Header(None), authorization: str = Header(None)):
+def terminate_staff_session(user_id: int, request: Request,
+                            auth: dict = Depends(require_admin(required_module="security", required_action="delete"))):
     """Force terminate a staff member's session (owner only)."""
-    auth = _check_admin_auth(x_admin_password, authorization, required_module="security", required_action="delete")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     result = activity_logger.terminate_session(user_id)
     _log_action(auth, "terminate_session", "security", request, "user", user_id)
     return result
 
 
 @admin_router.get("/staff/{user_id}/login-history")
-async def get_staff_login_history(user_id: int, x_admin_password: str = Header(None), authorization: str = Header(None)):
+def get_staff_login_history(user_id: int, auth: dict = Depends(require_admin(required_module="security", required_action="read"))):
     """Get login history for a staff member."""
-    auth = _check_admin_auth(x_admin_password, authorization, required_module="security", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     return {"history": activity_logger.get_login_history(user_id)}
 
 
 @admin_router.post("/staff/heartbeat")
 async def staff_heartbeat(authorization: str = Header(None)):
     """Update staff session activity (called periodically by frontend)."""
-    payload = _get_current_user(authorization)
-    if not payload:
+    # Warm path is memory-only: cached token identity plus an in-memory
+    # timestamp that activity_logger writes out in the background. A cache
+    # miss decodes the JWT and reads the users table, so that goes to the
+    # threadpool
+    identity = _cached_staff_identity(authorization)
+    if identity is None:
+        identity = await run_in_threadpool(_get_staff_identity, authorization)
+    if not identity:
         raise HTTPException(status_code=401, detail="Not authenticated")
-    activity_logger.update_session_activity(payload["user_id"])
+    activity_logger.update_session_activity(identity[0])
     return {"success": True}
 
 
@@ -536,33 +634,24 @@ async def staff_heartbeat(authorization: str = Header(None)):
 # ═══════════════════════════════════════════════════════════
 
 @admin_router.post("/codes/create")
-async def create_code(request: Request, body: CreateCodeRequest,
-                      x_admin_password: str = Header(None), authorization: str = Header(None)):
+def create_code(request: Request, body: CreateCodeRequest,
+                auth: dict = Depends(require_admin({'super_admin'}, required_module="access_codes", required_action="write"))):
     """Create a new access code."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin'}, required_module="access_codes", required_action="write")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     result = access_codes.create_access_code(days_valid=body.days_valid, label=body.label)
     _log_action(auth, "create_code", "access_codes", request, details={"label": body.label, "days": body.days_valid})
     return result
 
 
 @admin_router.get("/codes")
-async def list_codes(x_admin_password: str = Header(None), authorization: str = Header(None)):
+def list_codes(request: Request, auth: dict = Depends(require_admin({'super_admin'}, required_module="access_codes", required_action="read"))):
     """List all access codes."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin'}, required_module="access_codes", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    return {"codes": access_codes.list_all_codes()}
+    return _etag_json(request, {"codes": access_codes.list_all_codes()})
 
 
 @admin_router.delete("/codes/{code}")
-async def revoke_code(code: str, request: Request,
-                      x_admin_password: str = Header(None), authorization: str = Header(None)):
+def revoke_code(code: str, request: Request,
+                auth: dict = Depends(require_admin({'super_admin'}, required_module="access_codes", required_action="delete"))):
     """Revoke an access code."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin'}, required_module="access_codes", required_action="delete")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     success = access_codes.revoke_code(code)
     if success:
         _log_action(auth, "revoke_code", "access_codes", request, details={"code": code})
@@ -574,7 +663,7 @@ async def revoke_code(code: str, request: Request,
 #  PROMOTIONAL PACKAGES
 # ═══════════════════════════════════════════════════════════
 
-class CreatePromoRequest(BaseModel):
+class CreatePromoRequest(_RequestModel):
     name: str
     pro_days: int
     max_slots: int
@@ -582,16 +671,13 @@ class CreatePromoRequest(BaseModel):
     expires_at: str = ""
     description: str = ""
 
-class TogglePromoRequest(BaseModel):
+class TogglePromoRequest(_RequestModel):
     is_active: bool
 
 @admin_router.post("/promos")
-async def admin_create_promo(body: CreatePromoRequest, request: Request,
-                              x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_create_promo(body: CreatePromoRequest, request: Request,
+                        auth: dict = Depends(require_admin({'super_admin'}, required_module="settings", required_action="write"))):
     """Create a new promotional package."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin'}, required_module="settings", required_action="write")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     if body.pro_days < 1 or body.pro_days > 365:
         raise HTTPException(status_code=400, detail="Pro days must be between 1 and 365")
     if body.max_slots < 1:
@@ -608,31 +694,22 @@ async def admin_create_promo(body: CreatePromoRequest, request: Request,
     return result
 
 @admin_router.get("/promos")
-async def admin_list_promos(x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_list_promos(auth: dict = Depends(require_admin({'super_admin'}, required_module="settings", required_action="read"))):
     """List all promotional packages."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin'}, required_module="settings", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     return {"promos": promotional_packages.list_all_promos()}
 
 @admin_router.put("/promos/{promo_id}/toggle")
-async def admin_toggle_promo(promo_id: int, body: TogglePromoRequest, request: Request,
-                              x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_toggle_promo(promo_id: int, body: TogglePromoRequest, request: Request,
+                        auth: dict = Depends(require_admin({'super_admin'}, required_module="settings", required_action="write"))):
     """Activate or deactivate a promo."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin'}, required_module="settings", required_action="write")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     promotional_packages.toggle_promo(promo_id, body.is_active)
     _log_action(auth, "toggle_promo", "settings", request, details={"promo_id": promo_id, "is_active": body.is_active})
     return {"success": True}
 
 @admin_router.delete("/promos/{promo_id}")
-async def admin_delete_promo(promo_id: int, request: Request,
-                              x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_delete_promo(promo_id: int, request: Request,
+                        auth: dict = Depends(require_admin({'super_admin'}, required_module="settings", required_action="delete"))):
     """Delete a promotional package."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin'}, required_module="settings", required_action="delete")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     promotional_packages.delete_promo(promo_id)
     _log_action(auth, "delete_promo", "settings", request, details={"promo_id": promo_id})
     return {"success": True}
@@ -643,59 +720,45 @@ async def admin_delete_promo(promo_id: int, request: Request,
 # ═══════════════════════════════════════════════════════════
 
 @admin_router.get("/dashboard-stats")
-async def admin_dashboard_stats(x_admin_password: str = Header(None), authorization: str = Header(None)):
+async def admin_dashboard_stats(auth: dict = Depends(require_admin({'super_admin', 'accounting'},
+                                                                   required_module="dashboard", required_action="read"))):
     """Get full dashboard statistics."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin', 'accounting'}, required_module="dashboard", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-
-    user_stats = user_auth.get_user_stats()
-    community_stats = community.get_community_stats()
-    prediction_stats = prediction_tracker.get_accuracy_stats()
-    sub_stats = subscriptions.get_subscription_stats()
-
-    try:
-        balance_stats = community.get_balance_adjustment_stats()
-    except Exception:
-        balance_stats = None
-
-    # Activity stats for dashboard
-    try:
-        act_stats = activity_logger.get_activity_stats(7)
-    except Exception:
-        act_stats = None
-
-    # Active staff sessions
-    try:
-        active_sessions = activity_logger.get_active_staff_sessions()
-        staff_online = len(active_sessions)
-    except Exception:
-        staff_online = 0
+    # Independent stats queries run concurrently on the threadpool
+    (user_stats, community_stats, prediction_stats, sub_stats,
+     balance_stats, act_stats, active_sessions) = await asyncio.gather(
+        run_in_threadpool(user_auth.get_user_stats),
+        run_in_threadpool(community.get_community_stats),
+        run_in_threadpool(prediction_tracker.get_accuracy_stats),
+        run_in_threadpool(subscriptions.get_subscription_stats),
+        run_in_threadpool(community.get_balance_adjustment_stats),
+        run_in_threadpool(activity_logger.get_activity_stats, 7),
+        run_in_threadpool(activity_logger.get_active_staff_sessions),
+        return_exceptions=True,
+    )
+    # Core stats are required; the rest degrade to empty values
+    for result in (user_stats, community_stats, prediction_stats, sub_stats):
+        if isinstance(result, Exception):
+            raise result
 
     return {
         "users": user_stats,
         "community": community_stats,
         "predictions": prediction_stats,
         "subscriptions": sub_stats,
-        "balance_adjustments": balance_stats,
-        "activity": act_stats,
-        "staff_online": staff_online,
+        "balance_adjustments": _ok(balance_stats),
+        "activity": _ok(act_stats),
+        "staff_online": len(_ok(active_sessions, ())),
     }
 
 
 @admin_router.get("/transaction-analytics")
-async def admin_transaction_analytics(
-    x_admin_password: str = Header(None),
-    authorization: str = Header(None),
+def admin_transaction_analytics(
+    auth: dict = Depends(require_admin({'super_admin', 'accounting'}, required_module="dashboard", required_action="read")),
     currency: str = Query("kes"),
     start_date: str = Query(None),
     end_date: str = Query(None),
 ):
     """Get transaction analytics for a specific currency with optional date range."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin', 'accounting'}, required_module="dashboard", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-
     cur = currency.lower()
     if cur not in ("kes", "usd", "whop", "crypto"):
         cur = "kes"
@@ -793,20 +856,14 @@ async def admin_transaction_analytics(
 
 
 @admin_router.get("/transactions")
-async def admin_list_transactions(
-    x_admin_password: str = Header(None),
-    authorization: str = Header(None),
+def admin_list_transactions(
+    auth: dict = Depends(require_admin({'super_admin', 'accounting'}, required_module="sales", required_action="read")),
     method: str = Query("mpesa"),
     period: str = Query("all"),
     offset: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=200),
 ):
     """List individual transactions with user details, filtered by payment method and time period."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin', 'accounting'},
-                             required_module="sales", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-
     EAT = timezone(timedelta(hours=3))
     now_eat = datetime.now(EAT)
 
@@ -922,20 +979,14 @@ async def admin_list_transactions(
 
 
 @admin_router.get("/referral-stats")
-async def admin_referral_stats(x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_referral_stats(auth: dict = Depends(require_admin({'super_admin'}, required_module="referrals", required_action="read"))):
     """Get referral leaderboard."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin'}, required_module="referrals", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     return {"referrals": user_auth.get_all_referral_stats()}
 
 
 @admin_router.get("/referral-stats/{referrer_id}/referred-users")
-async def admin_referred_users(referrer_id: int, x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_referred_users(referrer_id: int, auth: dict = Depends(require_admin({'super_admin'}, required_module="referrals", required_action="read"))):
     """Get detailed list of users referred by a specific referrer."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin'}, required_module="referrals", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     return {"referred_users": user_auth.get_referred_users_detail(referrer_id)}
 
 
@@ -944,21 +995,17 @@ async def admin_referred_users(referrer_id: int, x_admin_password: str = Header(
 # ═══════════════════════════════════════════════════════════
 
 @admin_router.get("/super-referee/applications")
-async def admin_super_referee_applications(status: str = "all", x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_super_referee_applications(status: str = "all",
+                                     auth: dict = Depends(require_admin({'super_admin'}, required_module="referrals", required_action="read"))):
     """List super referee applications."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin'}, required_module="referrals", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     import super_referee
     return {"applications": super_referee.list_applications(status)}
 
 
 @admin_router.post("/super-referee/approve/{user_id}")
-async def admin_approve_super_referee(user_id: int, x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_approve_super_referee(user_id: int,
+                                auth: dict = Depends(require_admin({'super_admin'}, required_module="referrals", required_action="write"))):
     """Approve a super referee application."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin'}, required_module="referrals", required_action="write")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     import super_referee
     result = super_referee.approve_application(user_id, admin_name="admin")
     if not result["success"]:
@@ -967,11 +1014,9 @@ async def admin_approve_super_referee(user_id: int, x_admin_password: str = Head
 
 
 @admin_router.post("/super-referee/reject/{user_id}")
-async def admin_reject_super_referee(user_id: int, reason: str = "", x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_reject_super_referee(user_id: int, reason: str = "",
+                               auth: dict = Depends(require_admin({'super_admin'}, required_module="referrals", required_action="write"))):
     """Reject a super referee application."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin'}, required_module="referrals", required_action="write")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     import super_referee
     result = super_referee.reject_application(user_id, reason=reason, admin_name="admin")
     if not result["success"]:
@@ -980,11 +1025,9 @@ async def admin_reject_super_referee(user_id: int, reason: str = "", x_admin_pas
 
 
 @admin_router.post("/super-referee/revoke/{user_id}")
-async def admin_revoke_super_referee(user_id: int, x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_revoke_super_referee(user_id: int,
+                               auth: dict = Depends(require_admin({'super_admin'}, required_module="referrals", required_action="write"))):
     """Revoke super referee status."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin'}, required_module="referrals", required_action="write")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     import super_referee
     result = super_referee.revoke_super_referee(user_id)
     if not result["success"]:
@@ -993,11 +1036,8 @@ async def admin_revoke_super_referee(user_id: int, x_admin_password: str = Heade
 
 
 @admin_router.get("/super-referee/list")
-async def admin_list_super_referees(x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_list_super_referees(auth: dict = Depends(require_admin({'super_admin'}, required_module="referrals", required_action="read"))):
     """List all active super referees with stats."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin'}, required_module="referrals", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     import super_referee
     return {"super_referees": super_referee.list_super_referees()}
 
@@ -1007,11 +1047,8 @@ async def admin_list_super_referees(x_admin_password: str = Header(None), author
 # ═══════════════════════════════════════════════════════════
 
 @admin_router.get("/users")
-async def admin_list_users(x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_list_users(auth: dict = Depends(require_admin({'super_admin', 'technical_support'}, required_module="users", required_action="read"))):
     """List all users."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin', 'technical_support'}, required_module="users", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     users = user_auth.list_all_users()
     try:
         tracking = user_auth.get_all_users_tracking_summary()
@@ -1031,115 +1068,89 @@ async def admin_list_users(x_admin_password: str = Header(None), authorization:
 
 @admin_router.get("/users/{user_id}")
 async def admin_get_user(user_id: int, tx_page: int = 1, adj_page: int = 1,
-                         x_admin_password: str = Header(None), authorization: str = Header(None)):
+                         auth: dict = Depends(require_admin({'super_admin', 'technical_support', 'customer_care'},
+                                                            required_module="users", required_action="read"))):
     """Get full user profile details including subscription, wallet, transactions."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin', 'technical_support', 'customer_care'},
-                             required_module="users", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-
-    profile = user_auth.get_user_profile(user_id)
+    profile = await run_in_threadpool(user_auth.get_user_profile, user_id)
     if not profile:
         raise HTTPException(status_code=404, detail="User not found")
 
-    conn = user_auth._get_db()
-    row = conn.execute("SELECT is_active, login_count, last_login, referred_by FROM users WHERE id = ?", (user_id,)).fetchone()
-    if row:
-        profile["is_active"] = bool(row["is_active"])
-        profile["login_count"] = row["login_count"]
-        profile["last_login"] = row["last_login"]
-        profile["referred_by"] = row["referred_by"]
-
-        # Resolve referrer info
-        if row["referred_by"]:
-            ref_row = conn.execute(
-                "SELECT id, username, display_name, email FROM users WHERE id = ?",
-                (row["referred_by"],)
-            ).fetchone()
-            if ref_row:
+    def load_account():
+        conn = user_auth._get_db()
+        # Account fields and the referrer, if any, in one statement
+        row = conn.execute(
+            """SELECT u.is_active, u.login_count, u.last_login, u.referred_by,
+                      ref.id AS ref_id, ref.username AS ref_username,
+                      ref.display_name AS ref_display_name, ref.email AS ref_email
+               FROM users u LEFT JOIN users ref ON ref.id = u.referred_by
+               WHERE u.id = ?""",
+            (user_id,),
+        ).fetchone()
+        conn.close()
+        if row:
+            profile["is_active"] = bool(row["is_active"])
+            profile["login_count"] = row["login_count"]
+            profile["last_login"] = row["last_login"]
+            profile["referred_by"] = row["referred_by"]
+
+            # Resolve referrer info
+            if row["referred_by"] and row["ref_id"] is not None:
                 profile["referrer"] = {
-                    "id": ref_row["id"],
-                    "username": ref_row["username"],
-                    "display_name": ref_row["display_name"],
-                    "email": ref_row["email"],
+                    "id": row["ref_id"],
+                    "username": row["ref_username"],
+                    "display_name": row["ref_display_name"],
+                    "email": row["ref_email"],
                 }
-    conn.close()
 
-    # Credits info
-    try:
-        profile["credits"] = community.get_user_credits(user_id)
-    except Exception:
-        profile["credits"] = None
-
-    # Credit usage breakdown
-    try:
-        profile["credit_usage"] = community.get_credit_usage_breakdown(user_id)
-    except Exception:
-        profile["credit_usage"] = None
-
-    try:
-        profile["subscription"] = subscriptions.get_active_subscription(user_id)
-    except Exception:
-        profile["subscription"] = None
-
-    try:
+    def load_wallet():
         cdb = community._get_db()
         wallet = cdb.execute("SELECT balance_usd, balance_kes, total_earned_usd, total_earned_kes, total_sales FROM creator_wallets WHERE user_id = ?", (user_id,)).fetchone()
         cdb.close()
-        if wallet:
-            profile["wallet"] = dict(wallet)
-        else:
-            profile["wallet"] = None
-    except Exception:
-        profile["wallet"] = None
-
-    try:
-        profile["user_balance"] = community.get_user_balance(user_id)
-    except Exception:
-        profile["user_balance"] = None
+        return dict(wallet) if wallet else None
 
-    # Paginated balance adjustments (10 per page)
+    # Paginated balance adjustments and transactions (10 per page)
     adj_offset = (max(adj_page, 1) - 1) * 10
-    try:
-        adj_result = community.get_balance_adjustments(user_id, limit=10, offset=adj_offset, with_total=True)
-        profile["balance_adjustments"] = adj_result["items"]
-        profile["balance_adjustments_total"] = adj_result["total"]
-    except Exception:
-        profile["balance_adjustments"] = []
-        profile["balance_adjustments_total"] = 0
-
-    # Paginated transactions (10 per page)
     tx_offset = (max(tx_page, 1) - 1) * 10
-    try:
-        tx_result = daraja_payment.get_user_transactions(user_id, limit=10, offset=tx_offset, with_total=True)
-        profile["transactions"] = tx_result["items"]
-        profile["transactions_total"] = tx_result["total"]
-    except Exception:
-        profile["transactions"] = []
-        profile["transactions_total"] = 0
-
-    try:
-        profile["withdrawals"] = daraja_payment.get_user_withdrawals(user_id)
-    except Exception:
-        profile["withdrawals"] = []
 
-    try:
-        profile["tracking"] = user_auth.get_user_tracking_summary(user_id)
-    except Exception:
-        profile["tracking"] = None
+    # The sections are independent, so they load concurrently on the threadpool
+    (account, credits, credit_usage, subscription, wallet, user_balance,
+     adjustments, transactions, withdrawals, tracking) = await asyncio.gather(
+        run_in_threadpool(load_account),
+        run_in_threadpool(community.get_user_credits, user_id),
+        run_in_threadpool(community.get_credit_usage_breakdown, user_id),
+        run_in_threadpool(subscriptions.get_active_subscription, user_id),
+        run_in_threadpool(load_wallet),
+        run_in_threadpool(community.get_user_balance, user_id),
+        run_in_threadpool(community.get_balance_adjustments, user_id, limit=10, offset=adj_offset, with_total=True),
+        run_in_threadpool(daraja_payment.get_user_transactions, user_id, limit=10, offset=tx_offset, with_total=True),
+        run_in_threadpool(daraja_payment.get_user_withdrawals, user_id),
+        run_in_threadpool(user_auth.get_user_tracking_summary, user_id),
+        return_exceptions=True,
+    )
+    if isinstance(account, Exception):
+        raise account
+
+    profile["credits"] = _ok(credits)
+    profile["credit_usage"] = _ok(credit_usage)
+    profile["subscription"] = _ok(subscription)
+    profile["wallet"] = _ok(wallet)
+    profile["user_balance"] = _ok(user_balance)
+    adj_result = _ok(adjustments, {"items": [], "total": 0})
+    profile["balance_adjustments"] = adj_result["items"]
+    profile["balance_adjustments_total"] = adj_result["total"]
+    tx_result = _ok(transactions, {"items": [], "total": 0})
+    profile["transactions"] = tx_result["items"]
+    profile["transactions_total"] = tx_result["total"]
+    profile["withdrawals"] = _ok(withdrawals, [])
+    profile["tracking"] = _ok(tracking)
 
     return profile
 
 
 @admin_router.post("/users/{user_id}/set-tier")
-async def admin_set_tier(user_id: int, request: Request, body: SetTierRequest,
-                         x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_set_tier(user_id: int, request: Request, body: SetTierRequest,
+                   auth: dict = Depends(require_admin({'super_admin'}, required_module="users", required_action="edit"))):
     """Change a user's tier (free/pro)."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin'}, required_module="users", required_action="edit")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    if body.tier not in ("free", "pro"):
-        raise HTTPException(status_code=400, detail="Tier must be 'free' or 'pro'")
     if body.days is not None and (body.days < 1 or body.days > 30):
         raise HTTPException(status_code=400, detail="Days must be between 1 and 30")
     result = user_auth.set_user_tier(user_id, body.tier, days=body.days)
@@ -1148,12 +1159,9 @@ async def admin_set_tier(user_id: int, request: Request, body: SetTierRequest,
 
 
 @admin_router.post("/users/{user_id}/toggle-active")
-async def admin_toggle_active(user_id: int, request: Request, body: SetActiveRequest,
-                               x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_toggle_active(user_id: int, request: Request, body: SetActiveRequest,
+                         auth: dict = Depends(require_admin({'super_admin', 'technical_hod'}, required_module="users", required_action="edit"))):
     """Suspend or unsuspend a user. When suspending: hides predictions, refunds purchases, notifies buyers, sends email."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin', 'technical_hod'}, required_module="users", required_action="edit")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     result = user_auth.toggle_user_active(user_id, 1 if body.is_active else 0, reason=body.reason)
     _log_action(auth, "toggle_active", "users", request, "user", user_id,
                 {"is_active": body.is_active, "reason": body.reason, "custom_note": body.custom_note})
@@ -1181,12 +1189,9 @@ async def admin_toggle_active(user_id: int, request: Request, body: SetActiveReq
 
 
 @admin_router.post("/users/{user_id}/reset-password")
-async def admin_reset_password(user_id: int, request: Request, body: AdminResetPasswordRequest,
-                                x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_reset_password(user_id: int, request: Request, body: AdminResetPasswordRequest,
+                          auth: dict = Depends(require_admin({'super_admin'}, required_module="users", required_action="edit"))):
     """Admin: reset a user's password."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin'}, required_module="users", required_action="edit")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     result = user_auth.admin_reset_password(user_id, body.new_password)
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["error"])
@@ -1199,11 +1204,8 @@ async def admin_reset_password(user_id: int, request: Request, body: AdminResetP
 # ═══════════════════════════════════════════════════════════
 
 @admin_router.get("/creator-analytics")
-async def admin_creator_analytics(x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_creator_analytics(auth: dict = Depends(require_admin({'super_admin'}, required_module="community", required_action="read"))):
     """Get creator analytics with abnormal activity detection."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin'}, required_module="community", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     return community.get_creator_analytics_admin()
 
 
@@ -1211,12 +1213,9 @@ async def admin_creator_analytics(x_admin_password: str = Header(None), authoriz
 # ═══════════════════════════════════════════════════════════
 
 @admin_router.delete("/community/{prediction_id}")
-async def admin_delete_prediction(prediction_id: int, request: Request,
-                                   x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_delete_prediction(prediction_id: int, request: Request,
+                             auth: dict = Depends(require_admin({'super_admin'}, required_module="community", required_action="delete"))):
     """Delete a community prediction."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin'}, required_module="community", required_action="delete")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     result = community.delete_prediction(prediction_id)
     if not result["success"]:
         raise HTTPException(status_code=404, detail=result["error"])
@@ -1225,12 +1224,9 @@ async def admin_delete_prediction(prediction_id: int, request: Request,
 
 
 @admin_router.delete("/comment/{comment_id}")
-async def admin_delete_comment(comment_id: int, request: Request,
-                                x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_delete_comment(comment_id: int, request: Request,
+                          auth: dict = Depends(require_admin({'super_admin'}, required_module="community", required_action="delete"))):
     """Delete a specific comment."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin'}, required_module="community", required_action="delete")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     result = community.delete_comment(comment_id)
     if not result["success"]:
         raise HTTPException(status_code=404, detail=result["error"])
@@ -1243,35 +1239,27 @@ async def admin_delete_comment(comment_id: int, request: Request,
 # ═══════════════════════════════════════════════════════════
 
 @admin_router.get("/staff")
-async def admin_list_staff(x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_list_staff(request: Request, auth: dict = Depends(require_admin({'super_admin'}, required_module="employees", required_action="read"))):
     """List all staff members."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin'}, required_module="employees", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-
-    # Get staff with role info
+    # Get staff with role info (joined in the same query)
     staff = user_auth.get_staff_members()
-    conn = user_auth._get_db()
     for s in staff:
-        role = conn.execute(
-            "SELECT r.name, r.display_name, r.level, r.department FROM roles r JOIN users u ON u.role_id = r.id WHERE u.id = ?",
-            (s["id"],)
-        ).fetchone()
-        if role:
-            s["role_info"] = dict(role)
+        if s["role_name"] is not None:
+            s["role_info"] = {
+                "name": s["role_name"],
+                "display_name": s["role_display_name"],
+                "level": s["role_level"],
+                "department": s["role_department"],
+            }
         else:
             s["role_info"] = None
-    conn.close()
-    return {"staff": staff}
+    return _etag_json(request, {"staff": staff})
 
 
 @admin_router.post("/staff/{user_id}/set-role")
-async def admin_set_staff_role(user_id: int, request: Request, body: SetRoleRequest,
-                                x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_set_staff_role(user_id: int, request: Request, body: SetRoleRequest,
+                          auth: dict = Depends(require_admin({'super_admin'}, required_module="employees", required_action="edit"))):
     """Assign or remove a staff role (legacy endpoint)."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin'}, required_module="employees", required_action="edit")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     result = user_auth.set_staff_role(user_id, body.role)
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["error"])
@@ -1280,13 +1268,9 @@ async def admin_set_staff_role(user_id: int, request: Request, body: SetRoleRequ
 
 
 @admin_router.post("/staff/{user_id}/assign-role")
-async def admin_assign_role(user_id: int, request: Request, body: AssignRoleRequest,
-                             x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_assign_role(user_id: int, request: Request, body: AssignRoleRequest,
+                       auth: dict = Depends(require_admin(required_module="employees", required_action="edit"))):
     """Assign a new RBAC role to a staff member."""
-    auth = _check_admin_auth(x_admin_password, authorization, required_module="employees", required_action="edit")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-
     # Only owner/GM can assign roles
     if auth.get("role_level", 99) > 1:
         raise HTTPException(status_code=403, detail="Insufficient permissions to assign roles")
@@ -1299,33 +1283,23 @@ async def admin_assign_role(user_id: int, request: Request, body: AssignRoleRequ
 
 
 @admin_router.post("/staff/{user_id}/remove-role")
-async def admin_remove_role(user_id: int, request: Request,
-                             x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_remove_role(user_id: int, request: Request,
+                       auth: dict = Depends(require_admin(required_module="employees", required_action="delete"))):
     """Remove a staff member's role."""
-    auth = _check_admin_auth(x_admin_password, authorization, required_module="employees", required_action="delete")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     result = admin_rbac.remove_role(user_id)
     _log_action(auth, "remove_role", "employees", request, "user", user_id)
     return result
 
 
 @admin_router.get("/roles/permissions")
-async def admin_get_all_roles_permissions(x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_get_all_roles_permissions(auth: dict = Depends(require_admin(required_module="employees", required_action="read"))):
     """Get all roles with their default permission matrices for display in role assignment modal."""
-    auth = _check_admin_auth(x_admin_password, authorization, required_module="employees", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     return admin_rbac.get_all_roles_permissions()
 
 
 @admin_router.get("/staff/{user_id}/permissions")
-async def admin_get_staff_permissions(user_id: int, x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_get_staff_permissions(user_id: int, auth: dict = Depends(require_admin(required_module="employees", required_action="read"))):
     """Get a staff member's role permissions, custom overrides, and effective permissions."""
-    auth = _check_admin_auth(x_admin_password, authorization, required_module="employees", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-
     role_info = admin_rbac.get_user_role(user_id)
     role_perms = admin_rbac.get_role_permissions_by_name(role_info["name"]) if role_info else {}
     custom_overrides = admin_rbac.get_user_custom_permissions(user_id)
@@ -1340,13 +1314,9 @@ async def admin_get_staff_permissions(user_id: int, x_admin_password: str = Head
 
 
 @admin_router.post("/staff/{user_id}/permissions")
-async def admin_set_staff_permissions(user_id: int, request: Request, body: UserPermissionsRequest,
-                                       x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_set_staff_permissions(user_id: int, request: Request, body: UserPermissionsRequest,
+                                 auth: dict = Depends(require_admin(required_module="employees", required_action="edit"))):
     """Set custom permission overrides for a staff member."""
-    auth = _check_admin_auth(x_admin_password, authorization, required_module="employees", required_action="edit")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-
     # Only owner/GM can modify permissions
     if auth.get("role_level", 99) > 1:
         raise HTTPException(status_code=403, detail="Insufficient permissions to modify user permissions")
@@ -1361,13 +1331,9 @@ async def admin_set_staff_permissions(user_id: int, request: Request, body: User
 
 
 @admin_router.post("/staff/{user_id}/reset-permissions")
-async def admin_reset_staff_permissions(user_id: int, request: Request,
-                                          x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_reset_staff_permissions(user_id: int, request: Request,
+                                          auth: dict = Depends(require_admin(required_module="employees", required_action="edit"))):
     """Reset a staff member's permissions to role defaults (clear all custom overrides)."""
-    auth = _check_admin_auth(x_admin_password, authorization, required_module="employees", required_action="edit")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-
     if auth.get("role_level", 99) > 1:
         raise HTTPException(status_code=403, detail="Insufficient permissions to reset user permissions")
 
@@ -1377,12 +1343,9 @@ async def admin_reset_staff_permissions(user_id: int, request: Request,
 
 
 @admin_router.post("/staff/create")
-async def admin_create_staff(request: Request, body: CreateStaffRequest,
-                              x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_create_staff(request: Request, body: CreateStaffRequest,
+                        auth: dict = Depends(require_admin({'super_admin'}, required_module="employees", required_action="write"))):
     """Create a new staff account. Bypasses captcha and email verification."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin'}, required_module="employees", required_action="write")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     result = user_auth.create_staff_account(body.email, body.password, body.display_name, body.role)
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["error"])
@@ -1396,14 +1359,10 @@ async def admin_create_staff(request: Request, body: CreateStaffRequest,
 # ═══════════════════════════════════════════════════════════
 
 @admin_router.get("/active-users")
-async def admin_active_users(detailed: bool = False,
-                              x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_active_users(detailed: bool = False,
+                        auth: dict = Depends(require_admin({'super_admin', 'customer_care', 'technical_support'},
+                                                           required_module="online_users", required_action="read"))):
     """Get list of currently active/online users."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin', 'customer_care', 'technical_support'},
-                             required_module="online_users", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-
     users = community.get_active_users_list()
 
     if detailed and users:
@@ -1443,43 +1402,32 @@ async def admin_active_users(detailed: bool = False,
 # ═══════════════════════════════════════════════════════════
 
 @admin_router.get("/support/pending-count")
-async def admin_support_pending_count(x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_support_pending_count(auth: dict = Depends(require_admin({'super_admin', 'customer_care', 'technical_support'},
+                                                                   required_module="support", required_action="read"))):
     """Get count of active conversations with unread user messages."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin', 'customer_care', 'technical_support'},
-                             required_module="support", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     return {"pending_count": community.get_pending_support_count()}
 
 
 @admin_router.get("/support/conversations")
-async def admin_support_conversations(x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_support_conversations(auth: dict = Depends(require_admin({'super_admin', 'customer_care', 'technical_support'},
+                                                                   required_module="support", required_action="read"))):
     """List all support conversations."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin', 'customer_care', 'technical_support'},
-                             required_module="support", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     return {"conversations": community.get_support_conversations()}
 
 
 @admin_router.get("/support/messages/{user_id}")
-async def admin_support_messages(user_id: int, x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_support_messages(user_id: int,
+                           auth: dict = Depends(require_admin({'super_admin', 'customer_care', 'technical_support'},
+                                                              required_module="support", required_action="read"))):
     """Get support messages for a specific user."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin', 'customer_care', 'technical_support'},
-                             required_module="support", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     return {"messages": community.get_support_messages(user_id, mark_read_for="admin", current_conv_only=True)}
 
 
 @admin_router.post("/support/send/{user_id}")
-async def admin_support_send(user_id: int, request: Request, body: SupportMessageRequest,
-                              x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_support_send(user_id: int, request: Request, body: SupportMessageRequest,
+                        auth: dict = Depends(require_admin({'super_admin', 'customer_care', 'technical_support'},
+                                                           required_module="support", required_action="write"))):
     """Send a support message to a user."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin', 'customer_care', 'technical_support'},
-                             required_module="support", required_action="write")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     if auth.get("user_id"):
         community.assign_agent_to_conversation(user_id, auth["user_id"], auth["display_name"])
     result = community.send_support_message(
@@ -1493,13 +1441,10 @@ async def admin_support_send(user_id: int, request: Request, body: SupportMessag
 
 
 @admin_router.post("/support/close/{user_id}")
-async def admin_close_conversation(user_id: int, request: Request,
-                                    x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_close_conversation(user_id: int, request: Request,
+                              auth: dict = Depends(require_admin({'super_admin', 'customer_care', 'technical_support'},
+                                                                 required_module="support", required_action="edit"))):
     """Close a support conversation."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin', 'customer_care', 'technical_support'},
-                             required_module="support", required_action="edit")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     agent_name = auth.get("display_name", "Admin")
     community.send_support_message(
         user_id, "system",
@@ -1512,28 +1457,17 @@ async def admin_close_conversation(user_id: int, request: Request,
 
 
 @admin_router.get("/support/ratings")
-async def admin_support_ratings(x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_support_ratings(auth: dict = Depends(require_admin({'super_admin', 'customer_care', 'technical_support'},
+                                                             required_module="support", required_action="read"))):
     """Get agent rating statistics."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin', 'customer_care', 'technical_support'},
-                             required_module="support", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     return {"ratings": community.get_all_agent_ratings(), "recent": community.get_recent_ratings(10)}
 
 
 @admin_router.post("/support/upload/{user_id}")
-async def admin_support_upload_file(user_id: int, file: UploadFile = File(...),
-                                     x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_support_upload_file(user_id: int, file: UploadFile = File(...),
+                               auth: dict = Depends(require_admin({'super_admin', 'customer_care', 'technical_support'},
+                                                                  required_module="support", required_action="write"))):
     """Upload a file in support chat (max 10MB)."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin', 'customer_care', 'technical_support'},
-                             required_module="support", required_action="write")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-
-    contents = await file.read()
-    if len(contents) > MAX_SUPPORT_FILE_SIZE:
-        raise HTTPException(status_code=400, detail="File too large. Maximum size is 10MB.")
-
     ext = Path(file.filename).suffix.lower() if file.filename else ""
     if ext not in ALLOWED_SUPPORT_EXTENSIONS:
         raise HTTPException(status_code=400, detail="File type not allowed.")
@@ -1541,8 +1475,18 @@ async def admin_support_upload_file(user_id: int, file: UploadFile = File(...),
     SUPPORT_UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
     unique_name = f"{uuid.uuid4().hex}{ext}"
     filepath = SUPPORT_UPLOADS_DIR / unique_name
+    # Copy the spooled upload to disk in 1 MB chunks instead of reading it
+    # into memory, stopping as soon as it goes over the limit
+    size = 0
     with open(filepath, "wb") as f:
-        f.write(contents)
+        while chunk := file.file.read(1 << 20):
+            size += len(chunk)
+            if size > MAX_SUPPORT_FILE_SIZE:
+                break
+            f.write(chunk)
+    if size > MAX_SUPPORT_FILE_SIZE:
+        filepath.unlink(missing_ok=True)
+        raise HTTPException(status_code=400, detail="File too large. Maximum size is 10MB.")
 
     file_url = f"/api/uploads/support/{unique_name}"
     original_name = file.filename or unique_name
@@ -1563,24 +1507,18 @@ async def admin_support_upload_file(user_id: int, file: UploadFile = File(...),
 # ═══════════════════════════════════════════════════════════
 
 @admin_router.get("/withdrawals/pending")
-async def get_pending_withdrawals(x_admin_password: str = Header(None), authorization: str = Header(None)):
+def get_pending_withdrawals(auth: dict = Depends(require_admin({'super_admin', 'admin'}, required_module="withdrawals", required_action="read",
+                                                               status_code=403, detail="Admin access required"))):
     """Get all pending withdrawal requests."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin', 'admin'},
-                             required_module="withdrawals", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=403, detail="Admin access required")
     return {"withdrawals": daraja_payment.get_all_pending_withdrawals()}
 
 
 @admin_router.post("/withdrawals/{request_id}/approve")
-async def approve_withdrawal(request_id: int, request: Request,
-                              body: AdminWithdrawalAction = AdminWithdrawalAction(),
-                              x_admin_password: str = Header(None), authorization: str = Header(None)):
+def approve_withdrawal(request_id: int, request: Request,
+                        body: AdminWithdrawalAction = AdminWithdrawalAction(),
+                        auth: dict = Depends(require_admin({'super_admin', 'admin'}, required_module="withdrawals", required_action="approve",
+                                                           status_code=403, detail="Admin access required"))):
     """Approve a withdrawal request."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin', 'admin'},
-                             required_module="withdrawals", required_action="approve")
-    if not auth:
-        raise HTTPException(status_code=403, detail="Admin access required")
     result = daraja_payment.approve_withdrawal(request_id, body.admin_notes)
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result.get("error", "Approval failed"))
@@ -1589,14 +1527,11 @@ async def approve_withdrawal(request_id: int, request: Request,
 
 
 @admin_router.post("/withdrawals/{request_id}/reject")
-async def reject_withdrawal(request_id: int, request: Request,
-                             body: AdminWithdrawalAction = AdminWithdrawalAction(),
-                             x_admin_password: str = Header(None), authorization: str = Header(None)):
+def reject_withdrawal(request_id: int, request: Request,
+                       body: AdminWithdrawalAction = AdminWithdrawalAction(),
+                       auth: dict = Depends(require_admin({'super_admin', 'admin'}, required_module="withdrawals", required_action="approve",
+                                                          status_code=403, detail="Admin access required"))):
     """Reject a withdrawal request and refund balance."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin', 'admin'},
-                             required_module="withdrawals", required_action="approve")
-    if not auth:
-        raise HTTPException(status_code=403, detail="Admin access required")
     result = daraja_payment.reject_withdrawal(request_id, body.admin_notes)
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result.get("error", "Rejection failed"))
@@ -1605,13 +1540,10 @@ async def reject_withdrawal(request_id: int, request: Request,
 
 
 @admin_router.post("/withdrawals/{request_id}/complete")
-async def complete_withdrawal_admin(request_id: int, request: Request,
-                                     x_admin_password: str = Header(None), authorization: str = Header(None)):
+def complete_withdrawal_admin(request_id: int, request: Request,
+                               auth: dict = Depends(require_admin({'super_admin', 'admin'}, required_module="withdrawals", required_action="approve",
+                                                                  status_code=403, detail="Admin access required"))):
     """Mark withdrawal as completed."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin', 'admin'},
-                             required_module="withdrawals", required_action="approve")
-    if not auth:
-        raise HTTPException(status_code=403, detail="Admin access required")
     result = daraja_payment.complete_withdrawal(request_id)
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result.get("error", "Completion failed"))
@@ -1620,13 +1552,10 @@ async def complete_withdrawal_admin(request_id: int, request: Request,
 
 
 @admin_router.post("/withdrawals/{request_id}/retry-whop")
-async def retry_whop_transfer(request_id: int, request: Request,
-                               x_admin_password: str = Header(None), authorization: str = Header(None)):
+def retry_whop_transfer(request_id: int, request: Request,
+                         auth: dict = Depends(require_admin({'super_admin', 'admin'}, required_module="withdrawals", required_action="approve",
+                                                            status_code=403, detail="Admin access required"))):
     """Retry a failed Whop transfer for a withdrawal."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin', 'admin'},
-                             required_module="withdrawals", required_action="approve")
-    if not auth:
-        raise HTTPException(status_code=403, detail="Admin access required")
     result = daraja_payment.retry_whop_transfer(request_id)
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result.get("error", "Retry failed"))
@@ -1635,21 +1564,17 @@ async def retry_whop_transfer(request_id: int, request: Request,
 
 
 @admin_router.get("/withdrawal-options")
-async def get_all_withdrawal_options(x_admin_password: str = Header(None),
-                                      authorization: str = Header(None)):
+def get_all_withdrawal_options(auth: dict = Depends(require_admin({'super_admin', 'admin'}, required_module="withdrawals", required_action="read",
+                                                                  status_code=403, detail="Admin access required"))):
     """Get all users' withdrawal methods with verification status."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin', 'admin'},
-                             required_module="withdrawals", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=403, detail="Admin access required")
     return {"options": daraja_payment.get_all_withdrawal_options()}
 
 
-class B2CTestRequest(BaseModel):
+class B2CTestRequest(_RequestModel):
     phone: str       # e.g. "254712345678"
     amount_kes: int  # small amount like 10
 
-class AdminDirectPayoutRequest(BaseModel):
+class AdminDirectPayoutRequest(_RequestModel):
     user_id: int
     method: str          # "mpesa" or "whop"
     phone: str = ""      # required if mpesa
@@ -1657,13 +1582,9 @@ class AdminDirectPayoutRequest(BaseModel):
 
 @admin_router.post("/b2c/test")
 async def admin_test_b2c(request: Request, body: B2CTestRequest,
-                          x_admin_password: str = Header(None), authorization: str = Header(None)):
+                          auth: dict = Depends(require_admin({'super_admin'}, required_module="withdrawals", required_action="approve",
+                                                             status_code=403, detail="Owner access required"))):
     """Test B2C payment with a small amount. Owner-only endpoint."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin'},
-                             required_module="withdrawals", required_action="approve")
-    if not auth:
-        raise HTTPException(status_code=403, detail="Owner access required")
-
     if body.amount_kes < 10 or body.amount_kes > 100:
         raise HTTPException(status_code=400, detail="Test amount must be between KES 10 and KES 100")
 
@@ -1672,15 +1593,19 @@ async def admin_test_b2c(request: Request, body: B2CTestRequest,
         raise HTTPException(status_code=400, detail="Phone must be in 254XXXXXXXXX format (12 digits)")
 
     # Create a temporary disbursement item for tracking
-    conn = daraja_payment._get_db()
-    now = datetime.now().isoformat()
-    conn.execute("""
-        INSERT INTO disbursement_items (batch_id, user_id, phone, amount_usd, amount_kes, exchange_rate, status, created_at)
-        VALUES (0, 0, ?, ?, ?, 1, 'pending', ?)
-    """, (phone, body.amount_kes, body.amount_kes, now))
-    conn.commit()
-    item_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
-    conn.close()
+    def create_item():
+        conn = daraja_payment._get_db()
+        now = datetime.now().isoformat()
+        conn.execute("""
+            INSERT INTO disbursement_items (batch_id, user_id, phone, amount_usd, amount_kes, exchange_rate, status, created_at)
+            VALUES (0, 0, ?, ?, ?, 1, 'pending', ?)
+        """, (phone, body.amount_kes, body.amount_kes, now))
+        conn.commit()
+        item_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+        conn.close()
+        return item_id
+
+    item_id = await run_in_threadpool(create_item)
 
     result = await daraja_payment.initiate_b2c_payment(
         phone=phone,
@@ -1706,19 +1631,15 @@ async def admin_test_b2c(request: Request, body: B2CTestRequest,
 #  B2C DISBURSEMENTS (M-PESA PAYOUTS)
 # ═══════════════════════════════════════════════════════════
 
-class ApproveBatchRequest(BaseModel):
+class ApproveBatchRequest(_RequestModel):
     admin_notes: str = ""
 
 
 @admin_router.post("/disbursements/generate")
 async def generate_disbursement_batch(request: Request,
-                                       x_admin_password: str = Header(None),
-                                       authorization: str = Header(None)):
+                                       auth: dict = Depends(require_admin({'super_admin', 'admin'}, required_module="withdrawals", required_action="write",
+                                                                          status_code=403, detail="Admin access required"))):
     """Generate disbursement batch for eligible users (mpesa_phone + balance >= KES 1000)."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin', 'admin'},
-                             required_module="withdrawals", required_action="write")
-    if not auth:
-        raise HTTPException(status_code=403, detail="Admin access required")
     result = await daraja_payment.generate_disbursement_batch()
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result.get("error", "Generation failed"))
@@ -1729,26 +1650,18 @@ async def generate_disbursement_batch(request: Request,
 
 
 @admin_router.get("/disbursements/pending")
-async def get_pending_disbursement(x_admin_password: str = Header(None),
-                                    authorization: str = Header(None)):
+def get_pending_disbursement(auth: dict = Depends(require_admin({'super_admin', 'admin'}, required_module="withdrawals", required_action="read",
+                                                                status_code=403, detail="Admin access required"))):
     """Get the current pending/processing disbursement batch with items."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin', 'admin'},
-                             required_module="withdrawals", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=403, detail="Admin access required")
     return daraja_payment.get_pending_disbursement_batch()
 
 
 @admin_router.post("/disbursements/{batch_id}/approve")
 async def approve_disbursement_batch(batch_id: int, request: Request,
                                       body: ApproveBatchRequest = ApproveBatchRequest(),
-                                      x_admin_password: str = Header(None),
-                                      authorization: str = Header(None)):
+                                      auth: dict = Depends(require_admin({'super_admin'}, required_module="withdrawals", required_action="approve",
+                                                                         status_code=403, detail="Super admin access required"))):
     """Approve and trigger B2C M-Pesa payments for a disbursement batch."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin'},
-                             required_module="withdrawals", required_action="approve")
-    if not auth:
-        raise HTTPException(status_code=403, detail="Super admin access required")
     result = await daraja_payment.approve_and_execute_batch(
         batch_id, auth.get("user_id", 0), body.admin_notes)
     if not result["success"]:
@@ -1760,14 +1673,10 @@ async def approve_disbursement_batch(batch_id: int, request: Request,
 
 
 @admin_router.post("/disbursements/{batch_id}/cancel")
-async def cancel_disbursement_batch(batch_id: int, request: Request,
-                                     x_admin_password: str = Header(None),
-                                     authorization: str = Header(None)):
+def cancel_disbursement_batch(batch_id: int, request: Request,
+                               auth: dict = Depends(require_admin({'super_admin', 'admin'}, required_module="withdrawals", required_action="approve",
+                                                                  status_code=403, detail="Admin access required"))):
     """Cancel a pending batch (before approval)."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin', 'admin'},
-                             required_module="withdrawals", required_action="approve")
-    if not auth:
-        raise HTTPException(status_code=403, detail="Admin access required")
     result = daraja_payment.cancel_disbursement_batch(batch_id)
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result.get("error", "Cancel failed"))
@@ -1778,13 +1687,9 @@ async def cancel_disbursement_batch(batch_id: int, request: Request,
 
 @admin_router.post("/disbursements/items/{item_id}/retry")
 async def retry_disbursement_item(item_id: int, request: Request,
-                                   x_admin_password: str = Header(None),
-                                   authorization: str = Header(None)):
+                                   auth: dict = Depends(require_admin({'super_admin'}, required_module="withdrawals", required_action="approve",
+                                                                      status_code=403, detail="Super admin access required"))):
     """Retry a failed B2C disbursement for a single item."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin'},
-                             required_module="withdrawals", required_action="approve")
-    if not auth:
-        raise HTTPException(status_code=403, detail="Super admin access required")
     result = await daraja_payment.retry_disbursement_item(item_id)
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result.get("error", "Retry failed"))
@@ -1794,14 +1699,10 @@ async def retry_disbursement_item(item_id: int, request: Request,
 
 
 @admin_router.get("/disbursements/history")
-async def get_disbursement_history(limit: int = Query(20, ge=1, le=100),
-                                    x_admin_password: str = Header(None),
-                                    authorization: str = Header(None)):
+def get_disbursement_history(limit: int = Query(20, ge=1, le=100),
+                              auth: dict = Depends(require_admin({'super_admin', 'admin'}, required_module="withdrawals", required_action="read",
+                                                                 status_code=403, detail="Admin access required"))):
     """Get past disbursement batches."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin', 'admin'},
-                             required_module="withdrawals", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=403, detail="Admin access required")
     return daraja_payment.get_disbursement_history(limit)
 
 
@@ -1810,14 +1711,9 @@ async def get_disbursement_history(limit: int = Query(20, ge=1, le=100),
 # ═══════════════════════════════════════════════════════════
 
 @admin_router.get("/user-balances")
-async def get_all_user_balances(x_admin_password: str = Header(None),
-                                 authorization: str = Header(None)):
+def get_all_user_balances(auth: dict = Depends(require_admin({'super_admin', 'admin'}, required_module="withdrawals", required_action="read",
+                                                             status_code=403, detail="Admin access required"))):
     """Get all users with wallet balances > 0, including their phone and Whop info."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin', 'admin'},
-                             required_module="withdrawals", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=403, detail="Admin access required")
-
     import sqlite3 as _sq
 
     # Get all wallets with balance > 0
@@ -1866,23 +1762,50 @@ async def get_all_user_balances(x_admin_password: str = Header(None),
 
 @admin_router.post("/direct-payout")
 async def admin_direct_payout(request: Request, body: AdminDirectPayoutRequest,
-                               x_admin_password: str = Header(None),
-                               authorization: str = Header(None)):
+                               auth: dict = Depends(require_admin({'super_admin'}, required_module="withdrawals", required_action="approve",
+                                                                  status_code=403, detail="Owner access required"))):
     """Admin sends direct M-Pesa or Whop payout to a user. No threshold required."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin'},
-                             required_module="withdrawals", required_action="approve")
-    if not auth:
-        raise HTTPException(status_code=403, detail="Owner access required")
-
     import sqlite3 as _sq
 
+    # The database work below is blocking, so each step runs on the threadpool
+    # between the awaited payment calls
+    def connect_db(name):
+        conn = _sq.connect(os.path.join(os.path.dirname(__file__), name), timeout=10)
+        conn.row_factory = _sq.Row
+        return conn
+
+    def load_wallet():
+        comm_conn = connect_db("community.db")
+        wallet = comm_conn.execute(
+            "SELECT balance_usd FROM creator_wallets WHERE user_id = ?", (body.user_id,)
+        ).fetchone()
+        comm_conn.close()
+        return wallet
+
+    def load_user(sql):
+        users_conn = connect_db("users.db")
+        u = users_conn.execute(sql, (body.user_id,)).fetchone()
+        users_conn.close()
+        return u
+
+    def deduct_balance(comm_conn, now):
+        comm_conn.execute("""
+            UPDATE creator_wallets SET balance_usd = balance_usd - ?, updated_at = ?
+            WHERE user_id = ? AND balance_usd >= ?
+        """, (payout_usd, now, body.user_id, payout_usd))
+        comm_conn.commit()
+
+    def refund_balance(now):
+        refund_conn = connect_db("community.db")
+        refund_conn.execute("""
+            UPDATE creator_wallets SET balance_usd = balance_usd + ?, updated_at = ?
+            WHERE user_id = ?
+        """, (payout_usd, now, body.user_id))
+        refund_conn.commit()
+        refund_conn.close()
+
     # Get user wallet
-    comm_conn = _sq.connect(os.path.join(os.path.dirname(__file__), "community.db"), timeout=10)
-    comm_conn.row_factory = _sq.Row
-    wallet = comm_conn.execute(
-        "SELECT balance_usd FROM creator_wallets WHERE user_id = ?", (body.user_id,)
-    ).fetchone()
-    comm_conn.close()
+    wallet = await run_in_threadpool(load_wallet)
 
     if not wallet or wallet["balance_usd"] < 0.01:
         raise HTTPException(status_code=400, detail="User has no balance")
@@ -1895,10 +1818,7 @@ async def admin_direct_payout(request: Request, body: AdminDirectPayoutRequest,
         phone = body.phone.strip()
         if not phone:
             # Try to get from user profile
-            users_conn = _sq.connect(os.path.join(os.path.dirname(__file__), "users.db"), timeout=10)
-            users_conn.row_factory = _sq.Row
-            u = users_conn.execute("SELECT mpesa_phone FROM users WHERE id = ?", (body.user_id,)).fetchone()
-            users_conn.close()
+            u = await run_in_threadpool(load_user, "SELECT mpesa_phone FROM users WHERE id = ?")
             phone = (u["mpesa_phone"] or "") if u else ""
 
         if not phone or not phone.startswith("254") or len(phone) != 12:
@@ -1915,26 +1835,23 @@ async def admin_direct_payout(request: Request, body: AdminDirectPayoutRequest,
         if amount_kes < 10:
             raise HTTPException(status_code=400, detail=f"Amount too small: KES {amount_kes}")
 
-        # Deduct balance first
-        now = datetime.now().isoformat()
-        comm_conn = _sq.connect(os.path.join(os.path.dirname(__file__), "community.db"), timeout=10)
-        comm_conn.row_factory = _sq.Row
-        comm_conn.execute("""
-            UPDATE creator_wallets SET balance_usd = balance_usd - ?, updated_at = ?
-            WHERE user_id = ? AND balance_usd >= ?
-        """, (payout_usd, now, body.user_id, payout_usd))
-        comm_conn.commit()
+        # Deduct balance first, then create the disbursement item for tracking
+        def deduct_and_track(now):
+            comm_conn = connect_db("community.db")
+            deduct_balance(comm_conn, now)
+            comm_conn.execute("""
+                INSERT INTO disbursement_items
+                    (batch_id, user_id, phone, amount_usd, amount_kes, exchange_rate,
+                     withdrawal_method, status, created_at)
+                VALUES (0, ?, ?, ?, ?, ?, 'mpesa', 'pending', ?)
+            """, (body.user_id, phone, payout_usd, amount_kes, rate, now))
+            comm_conn.commit()
+            item_id = comm_conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+            comm_conn.close()
+            return item_id
 
-        # Create disbursement item for tracking
-        comm_conn.execute("""
-            INSERT INTO disbursement_items
-                (batch_id, user_id, phone, amount_usd, amount_kes, exchange_rate,
-                 withdrawal_method, status, created_at)
-            VALUES (0, ?, ?, ?, ?, ?, 'mpesa', 'pending', ?)
-        """, (body.user_id, phone, payout_usd, amount_kes, rate, now))
-        comm_conn.commit()
-        item_id = comm_conn.execute("SELECT last_insert_rowid()").fetchone()[0]
-        comm_conn.close()
+        now = datetime.now().isoformat()
+        item_id = await run_in_threadpool(deduct_and_track, now)
 
         # Fire B2C
         result = await daraja_payment.initiate_b2c_payment(
@@ -1946,13 +1863,7 @@ async def admin_direct_payout(request: Request, body: AdminDirectPayoutRequest,
 
         if not result["success"]:
             # Refund balance
-            refund_conn = _sq.connect(os.path.join(os.path.dirname(__file__), "community.db"), timeout=10)
-            refund_conn.execute("""
-                UPDATE creator_wallets SET balance_usd = balance_usd + ?, updated_at = ?
-                WHERE user_id = ?
-            """, (payout_usd, now, body.user_id))
-            refund_conn.commit()
-            refund_conn.close()
+            await run_in_threadpool(refund_balance, now)
             raise HTTPException(status_code=500, detail=f"B2C failed: {result.get('error', 'Unknown')}")
 
         _log_action(auth, "direct_payout_mpesa", "withdrawals", request, "payout", item_id,
@@ -1967,27 +1878,24 @@ async def admin_direct_payout(request: Request, body: AdminDirectPayoutRequest,
         }
 
     elif body.method == "whop":
-        users_conn = _sq.connect(os.path.join(os.path.dirname(__file__), "users.db"), timeout=10)
-        users_conn.row_factory = _sq.Row
-        u = users_conn.execute("SELECT whop_user_id FROM users WHERE id = ?", (body.user_id,)).fetchone()
-        users_conn.close()
+        u = await run_in_threadpool(load_user, "SELECT whop_user_id FROM users WHERE id = ?")
 
         whop_uid = (u["whop_user_id"] or "") if u else ""
         if not whop_uid:
             raise HTTPException(status_code=400, detail="User has no linked Whop account")
 
         # Deduct balance
+        def deduct(now):
+            comm_conn = connect_db("community.db")
+            deduct_balance(comm_conn, now)
+            comm_conn.close()
+
         now = datetime.now().isoformat()
-        comm_conn = _sq.connect(os.path.join(os.path.dirname(__file__), "community.db"), timeout=10)
-        comm_conn.execute("""
-            UPDATE creator_wallets SET balance_usd = balance_usd - ?, updated_at = ?
-            WHERE user_id = ? AND balance_usd >= ?
-        """, (payout_usd, now, body.user_id, payout_usd))
-        comm_conn.commit()
-        comm_conn.close()
+        await run_in_threadpool(deduct, now)
 
-        import whop_payment
-        transfer_result = whop_payment.create_transfer(
+        # The Whop SDK call is synchronous as well
+        transfer_result = await run_in_threadpool(
+            whop_payment.create_transfer,
             destination_id=whop_uid, amount_usd=payout_usd,
             notes=f"Earnings payout for user #{body.user_id}",
             idempotence_key=f"direct_{body.user_id}_{now}",
@@ -1995,13 +1903,7 @@ async def admin_direct_payout(request: Request, body: AdminDirectPayoutRequest,
 
         if not transfer_result.get("success"):
             # Refund
-            refund_conn = _sq.connect(os.path.join(os.path.dirname(__file__), "community.db"), timeout=10)
-            refund_conn.execute("""
-                UPDATE creator_wallets SET balance_usd = balance_usd + ?, updated_at = ?
-                WHERE user_id = ?
-            """, (payout_usd, now, body.user_id))
-            refund_conn.commit()
-            refund_conn.close()
+            await run_in_threadpool(refund_balance, now)
             raise HTTPException(status_code=500,
                                 detail=f"Whop transfer failed: {transfer_result.get('error', 'Unknown')}")
 
@@ -2023,13 +1925,10 @@ async def admin_direct_payout(request: Request, body: AdminDirectPayoutRequest,
 # ═══════════════════════════════════════════════════════════
 
 @admin_router.post("/users/{user_id}/adjust-balance")
-async def admin_adjust_balance(user_id: int, request: Request, req: AdjustBalanceRequest,
-                                x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_adjust_balance(user_id: int, request: Request, req: AdjustBalanceRequest,
+                          admin: dict = Depends(require_admin({'super_admin'}, required_module="users", required_action="edit",
+                                                              status_code=403, detail="Super admin access required"))):
     """Adjust a user's account balance."""
-    admin = _check_admin_auth(x_admin_password, authorization, {'super_admin'},
-                              required_module="users", required_action="edit")
-    if not admin:
-        raise HTTPException(status_code=403, detail="Super admin access required")
     if req.amount_usd == 0 and req.amount_kes == 0:
         raise HTTPException(status_code=400, detail="Amount must not be zero")
 
@@ -2076,12 +1975,9 @@ async def admin_adjust_balance(user_id: int, request: Request, req: AdjustBalanc
 
 
 @admin_router.get("/users/{user_id}/balance-history")
-async def admin_balance_history(user_id: int, x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_balance_history(user_id: int,
+                          auth: dict = Depends(require_admin({'super_admin', 'accounting'}, required_module="users", required_action="read"))):
     """Get balance adjustment history for a user."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin', 'accounting'},
-                             required_module="users", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     return {"adjustments": community.get_balance_adjustments(user_id)}
 
 
@@ -2090,16 +1986,10 @@ async def admin_balance_history(user_id: int, x_admin_password: str = Header(Non
 # ═══════════════════════════════════════════════════════════
 
 @admin_router.get("/subscriptions")
-async def admin_list_subscriptions(
-    x_admin_password: str = Header(None),
-    authorization: str = Header(None),
+def admin_list_subscriptions(
+    auth: dict = Depends(require_admin({'super_admin', 'accounting'}, required_module="subscriptions", required_action="read")),
 ):
     """List all subscriptions AND pay-on-the-go topups, grouped by type."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin', 'accounting'},
-                             required_module="subscriptions", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-
     # 1. Get subscriptions from users.db
     import subscriptions as subs_mod
     sconn = subs_mod._get_db()
@@ -2244,15 +2134,10 @@ async def admin_list_subscriptions(
 # ═══════════════════════════════════════════════════════════
 
 @admin_router.post("/broadcast")
-async def admin_create_broadcast(request: Request, body: BroadcastRequest,
-                                  x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_create_broadcast(request: Request, body: BroadcastRequest,
+                            auth: dict = Depends(require_admin({'super_admin', 'customer_care', 'customer_care_hod', 'customer_support_agent'},
+                                                               required_module="community", required_action="write"))):
     """Create a broadcast message. Super admin sends immediately; customer care needs approval."""
-    auth = _check_admin_auth(x_admin_password, authorization,
-                             {'super_admin', 'customer_care', 'customer_care_hod', 'customer_support_agent'},
-                             required_module="community", required_action="write")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-
     if not body.title.strip() or not body.message.strip():
         raise HTTPException(status_code=400, detail="Title and message are required")
 
@@ -2278,25 +2163,17 @@ async def admin_create_broadcast(request: Request, body: BroadcastRequest,
 
 
 @admin_router.get("/broadcasts")
-async def admin_list_broadcasts(status: str = None,
-                                 x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_list_broadcasts(status: str = None,
+                           auth: dict = Depends(require_admin({'super_admin', 'customer_care', 'customer_care_hod', 'customer_support_agent'},
+                                                              required_module="community", required_action="read"))):
     """List broadcast messages, optionally filtered by status."""
-    auth = _check_admin_auth(x_admin_password, authorization,
-                             {'super_admin', 'customer_care', 'customer_care_hod', 'customer_support_agent'},
-                             required_module="community", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     return {"broadcasts": community.get_broadcasts(status_filter=status)}
 
 
 @admin_router.post("/broadcast/{broadcast_id}/approve")
-async def admin_approve_broadcast(broadcast_id: int, request: Request,
-                                   x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_approve_broadcast(broadcast_id: int, request: Request,
+                             auth: dict = Depends(require_admin({'super_admin'}, required_module="community", required_action="approve"))):
     """Super admin approves a pending broadcast and sends it to all users."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin'},
-                             required_module="community", required_action="approve")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     result = community.approve_broadcast(broadcast_id, auth.get("user_id", 0), auth.get("display_name", "Admin"))
     if not result.get("success"):
         raise HTTPException(status_code=400, detail=result.get("error"))
@@ -2305,13 +2182,9 @@ async def admin_approve_broadcast(broadcast_id: int, request: Request,
 
 
 @admin_router.post("/broadcast/{broadcast_id}/reject")
-async def admin_reject_broadcast(broadcast_id: int, request: Request, body: RejectBroadcastRequest,
-                                  x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_reject_broadcast(broadcast_id: int, request: Request, body: RejectBroadcastRequest,
+                            auth: dict = Depends(require_admin({'super_admin'}, required_module="community", required_action="approve"))):
     """Super admin rejects a pending broadcast."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin'},
-                             required_module="community", required_action="approve")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     result = community.reject_broadcast(broadcast_id, auth.get("user_id", 0),
                                          auth.get("display_name", "Admin"), body.reason)
     if not result.get("success"):
@@ -2321,22 +2194,18 @@ async def admin_reject_broadcast(broadcast_id: int, request: Request, body: Reje
     return result
 
 
-class UpdateBroadcastRequest(BaseModel):
+class UpdateBroadcastRequest(_RequestModel):
     title: Optional[str] = None
     message: Optional[str] = None
 
-class GenerateReengagementRequest(BaseModel):
+class GenerateReengagementRequest(_RequestModel):
     template_index: Optional[int] = None
 
 
 @admin_router.put("/broadcast/{broadcast_id}")
-async def admin_update_broadcast(broadcast_id: int, request: Request, body: UpdateBroadcastRequest,
-                                  x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_update_broadcast(broadcast_id: int, request: Request, body: UpdateBroadcastRequest,
+                            auth: dict = Depends(require_admin({'super_admin'}, required_module="community", required_action="approve"))):
     """Edit a pending broadcast's title or message before approval."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin'},
-                             required_module="community", required_action="approve")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     result = community.update_broadcast(broadcast_id, title=body.title, message=body.message)
     if not result.get("success"):
         raise HTTPException(status_code=400, detail=result.get("error"))
@@ -2349,15 +2218,11 @@ async def admin_update_broadcast(broadcast_id: int, request: Request, body: Upda
 # ═══════════════════════════════════════════════════════════
 
 @admin_router.get("/reengagement/templates")
-async def get_reengagement_templates(
-    x_admin_password: str = Header(None), authorization: str = Header(None)
+def get_reengagement_templates(
+    auth: dict = Depends(require_admin({'super_admin', 'customer_care', 'customer_care_hod', 'customer_support_agent'},
+                                       required_module="community", required_action="read"))
 ):
     """Get all re-engagement email template metadata and inactive user count."""
-    auth = _check_admin_auth(x_admin_password, authorization,
-                             {'super_admin', 'customer_care', 'customer_care_hod', 'customer_support_agent'},
-                             required_module="community", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     import reengagement
     templates = [{"index": i, **meta} for i, meta in enumerate(reengagement.TEMPLATE_META)]
     inactive_count = len(user_auth.get_inactive_users(days=2))
@@ -2367,14 +2232,10 @@ async def get_reengagement_templates(
 @admin_router.get("/reengagement/preview/{template_index}")
 async def preview_reengagement_template(
     template_index: int,
-    x_admin_password: str = Header(None), authorization: str = Header(None)
+    auth: dict = Depends(require_admin({'super_admin', 'customer_care', 'customer_care_hod', 'customer_support_agent'},
+                                       required_module="community", required_action="read"))
 ):
     """Render a specific re-engagement template with real match data for preview."""
-    auth = _check_admin_auth(x_admin_password, authorization,
-                             {'super_admin', 'customer_care', 'customer_care_hod', 'customer_support_agent'},
-                             required_module="community", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     import reengagement
     if template_index < 0 or template_index >= len(reengagement.ALL_TEMPLATES):
         raise HTTPException(status_code=400, detail="Invalid template index")
@@ -2394,21 +2255,17 @@ async def preview_reengagement_template(
 @admin_router.post("/reengagement/generate")
 async def generate_reengagement(
     request: Request, body: GenerateReengagementRequest,
-    x_admin_password: str = Header(None), authorization: str = Header(None)
+    auth: dict = Depends(require_admin({'super_admin'}, required_module="community", required_action="write"))
 ):
     """Manually trigger re-engagement broadcast generation."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin'},
-                             required_module="community", required_action="write")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     import reengagement
     import random as _rand
     # Check for existing pending
-    existing = community.get_broadcasts(status_filter="pending_approval", limit=50)
+    existing = await run_in_threadpool(community.get_broadcasts, status_filter="pending_approval", limit=50)
     for b in existing:
         if b.get("target_type") == "inactive":
             return {"success": False, "error": "A pending re-engagement broadcast already exists. Approve or reject it first."}
-    inactive_users = user_auth.get_inactive_users(days=2)
+    inactive_users = await run_in_threadpool(user_auth.get_inactive_users, days=2)
     if not inactive_users:
         return {"success": False, "error": "No inactive users found."}
     matches = await reengagement.get_big_league_fixtures(days=3)
@@ -2431,7 +2288,8 @@ async def generate_reengagement(
         away = m.get("away_team", {}).get("name", "")
         kickoff = reengagement._format_kickoff(m.get("date", ""))
         match_summary_lines.append(f"{league}: {home} vs {away} ({kickoff})")
-    broadcast_result = community.create_broadcast(
+    broadcast_result = await run_in_threadpool(
+        community.create_broadcast,
         sender_id=auth.get("user_id") or 0,
         sender_name=auth.get("display_name", "Admin"),
         title=result["subject"],
@@ -2450,14 +2308,10 @@ async def generate_reengagement(
 # ═══════════════════════════════════════════════════════════
 
 @admin_router.get("/support/keepalive-prompts")
-async def admin_get_keepalive_prompts(x_admin_password: str = Header(None), authorization: str = Header(None)):
-    """Get pending keep-alive prompts for the current agent."""
-    auth = _check_admin_auth(x_admin_password, authorization,
-                             {'super_admin', 'customer_care', 'customer_care_hod',
+def admin_get_keepalive_prompts(auth: dict = Depends(require_admin({'super_admin', 'customer_care', 'customer_care_hod',
                               'customer_support_agent', 'technical_support'},
-                             required_module="support", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
+                                                                   required_module="support", required_action="read"))):
+    """Get pending keep-alive prompts for the current agent."""
     agent_id = auth.get("user_id")
     if not agent_id:
         return {"prompts": []}
@@ -2465,16 +2319,12 @@ async def admin_get_keepalive_prompts(x_admin_password: str = Header(None), auth
 
 
 @admin_router.post("/support/keepalive/{conversation_id}")
-async def admin_respond_keepalive(conversation_id: int, request: Request,
-                                   keep_open: bool = True,
-                                   x_admin_password: str = Header(None), authorization: str = Header(None)):
-    """Respond to a keep-alive prompt: keep chat open or close it."""
-    auth = _check_admin_auth(x_admin_password, authorization,
-                             {'super_admin', 'customer_care', 'customer_care_hod',
+def admin_respond_keepalive(conversation_id: int, request: Request,
+                             keep_open: bool = True,
+                             auth: dict = Depends(require_admin({'super_admin', 'customer_care', 'customer_care_hod',
                               'customer_support_agent', 'technical_support'},
-                             required_module="support", required_action="write")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
+                                                                required_module="support", required_action="write"))):
+    """Respond to a keep-alive prompt: keep chat open or close it."""
     agent_id = auth.get("user_id")
     result = community.respond_keepalive(conversation_id, agent_id, keep_open)
     if not result.get("success"):
@@ -2503,32 +2353,23 @@ async def admin_respond_keepalive(conversation_id: int, request: Request,
 # ═══════════════════════════════════════════════════════════
 
 @admin_router.get("/bots")
-async def admin_list_bots(page: int = 1, assigned_to: int = None, is_active: int = None,
-                          search: str = None,
-                          x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_list_bots(page: int = 1, assigned_to: int = None, is_active: int = None,
+                    search: str = None,
+                    auth: dict = Depends(require_admin(required_module="bots", required_action="read"))):
     """List all bot accounts."""
-    auth = _check_admin_auth(x_admin_password, authorization, required_module="bots", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     return bot_manager.get_all_bots(page=page, assigned_to=assigned_to, is_active=is_active, search=search)
 
 
 @admin_router.get("/bots/stats")
-async def admin_bot_stats(x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_bot_stats(auth: dict = Depends(require_admin(required_module="bots", required_action="read"))):
     """Get bot summary stats."""
-    auth = _check_admin_auth(x_admin_password, authorization, required_module="bots", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     return bot_manager.get_bot_stats()
 
 
 @admin_router.post("/bots/create")
-async def admin_create_bots(request: Request, body: CreateBotsRequest,
-                            x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_create_bots(request: Request, body: CreateBotsRequest,
+                      auth: dict = Depends(require_admin(required_module="bots", required_action="write"))):
     """Create bot accounts in bulk."""
-    auth = _check_admin_auth(x_admin_password, authorization, required_module="bots", required_action="write")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     result = bot_manager.create_bots(body.count, body.name_prefix)
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["error"])
@@ -2537,60 +2378,45 @@ async def admin_create_bots(request: Request, body: CreateBotsRequest,
 
 
 @admin_router.post("/bots/activate")
-async def admin_activate_bots(request: Request, body: BotIdsRequest,
-                              x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_activate_bots(request: Request, body: BotIdsRequest,
+                        auth: dict = Depends(require_admin(required_module="bots", required_action="edit"))):
     """Activate specific bots."""
-    auth = _check_admin_auth(x_admin_password, authorization, required_module="bots", required_action="edit")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     result = bot_manager.activate_bots(body.bot_ids)
     _log_action(auth, "activate_bots", "bots", request, details={"count": len(body.bot_ids)})
     return result
 
 
 @admin_router.post("/bots/deactivate")
-async def admin_deactivate_bots(request: Request, body: BotIdsRequest,
-                                x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_deactivate_bots(request: Request, body: BotIdsRequest,
+                          auth: dict = Depends(require_admin(required_module="bots", required_action="edit"))):
     """Deactivate specific bots."""
-    auth = _check_admin_auth(x_admin_password, authorization, required_module="bots", required_action="edit")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     result = bot_manager.deactivate_bots(body.bot_ids)
     _log_action(auth, "deactivate_bots", "bots", request, details={"count": len(body.bot_ids)})
     return result
 
 
 @admin_router.post("/bots/activate-all")
-async def admin_activate_all_bots(request: Request,
-                                  x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_activate_all_bots(request: Request,
+                            auth: dict = Depends(require_admin(required_module="bots", required_action="edit"))):
     """Activate all bots."""
-    auth = _check_admin_auth(x_admin_password, authorization, required_module="bots", required_action="edit")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     result = bot_manager.activate_bots(all_bots=True)
     _log_action(auth, "activate_all_bots", "bots", request)
     return result
 
 
 @admin_router.post("/bots/deactivate-all")
-async def admin_deactivate_all_bots(request: Request,
-                                    x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_deactivate_all_bots(request: Request,
+                              auth: dict = Depends(require_admin(required_module="bots", required_action="edit"))):
     """Deactivate all bots."""
-    auth = _check_admin_auth(x_admin_password, authorization, required_module="bots", required_action="edit")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     result = bot_manager.deactivate_bots(all_bots=True)
     _log_action(auth, "deactivate_all_bots", "bots", request)
     return result
 
 
 @admin_router.post("/bots/assign")
-async def admin_assign_bots(request: Request, body: AssignBotsRequest,
-                            x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_assign_bots(request: Request, body: AssignBotsRequest,
+                      auth: dict = Depends(require_admin(required_module="bots", required_action="write"))):
     """Assign bots to an employee."""
-    auth = _check_admin_auth(x_admin_password, authorization, required_module="bots", required_action="write")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     result = bot_manager.assign_bots_to_employee(body.bot_ids, body.employee_user_id)
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["error"])
@@ -2600,24 +2426,18 @@ async def admin_assign_bots(request: Request, body: AssignBotsRequest,
 
 
 @admin_router.post("/bots/unassign")
-async def admin_unassign_bots(request: Request, body: BotIdsRequest,
-                              x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_unassign_bots(request: Request, body: BotIdsRequest,
+                        auth: dict = Depends(require_admin(required_module="bots", required_action="write"))):
     """Remove employee assignment from bots."""
-    auth = _check_admin_auth(x_admin_password, authorization, required_module="bots", required_action="write")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     result = bot_manager.unassign_bots(body.bot_ids)
     _log_action(auth, "unassign_bots", "bots", request, details={"count": len(body.bot_ids)})
     return result
 
 
 @admin_router.post("/bots/delete")
-async def admin_delete_bots(request: Request, body: BotIdsRequest,
-                            x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_delete_bots(request: Request, body: BotIdsRequest,
+                      auth: dict = Depends(require_admin(required_module="bots", required_action="delete"))):
     """Permanently delete bot accounts."""
-    auth = _check_admin_auth(x_admin_password, authorization, required_module="bots", required_action="delete")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     result = bot_manager.delete_bots(body.bot_ids)
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["error"])
@@ -2626,12 +2446,9 @@ async def admin_delete_bots(request: Request, body: BotIdsRequest,
 
 
 @admin_router.post("/bots/action")
-async def admin_bot_action(request: Request, body: BotActionRequest,
-                           x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_bot_action(request: Request, body: BotActionRequest,
+                     auth: dict = Depends(require_admin(required_module="bots", required_action="write"))):
     """Make a bot perform an action (admin can control any bot)."""
-    auth = _check_admin_auth(x_admin_password, authorization, required_module="bots", required_action="write")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     result = bot_manager.execute_bot_action(body.bot_id, body.action, body.target_id, body.message, body.reaction)
     if not result.get("success"):
         raise HTTPException(status_code=400, detail=result.get("error", "Bot action failed"))
@@ -2639,33 +2456,24 @@ async def admin_bot_action(request: Request, body: BotActionRequest,
 
 
 @admin_router.post("/bots/batch-action")
-async def admin_bot_batch_action(request: Request, body: BotBatchActionRequest,
-                                  x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_bot_batch_action(request: Request, body: BotBatchActionRequest,
+                            auth: dict = Depends(require_admin(required_module="bots", required_action="write"))):
     """Make multiple bots perform the same action."""
-    auth = _check_admin_auth(x_admin_password, authorization, required_module="bots", required_action="write")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     result = bot_manager.execute_batch_action(body.bot_ids, body.action, body.target_id, body.message, body.reaction)
     _log_action(auth, "bot_batch_action", "bots", request, details={"action": body.action, "count": len(body.bot_ids)})
     return result
 
 
 @admin_router.get("/bots/users-search")
-async def admin_bots_user_search(search: str = "", limit: int = 20,
-                                  x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_bots_user_search(search: str = "", limit: int = 20,
+                            auth: dict = Depends(require_admin(required_module="bots", required_action="read"))):
     """Search real users for bot targeting."""
-    auth = _check_admin_auth(x_admin_password, authorization, required_module="bots", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     return {"users": bot_manager.get_real_users(search, limit)}
 
 
 @admin_router.get("/bots/live-matches")
-async def admin_bots_live_matches(x_admin_password: str = Header(None), authorization: str = Header(None)):
+async def admin_bots_live_matches(auth: dict = Depends(require_admin(required_module="bots", required_action="read"))):
     """Get live matches for bot chat targeting."""
-    auth = _check_admin_auth(x_admin_password, authorization, required_module="bots", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     import football_api
     live_matches = await football_api.fetch_live_matches() or []
     todays = await football_api.fetch_todays_fixtures() or []
@@ -2704,24 +2512,18 @@ async def admin_bots_live_matches(x_admin_password: str = Header(None), authoriz
 
 
 @admin_router.get("/bots/predictions")
-async def admin_bots_predictions(page: int = 1, search: str = "",
-                                  x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_bots_predictions(page: int = 1, search: str = "",
+                            auth: dict = Depends(require_admin(required_module="bots", required_action="read"))):
     """Get community predictions for bot interaction."""
-    auth = _check_admin_auth(x_admin_password, authorization, required_module="bots", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     return bot_manager.get_predictions_for_bots(page=page, search=search)
 
 
 # ── Staggered Queue ──
 
 @admin_router.post("/bots/staggered-batch")
-async def admin_bot_staggered_batch(request: Request, body: BotStaggeredBatchRequest,
-                                     x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_bot_staggered_batch(request: Request, body: BotStaggeredBatchRequest,
+                               auth: dict = Depends(require_admin(required_module="bots", required_action="write"))):
     """Enqueue a staggered batch of bot actions with random delays."""
-    auth = _check_admin_auth(x_admin_password, authorization, required_module="bots", required_action="write")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     result = bot_manager.enqueue_staggered_batch(
         body.bot_ids, body.action, body.target_id, body.message, body.reaction,
         body.delay_min, body.delay_max, body.messages_list or None
@@ -2732,45 +2534,33 @@ async def admin_bot_staggered_batch(request: Request, body: BotStaggeredBatchReq
 
 
 @admin_router.get("/bots/queue-status/{batch_id}")
-async def admin_bot_queue_status(batch_id: str,
-                                  x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_bot_queue_status(batch_id: str,
+                            auth: dict = Depends(require_admin(required_module="bots", required_action="read"))):
     """Get current progress of a staggered queue batch."""
-    auth = _check_admin_auth(x_admin_password, authorization, required_module="bots", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     return bot_manager.get_queue_status(batch_id)
 
 
 @admin_router.post("/bots/queue-cancel/{batch_id}")
-async def admin_bot_queue_cancel(batch_id: str, request: Request,
-                                  x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_bot_queue_cancel(batch_id: str, request: Request,
+                            auth: dict = Depends(require_admin(required_module="bots", required_action="write"))):
     """Cancel a running staggered queue batch."""
-    auth = _check_admin_auth(x_admin_password, authorization, required_module="bots", required_action="write")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     result = bot_manager.cancel_queue(batch_id)
     _log_action(auth, "bot_cancel_queue", "bots", request, details={"batch_id": batch_id})
     return result
 
 
 @admin_router.get("/bots/active-queues")
-async def admin_bot_active_queues(x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_bot_active_queues(auth: dict = Depends(require_admin(required_module="bots", required_action="read"))):
     """List all active/recent staggered queue batches."""
-    auth = _check_admin_auth(x_admin_password, authorization, required_module="bots", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     return {"queues": bot_manager.get_active_queues()}
 
 
 # ── Bot Prediction Creation ──
 
 @admin_router.post("/bots/create-prediction")
-async def admin_bot_create_prediction(request: Request, body: BotCreatePredictionRequest,
-                                       x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_bot_create_prediction(request: Request, body: BotCreatePredictionRequest,
+                                 auth: dict = Depends(require_admin(required_module="bots", required_action="write"))):
     """Create a community prediction as a bot."""
-    auth = _check_admin_auth(x_admin_password, authorization, required_module="bots", required_action="write")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     result = bot_manager.create_bot_prediction(
         body.bot_id, body.fixture_id, body.team_a_name, body.team_b_name,
         body.competition, body.predicted_result, body.analysis_summary,
@@ -2784,13 +2574,9 @@ async def admin_bot_create_prediction(request: Request, body: BotCreatePredictio
 
 
 @admin_router.post("/bots/batch-create-prediction")
-async def admin_bot_batch_create_prediction(request: Request, body: BotBatchCreatePredictionRequest,
-                                             x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_bot_batch_create_prediction(request: Request, body: BotBatchCreatePredictionRequest,
+                                       auth: dict = Depends(require_admin(required_module="bots", required_action="write"))):
     """Have multiple bots create predictions for the same match, optionally staggered."""
-    auth = _check_admin_auth(x_admin_password, authorization, required_module="bots", required_action="write")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-
     successes = 0
     failures = 0
     for i, bid in enumerate(body.bot_ids):
@@ -2817,23 +2603,17 @@ async def admin_bot_batch_create_prediction(request: Request, body: BotBatchCrea
 # ── Chat Activity Monitoring ──
 
 @admin_router.get("/bots/chat-activity")
-async def admin_bot_chat_activity(match_key: str = None, since_minutes: int = 60, limit: int = 100,
-                                   x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_bot_chat_activity(match_key: str = None, since_minutes: int = 60, limit: int = 100,
+                             auth: dict = Depends(require_admin(required_module="bots", required_action="read"))):
     """Get bot chat conversations with reply detection for monitoring."""
-    auth = _check_admin_auth(x_admin_password, authorization, required_module="bots", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     match_keys = [match_key] if match_key else None
     return bot_manager.get_bot_chat_activity(match_keys=match_keys, limit=limit, since_minutes=since_minutes)
 
 
 @admin_router.get("/bots/match-chat/{match_key}")
-async def admin_bot_match_chat(match_key: str, since_id: int = 0,
-                                x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_bot_match_chat(match_key: str, since_id: int = 0,
+                          auth: dict = Depends(require_admin(required_module="bots", required_action="read"))):
     """Get live match chat messages for the embedded chat viewer."""
-    auth = _check_admin_auth(x_admin_password, authorization, required_module="bots", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     messages = community.get_match_chat_messages(match_key, since_id=since_id, limit=100)
     return {"messages": messages}
 
@@ -2843,12 +2623,8 @@ async def admin_bot_match_chat(match_key: str, since_id: int = 0,
 # ═══════════════════════════════════════════════════════════
 
 @admin_router.get("/pricing")
-async def admin_get_pricing(x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_get_pricing(auth: dict = Depends(require_admin({'super_admin'}, required_module="settings", required_action="read"))):
     """Get all pricing configuration (super_admin only)."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin'},
-                             required_module="settings", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     return {
         "configs": pricing_config.get_all_raw(),
         "categories": ["subscription_plans", "commissions", "pay_per_use", "free_tier"],
@@ -2856,13 +2632,9 @@ async def admin_get_pricing(x_admin_password: str = Header(None), authorization:
 
 
 @admin_router.put("/pricing")
-async def admin_update_pricing(request: Request, body: UpdatePricingConfigRequest,
-                                x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_update_pricing(request: Request, body: UpdatePricingConfigRequest,
+                          auth: dict = Depends(require_admin({'super_admin'}, required_module="settings", required_action="edit"))):
     """Update pricing configuration values (super_admin only)."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin'},
-                             required_module="settings", required_action="edit")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     result = pricing_config.bulk_update(body.updates, updated_by=auth.get("display_name", "Admin"))
     _log_action(auth, "update_pricing", "settings", request,
                 details={"keys": list(body.updates.keys())})
@@ -2870,14 +2642,9 @@ async def admin_update_pricing(request: Request, body: UpdatePricingConfigReques
 
 
 @admin_router.post("/pricing/plans")
-async def admin_create_plan(request: Request, body: CreatePlanRequest,
-                             x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_create_plan(request: Request, body: CreatePlanRequest,
+                       auth: dict = Depends(require_admin({'super_admin'}, required_module="settings", required_action="write"))):
     """Create a new subscription plan (super_admin only)."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin'},
-                             required_module="settings", required_action="write")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-
     by = auth.get("display_name", "Admin")
     plan_id = body.plan_id.strip().lower().replace(" ", "_")
 
@@ -2907,14 +2674,9 @@ async def admin_create_plan(request: Request, body: CreatePlanRequest,
 
 
 @admin_router.delete("/pricing/plans/{plan_id}")
-async def admin_delete_plan(plan_id: str, request: Request,
-                             x_admin_password: str = Header(None), authorization: str = Header(None)):
+def admin_delete_plan(plan_id: str, request: Request,
+                       auth: dict = Depends(require_admin({'super_admin'}, required_module="settings", required_action="delete"))):
     """Remove a subscription plan (super_admin only)."""
-    auth = _check_admin_auth(x_admin_password, authorization, {'super_admin'},
-                             required_module="settings", required_action="delete")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-
     by = auth.get("display_name", "Admin")
 
     # Remove from plans_list
@@ -2946,29 +2708,18 @@ ALLOWED_SOCIAL_MEDIA_EXTENSIONS = {
 # ─── Account Management ───
 
 @admin_router.get("/social/accounts")
-async def social_list_accounts(
+def social_list_accounts(
     platform: str = Query(None),
-    x_admin_password: str = Header(None),
-    authorization: str = Header(None),
+    auth: dict = Depends(require_admin(required_module="social_media", required_action="read")),
 ):
-    auth = _check_admin_auth(x_admin_password, authorization,
-                             required_module="social_media", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     return {"accounts": social_media_hub.get_accounts(platform)}
 
 
 @admin_router.post("/social/accounts/connect")
 async def social_connect_account(
     request: Request,
-    x_admin_password: str = Header(None),
-    authorization: str = Header(None),
+    auth: dict = Depends(require_admin(required_module="social_media", required_action="write")),
 ):
-    auth = _check_admin_auth(x_admin_password, authorization,
-                             required_module="social_media", required_action="write")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-
     body = await request.json()
     platform = body.get("platform", "")
     account_name = body.get("account_name", "")
@@ -2982,6 +2733,12 @@ async def social_connect_account(
     webhook_base = os.environ.get("WEBHOOK_BASE_URL", "https://spark-ai-prediction.com")
     webhook_url = f"{webhook_base}/api/webhook/social/{platform}/{{}}"
 
+    def set_webhook_url(account_id, url):
+        conn = social_media_hub._get_db()
+        conn.execute("UPDATE social_accounts SET webhook_url = ? WHERE id = ?", (url, account_id))
+        conn.commit()
+        conn.close()
+
     # Verify credentials with the platform
     if platform == "telegram":
         from telegram_service import TelegramService
@@ -3001,7 +2758,8 @@ async def social_connect_account(
             account_name = bot_info.get("first_name", "Telegram Bot")
 
         # Create account first to get ID
-        account = social_media_hub.create_account(
+        account = await run_in_threadpool(
+            social_media_hub.create_account,
             platform="telegram",
             account_name=account_name,
             account_identifier=account_identifier,
@@ -3016,14 +2774,10 @@ async def social_connect_account(
         wh_result = await service.set_webhook(account["id"], webhook_secret)
         if wh_result.get("ok"):
             real_webhook_url = f"{webhook_base}/api/webhook/social/telegram/{account['id']}"
-            conn = social_media_hub._get_db()
-            conn.execute("UPDATE social_accounts SET webhook_url = ? WHERE id = ?",
-                        (real_webhook_url, account["id"]))
-            conn.commit()
-            conn.close()
+            await run_in_threadpool(set_webhook_url, account["id"], real_webhook_url)
         else:
-            social_media_hub.update_account_status(account["id"], "error",
-                                                    f"Webhook registration failed: {wh_result.get('description', '')}")
+            await run_in_threadpool(social_media_hub.update_account_status, account["id"], "error",
+                                    f"Webhook registration failed: {wh_result.get('description', '')}")
 
         _log_action(auth, "connect_social_account", "social_media", request,
                     details={"platform": "telegram", "account": account_identifier})
@@ -3038,7 +2792,8 @@ async def social_connect_account(
             raise HTTPException(status_code=400,
                                 detail="Account SID, Auth Token, and From Number are required for WhatsApp")
 
-        account = social_media_hub.create_account(
+        account = await run_in_threadpool(
+            social_media_hub.create_account,
             platform="whatsapp",
             account_name=account_name,
             account_identifier=from_number,
@@ -3049,11 +2804,7 @@ async def social_connect_account(
         )
 
         real_webhook_url = f"{webhook_base}/api/webhook/social/whatsapp/{account['id']}"
-        conn = social_media_hub._get_db()
-        conn.execute("UPDATE social_accounts SET webhook_url = ? WHERE id = ?",
-                    (real_webhook_url, account["id"]))
-        conn.commit()
-        conn.close()
+        await run_in_threadpool(set_webhook_url, account["id"], real_webhook_url)
 
         _log_action(auth, "connect_social_account", "social_media", request,
                     details={"platform": "whatsapp", "account": from_number})
@@ -3072,15 +2823,9 @@ async def social_connect_account(
 async def social_disconnect_account(
     account_id: int,
     request: Request,
-    x_admin_password: str = Header(None),
-    authorization: str = Header(None),
+    auth: dict = Depends(require_admin(required_module="social_media", required_action="delete")),
 ):
-    auth = _check_admin_auth(x_admin_password, authorization,
-                             required_module="social_media", required_action="delete")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-
-    account = social_media_hub.get_account(account_id)
+    account = await run_in_threadpool(social_media_hub.get_account, account_id)
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
 
@@ -3094,7 +2839,7 @@ async def social_disconnect_account(
         except Exception:
             pass
 
-    social_media_hub.delete_account(account_id)
+    await run_in_threadpool(social_media_hub.delete_account, account_id)
     _log_action(auth, "disconnect_social_account", "social_media", request,
                 details={"platform": account["platform"], "account_id": account_id})
     return {"success": True}
@@ -3103,15 +2848,9 @@ async def social_disconnect_account(
 @admin_router.get("/social/accounts/{account_id}/status")
 async def social_account_status(
     account_id: int,
-    x_admin_password: str = Header(None),
-    authorization: str = Header(None),
+    auth: dict = Depends(require_admin(required_module="social_media", required_action="read")),
 ):
-    auth = _check_admin_auth(x_admin_password, authorization,
-                             required_module="social_media", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-
-    account = social_media_hub.get_account(account_id)
+    account = await run_in_threadpool(social_media_hub.get_account, account_id)
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
 
@@ -3133,15 +2872,10 @@ async def social_account_status(
 # ─── Account Channels/Groups ───
 
 @admin_router.get("/social/accounts/{account_id}/channels")
-async def social_account_channels(
+def social_account_channels(
     account_id: int,
-    x_admin_password: str = Header(None),
-    authorization: str = Header(None),
+    auth: dict = Depends(require_admin(required_module="social_media", required_action="read")),
 ):
-    auth = _check_admin_auth(x_admin_password, authorization,
-                             required_module="social_media", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     channels = social_media_hub.get_account_channels(account_id)
     return {"channels": channels}
 
@@ -3149,35 +2883,25 @@ async def social_account_channels(
 # ─── Conversations ───
 
 @admin_router.get("/social/conversations")
-async def social_list_conversations(
+def social_list_conversations(
     platform: str = Query(None),
     assigned_to: int = Query(None),
     search: str = Query(None),
     is_archived: bool = Query(False),
     offset: int = Query(0),
     limit: int = Query(50),
-    x_admin_password: str = Header(None),
-    authorization: str = Header(None),
+    auth: dict = Depends(require_admin(required_module="social_media", required_action="read")),
 ):
-    auth = _check_admin_auth(x_admin_password, authorization,
-                             required_module="social_media", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     return social_media_hub.get_conversations(platform, assigned_to, is_archived, search, offset, limit)
 
 
 @admin_router.get("/social/conversations/{conv_id}/messages")
-async def social_get_messages(
+def social_get_messages(
     conv_id: str,
     before_id: int = Query(None),
     limit: int = Query(50),
-    x_admin_password: str = Header(None),
-    authorization: str = Header(None),
+    auth: dict = Depends(require_admin(required_module="social_media", required_action="read")),
 ):
-    auth = _check_admin_auth(x_admin_password, authorization,
-                             required_module="social_media", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     return {"messages": social_media_hub.get_messages(conv_id, before_id, limit)}
 
 
@@ -3185,15 +2909,9 @@ async def social_get_messages(
 async def social_send_message(
     conv_id: str,
     request: Request,
-    x_admin_password: str = Header(None),
-    authorization: str = Header(None),
+    auth: dict = Depends(require_admin(required_module="social_media", required_action="write")),
 ):
-    auth = _check_admin_auth(x_admin_password, authorization,
-                             required_module="social_media", required_action="write")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-
-    conv = social_media_hub.get_conversation(conv_id)
+    conv = await run_in_threadpool(social_media_hub.get_conversation, conv_id)
     if not conv:
         raise HTTPException(status_code=404, detail="Conversation not found")
 
@@ -3205,7 +2923,7 @@ async def social_send_message(
     if not content_text and not media_url:
         raise HTTPException(status_code=400, detail="Message content is required")
 
-    account = social_media_hub.get_account(conv["account_id"])
+    account = await run_in_threadpool(social_media_hub.get_account, conv["account_id"])
     if not account or account["status"] != "connected":
         raise HTTPException(status_code=400, detail="Social media account is not connected")
 
@@ -3290,7 +3008,8 @@ async def social_send_message(
     except Exception as e:
         delivery_status = "failed"
 
-    msg = social_media_hub.store_outbound_message(
+    msg = await run_in_threadpool(
+        social_media_hub.store_outbound_message,
         conv_id=conv_id,
         platform=conv["platform"],
         content_text=content_text,
@@ -3315,45 +3034,29 @@ async def social_send_message(
 async def social_assign_conversation(
     conv_id: str,
     request: Request,
-    x_admin_password: str = Header(None),
-    authorization: str = Header(None),
+    auth: dict = Depends(require_admin(required_module="social_media", required_action="edit")),
 ):
-    auth = _check_admin_auth(x_admin_password, authorization,
-                             required_module="social_media", required_action="edit")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-
     body = await request.json()
     employee_id = body.get("employee_id")
     employee_name = body.get("employee_name", "")
-    social_media_hub.assign_conversation(conv_id, employee_id, employee_name)
+    await run_in_threadpool(social_media_hub.assign_conversation, conv_id, employee_id, employee_name)
     return {"success": True}
 
 
 @admin_router.post("/social/conversations/{conv_id}/read")
-async def social_mark_read(
+def social_mark_read(
     conv_id: str,
-    x_admin_password: str = Header(None),
-    authorization: str = Header(None),
+    auth: dict = Depends(require_admin(required_module="social_media", required_action="read")),
 ):
-    auth = _check_admin_auth(x_admin_password, authorization,
-                             required_module="social_media", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     social_media_hub.mark_conversation_read(conv_id)
     return {"success": True}
 
 
 @admin_router.post("/social/conversations/{conv_id}/archive")
-async def social_archive_conversation(
+def social_archive_conversation(
     conv_id: str,
-    x_admin_password: str = Header(None),
-    authorization: str = Header(None),
+    auth: dict = Depends(require_admin(required_module="social_media", required_action="edit")),
 ):
-    auth = _check_admin_auth(x_admin_password, authorization,
-                             required_module="social_media", required_action="edit")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     social_media_hub.archive_conversation(conv_id)
     return {"success": True}
 
@@ -3361,50 +3064,35 @@ async def social_archive_conversation(
 # ─── Message Search ───
 
 @admin_router.get("/social/messages/search")
-async def social_search_messages(
+def social_search_messages(
     q: str = Query(...),
     platform: str = Query(None),
     limit: int = Query(50),
-    x_admin_password: str = Header(None),
-    authorization: str = Header(None),
+    auth: dict = Depends(require_admin(required_module="social_media", required_action="read")),
 ):
-    auth = _check_admin_auth(x_admin_password, authorization,
-                             required_module="social_media", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     return {"messages": social_media_hub.search_messages(q, platform, limit)}
 
 
 # ─── Content Publishing ───
 
 @admin_router.get("/social/posts")
-async def social_list_posts(
+def social_list_posts(
     status: str = Query(None),
     offset: int = Query(0),
     limit: int = Query(20),
-    x_admin_password: str = Header(None),
-    authorization: str = Header(None),
+    auth: dict = Depends(require_admin(required_module="social_media", required_action="read")),
 ):
-    auth = _check_admin_auth(x_admin_password, authorization,
-                             required_module="social_media", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     return social_media_hub.get_posts(status, offset, limit)
 
 
 @admin_router.post("/social/posts")
 async def social_create_post(
     request: Request,
-    x_admin_password: str = Header(None),
-    authorization: str = Header(None),
+    auth: dict = Depends(require_admin(required_module="social_media", required_action="write")),
 ):
-    auth = _check_admin_auth(x_admin_password, authorization,
-                             required_module="social_media", required_action="write")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-
     body = await request.json()
-    post = social_media_hub.create_post(
+    post = await run_in_threadpool(
+        social_media_hub.create_post,
         title=body.get("title", ""),
         content_text=body.get("content_text", ""),
         media_urls=body.get("media_urls", []),
@@ -3421,14 +3109,8 @@ async def social_create_post(
 async def social_publish_post(
     post_id: int,
     request: Request,
-    x_admin_password: str = Header(None),
-    authorization: str = Header(None),
+    auth: dict = Depends(require_admin(required_module="social_media", required_action="write")),
 ):
-    auth = _check_admin_auth(x_admin_password, authorization,
-                             required_module="social_media", required_action="write")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-
     results = await social_media_hub._publish_post(post_id)
     _log_action(auth, "publish_social_post", "social_media", request,
                 details={"post_id": post_id, "results": results})
@@ -3439,30 +3121,19 @@ async def social_publish_post(
 async def social_update_post(
     post_id: int,
     request: Request,
-    x_admin_password: str = Header(None),
-    authorization: str = Header(None),
+    auth: dict = Depends(require_admin(required_module="social_media", required_action="edit")),
 ):
-    auth = _check_admin_auth(x_admin_password, authorization,
-                             required_module="social_media", required_action="edit")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-
     body = await request.json()
-    social_media_hub.update_post(post_id, **body)
+    await run_in_threadpool(social_media_hub.update_post, post_id, **body)
     return {"success": True}
 
 
 @admin_router.delete("/social/posts/{post_id}")
-async def social_delete_post(
+def social_delete_post(
     post_id: int,
     request: Request,
-    x_admin_password: str = Header(None),
-    authorization: str = Header(None),
+    auth: dict = Depends(require_admin(required_module="social_media", required_action="delete")),
 ):
-    auth = _check_admin_auth(x_admin_password, authorization,
-                             required_module="social_media", required_action="delete")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     social_media_hub.delete_post(post_id)
     return {"success": True}
 
@@ -3472,14 +3143,8 @@ async def social_delete_post(
 @admin_router.post("/social/media/upload")
 async def social_upload_media(
     file: UploadFile = File(...),
-    x_admin_password: str = Header(None),
-    authorization: str = Header(None),
+    auth: dict = Depends(require_admin(required_module="social_media", required_action="write")),
 ):
-    auth = _check_admin_auth(x_admin_password, authorization,
-                             required_module="social_media", required_action="write")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-
     ext = Path(file.filename).suffix.lower() if file.filename else ""
     if ext not in ALLOWED_SOCIAL_MEDIA_EXTENSIONS:
         raise HTTPException(status_code=400, detail=f"File type {ext} is not allowed")
@@ -3488,11 +3153,15 @@ async def social_upload_media(
     if len(content) > MAX_SOCIAL_MEDIA_SIZE:
         raise HTTPException(status_code=400, detail="File is too large (max 50MB)")
 
-    SOCIAL_MEDIA_UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
     filename = f"{uuid.uuid4().hex}{ext}"
     file_path = SOCIAL_MEDIA_UPLOAD_DIR / filename
-    with open(file_path, "wb") as f:
-        f.write(content)
+
+    def save_file():
+        SOCIAL_MEDIA_UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+        with open(file_path, "wb") as f:
+            f.write(content)
+
+    await run_in_threadpool(save_file)
 
     file_url = f"/uploads/social/{filename}"
 
@@ -3505,7 +3174,8 @@ async def social_upload_media(
     elif ext in {".mp3", ".ogg", ".wav"}:
         media_type = "audio"
 
-    record = social_media_hub.store_media(
+    record = await run_in_threadpool(
+        social_media_hub.store_media,
         filename=filename,
         original_filename=file.filename or filename,
         file_path=str(file_path),
@@ -3520,47 +3190,32 @@ async def social_upload_media(
 
 
 @admin_router.get("/social/media")
-async def social_list_media(
+def social_list_media(
     media_type: str = Query(None),
     limit: int = Query(50),
-    x_admin_password: str = Header(None),
-    authorization: str = Header(None),
+    auth: dict = Depends(require_admin(required_module="social_media", required_action="read")),
 ):
-    auth = _check_admin_auth(x_admin_password, authorization,
-                             required_module="social_media", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     return {"media": social_media_hub.get_media_library(media_type, limit)}
 
 
 # ─── Reply Templates ───
 
 @admin_router.get("/social/templates")
-async def social_list_templates(
+def social_list_templates(
     category: str = Query(None),
-    x_admin_password: str = Header(None),
-    authorization: str = Header(None),
+    auth: dict = Depends(require_admin(required_module="social_media", required_action="read")),
 ):
-    auth = _check_admin_auth(x_admin_password, authorization,
-                             required_module="social_media", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     return {"templates": social_media_hub.get_templates(category)}
 
 
 @admin_router.post("/social/templates")
 async def social_create_template(
     request: Request,
-    x_admin_password: str = Header(None),
-    authorization: str = Header(None),
+    auth: dict = Depends(require_admin(required_module="social_media", required_action="write")),
 ):
-    auth = _check_admin_auth(x_admin_password, authorization,
-                             required_module="social_media", required_action="write")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-
     body = await request.json()
-    template = social_media_hub.create_template(
+    template = await run_in_threadpool(
+        social_media_hub.create_template,
         title=body.get("title", ""),
         content=body.get("content", ""),
         category=body.get("category", "general"),
@@ -3575,29 +3230,18 @@ async def social_create_template(
 async def social_update_template(
     template_id: int,
     request: Request,
-    x_admin_password: str = Header(None),
-    authorization: str = Header(None),
+    auth: dict = Depends(require_admin(required_module="social_media", required_action="edit")),
 ):
-    auth = _check_admin_auth(x_admin_password, authorization,
-                             required_module="social_media", required_action="edit")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-
     body = await request.json()
-    social_media_hub.update_template(template_id, **body)
+    await run_in_threadpool(social_media_hub.update_template, template_id, **body)
     return {"success": True}
 
 
 @admin_router.delete("/social/templates/{template_id}")
-async def social_delete_template(
+def social_delete_template(
     template_id: int,
-    x_admin_password: str = Header(None),
-    authorization: str = Header(None),
+    auth: dict = Depends(require_admin(required_module="social_media", required_action="delete")),
 ):
-    auth = _check_admin_auth(x_admin_password, authorization,
-                             required_module="social_media", required_action="delete")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     social_media_hub.delete_template(template_id)
     return {"success": True}
 
@@ -3605,7 +3249,7 @@ async def social_delete_template(
 # ─── SSE Stream ───
 
 @admin_router.get("/social/stream")
-async def social_message_stream(
+def social_message_stream(
     # EventSource can't set custom headers — accept auth via query param too
     authorization: str = Query(None),
     x_admin_password: str = Query(None),
@@ -3653,60 +3297,40 @@ async def social_message_stream(
 # ─── Analytics ───
 
 @admin_router.get("/social/analytics")
-async def social_analytics(
+def social_analytics(
     period: str = Query("weekly"),
-    x_admin_password: str = Header(None),
-    authorization: str = Header(None),
+    auth: dict = Depends(require_admin(required_module="social_media", required_action="read")),
 ):
-    auth = _check_admin_auth(x_admin_password, authorization,
-                             required_module="social_media", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     return social_media_hub.get_analytics(period)
 
 
 # ═══════════════════════ Blog Management ═══════════════════════
 
 @admin_router.get("/blog")
-async def admin_list_blog_posts(
+def admin_list_blog_posts(
     status: str = Query(None),
     category: str = Query(None),
     post_type: str = Query(None),
     limit: int = Query(50),
     offset: int = Query(0),
-    x_admin_password: str = Header(None),
-    authorization: str = Header(None),
+    auth: dict = Depends(require_admin(required_module="blog", required_action="read")),
 ):
-    auth = _check_admin_auth(x_admin_password, authorization,
-                             required_module="blog", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     posts = blog.list_posts(status=status, category=category, limit=limit, offset=offset, post_type=post_type)
     return {"posts": posts}
 
 
 @admin_router.get("/blog/analytics")
-async def admin_blog_analytics(
-    x_admin_password: str = Header(None),
-    authorization: str = Header(None),
+def admin_blog_analytics(
+    auth: dict = Depends(require_admin(required_module="blog", required_action="read")),
 ):
-    auth = _check_admin_auth(x_admin_password, authorization,
-                             required_module="blog", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     return blog.get_analytics()
 
 
 @admin_router.get("/blog/{post_id}")
-async def admin_get_blog_post(
+def admin_get_blog_post(
     post_id: int,
-    x_admin_password: str = Header(None),
-    authorization: str = Header(None),
+    auth: dict = Depends(require_admin(required_module="blog", required_action="read")),
 ):
-    auth = _check_admin_auth(x_admin_password, authorization,
-                             required_module="blog", required_action="read")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     post = blog.get_post(post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
@@ -3716,16 +3340,11 @@ async def admin_get_blog_post(
 @admin_router.post("/blog")
 async def admin_create_blog_post(
     request: Request,
-    x_admin_password: str = Header(None),
-    authorization: str = Header(None),
+    auth: dict = Depends(require_admin(required_module="blog", required_action="write")),
 ):
-    auth = _check_admin_auth(x_admin_password, authorization,
-                             required_module="blog", required_action="write")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-
     body = await request.json()
-    result = blog.create_post(
+    result = await run_in_threadpool(
+        blog.create_post,
         title=body.get("title", ""),
         excerpt=body.get("excerpt", ""),
         body=body.get("body", ""),
@@ -3746,27 +3365,22 @@ async def admin_create_blog_post(
 async def admin_update_blog_post(
     post_id: int,
     request: Request,
-    x_admin_password: str = Header(None),
-    authorization: str = Header(None),
+    auth: dict = Depends(require_admin(required_module="blog", required_action="edit")),
 ):
-    auth = _check_admin_auth(x_admin_password, authorization,
-                             required_module="blog", required_action="edit")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
 
     # Check if this is a new publish (was not published before)
-    existing = blog.get_post(post_id)
+    existing = await run_in_threadpool(blog.get_post, post_id)
     was_published = existing and existing.get("status") == "published" if existing else False
 
     body = await request.json()
     send_push = body.pop("send_push", True)
-    result = blog.update_post(post_id, **body)
+    result = await run_in_threadpool(blog.update_post, post_id, **body)
     _log_action(auth, "update_blog_post", "blog", request, details={"post_id": post_id})
 
     # Send push notification if newly published
     if (result.get("success") and body.get("status") == "published"
             and not was_published and send_push):
-        try:
+        def send_news_push():
             import push_notifications
             post = blog.get_post(post_id)
             if post:
@@ -3777,6 +3391,9 @@ async def admin_update_blog_post(
                     cover_image=post.get("cover_image"),
                 )
                 print(f"[Admin] Push notification sent for news: {post.get('title', '')[:50]}")
+
+        try:
+            await run_in_threadpool(send_news_push)
         except Exception as e:
             print(f"[Admin] Push notification error: {e}")
 
@@ -3784,17 +3401,11 @@ async def admin_update_blog_post(
 
 
 @admin_router.delete("/blog/{post_id}")
-async def admin_delete_blog_post(
+def admin_delete_blog_post(
     post_id: int,
     request: Request,
-    x_admin_password: str = Header(None),
-    authorization: str = Header(None),
+    auth: dict = Depends(require_admin(required_module="blog", required_action="delete")),
 ):
-    auth = _check_admin_auth(x_admin_password, authorization,
-                             required_module="blog", required_action="delete")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-
     result = blog.delete_post(post_id)
     _log_action(auth, "delete_blog_post", "blog", request, details={"post_id": post_id})
     return result
@@ -3803,15 +3414,9 @@ async def admin_delete_blog_post(
 @admin_router.post("/blog/scrape-now")
 async def admin_scrape_telegram(
     request: Request,
-    x_admin_password: str = Header(None),
-    authorization: str = Header(None),
+    auth: dict = Depends(require_admin(required_module="blog", required_action="write")),
 ):
     """Trigger immediate Telegram channel scrape."""
-    auth = _check_admin_auth(x_admin_password, authorization,
-                             required_module="blog", required_action="write")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-
     try:
         import telegram_scraper
         results = []
@@ -3830,14 +3435,8 @@ async def admin_scrape_telegram(
 @admin_router.post("/blog/upload-image")
 async def admin_upload_blog_image(
     file: UploadFile = File(...),
-    x_admin_password: str = Header(None),
-    authorization: str = Header(None),
+    auth: dict = Depends(require_admin(required_module="blog", required_action="write")),
 ):
-    auth = _check_admin_auth(x_admin_password, authorization,
-                             required_module="blog", required_action="write")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-
     ext = Path(file.filename).suffix.lower() if file.filename else ""
     if ext not in {".jpg", ".jpeg", ".png", ".gif", ".webp"}:
         raise HTTPException(status_code=400, detail=f"Image type {ext} is not allowed")
@@ -3846,5 +3445,5 @@ async def admin_upload_blog_image(
     if len(content) > 10 * 1024 * 1024:  # 10MB
         raise HTTPException(status_code=400, detail="Image is too large (max 10MB)")
 
-    url = blog.save_cover_image(content, file.filename or "image.jpg")
+    url = await run_in_threadpool(blog.save_cover_image, content, file.filename or "image.jpg")
     return {"success": True, "url": url}
@@ -30,6 +30,10 @@ FOOTBALL_DATA_API_KEY = os.environ.get("FOOTBALL_DATA_API_KEY", "")
 # Get your free key at: https://developers.giphy.com/dashboard/
 GIPHY_API_KEY = os.environ.get("GIPHY_API_KEY", "")
 
+# Worker threads for sync (def) route handlers. SQLite allows one writer per
+# file, so more threads than this only add lock contention.
+SYNC_WORKER_THREADS = int(os.environ.get("SYNC_WORKER_THREADS", "0")) or min(2 * (os.cpu_count() or 1), 16)
+
 # API-Football League IDs
 LEAGUE_IDS = {
     # Top 5 European Leagues
@@ -68,6 +68,7 @@ def _get_employee(authorization: str = None):
         return None
 
     user_id = payload["user_id"]
+    admin_rbac.reset_request_cache()
     # Must have a staff role via RBAC
     role_info = admin_rbac.get_user_role(user_id)
     if not role_info:
@@ -154,6 +154,12 @@ async def startup():
         print("     Get your free key at: https://the-odds-api.com/")
 
     print("-" * 50)
+
+    # Size the threadpool that runs sync route handlers (anyio defaults to 40)
+    from anyio import to_thread
+    to_thread.current_default_thread_limiter().total_tokens = config.SYNC_WORKER_THREADS
+    print(f"[OK] Sync handler threadpool: {config.SYNC_WORKER_THREADS} threads")
+
     await init_db()
 
     # Initialize access codes database
@@ -220,6 +226,7 @@ async def startup():
     admin_rbac.seed_default_roles()
     admin_rbac.seed_default_permissions()
     admin_rbac.migrate_legacy_roles()
+    admin_rbac.load_permission_snapshot()
     print("[OK] Admin RBAC system initialized")
 
     # Initialize employee portal tables
@@ -272,6 +279,15 @@ async def startup():
     print("=" * 50)
 
 
+@app.on_event("shutdown")
+async def shutdown():
+    # Write out any activity logs, session heartbeats and access code uses
+    # still held in memory
+    activity_logger.flush_logs()
+    activity_logger.flush_session_activity()
+    access_codes.flush_use_counts()
+
+
 @app.get("/api/teams")
 async def get_all_teams(competition: str = "PL"):
     teams = await get_teams(competition)
@@ -974,10 +990,16 @@ class WhatsAppVerifyConfirmRequest(BaseModel):
 
 def _get_client_ip(request: Request) -> str:
     """Extract client IP, checking X-Forwarded-For for proxied requests."""
-    forwarded = request.headers.get("X-Forwarded-For")
-    if forwarded:
-        return forwarded.split(",")[0].strip()
-    return request.client.host if request.client else "unknown"
+    # Memoized on request.state; several handlers ask for it more than once
+    ip = getattr(request.state, "client_ip", None)
+    if ip is None:
+        forwarded = request.headers.get("X-Forwarded-For")
+        if forwarded:
+            ip = forwarded.split(",")[0].strip()
+        else:
+            ip = request.client.host if request.client else "unknown"
+        request.state.client_ip = ip
+    return ip
 
 
 def _get_current_user(authorization: str = Header(None)) -> Optional[dict]:
@@ -1716,9 +1738,12 @@ async def delete_avatar(authorization: str = Header(None)):
 async def serve_avatar(filename: str):
     """Serve an uploaded avatar image."""
     filepath = AVATARS_DIR / filename
-    if not filepath.exists():
+    # Hand the stat to FileResponse so it doesn't stat the file again
+    try:
+        stat_result = os.stat(filepath)
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Avatar not found")
-    return FileResponse(str(filepath))
+    return FileResponse(str(filepath), stat_result=stat_result)
 
 
 @app.put("/api/user/personal-info")
@@ -4438,9 +4463,12 @@ async def support_upload_file(file: UploadFile = File(...), authorization: str =
 async def serve_support_file(filename: str):
     """Serve an uploaded support file."""
     filepath = SUPPORT_UPLOADS_DIR / filename
-    if not filepath.exists():
+    # Hand the stat to FileResponse so it doesn't stat the file again
+    try:
+        stat_result = os.stat(filepath)
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="File not found")
-    return FileResponse(str(filepath))
+    return FileResponse(str(filepath), stat_result=stat_result)
 
 
 # ==================== SUPPORT CHAT (USER SIDE) ====================
@@ -0,0 +1,68 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+import activity_logger
+
+_SCHEMA = """
+    CREATE TABLE users (id INTEGER PRIMARY KEY, display_name TEXT);
+    CREATE TABLE activity_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        action TEXT NOT NULL,
+        module TEXT,
+        target_type TEXT,
+        target_id INTEGER,
+        details TEXT,
+        ip_address TEXT,
+        user_agent TEXT,
+        created_at TEXT NOT NULL
+    );
+    CREATE TABLE activity_stats_hourly (
+        hour_start TEXT NOT NULL,
+        action TEXT NOT NULL,
+        module TEXT NOT NULL DEFAULT '',
+        user_id INTEGER NOT NULL,
+        is_system INTEGER NOT NULL DEFAULT 0,
+        cnt INTEGER NOT NULL,
+        PRIMARY KEY (hour_start, action, module, user_id, is_system)
+    );
+"""
+
+
+@pytest.fixture
+def logs_db(tmp_path, monkeypatch):
+    db = tmp_path / "users.db"
+    conn = sqlite3.connect(db)
+    conn.executescript(_SCHEMA)
+    conn.close()
+    monkeypatch.setattr(activity_logger, "DB_PATH", str(db))
+    monkeypatch.setattr(activity_logger, "_writer_conn", None)
+    monkeypatch.setattr(activity_logger, "_reader_pool", activity_logger.queue.LifoQueue())
+    monkeypatch.setattr(activity_logger, "_readers_opened", 0)
+    return db
+
+
+def test_stats_count_actions_logged_without_user_agent(logs_db):
+    # employee_routes logs actions without a user agent
+    activity_logger.log_action(7, "task_update", "employees")
+    activity_logger.log_action(7, "task_update", "employees")
+    activity_logger.log_system_event("otp_fail", "auth")
+    activity_logger.flush_logs()
+
+    # Move one row into a completed hour so the hourly rollup picks it up
+    conn = sqlite3.connect(logs_db)
+    conn.execute("UPDATE activity_logs SET created_at = ? WHERE id = "
+                 "(SELECT MIN(id) FROM activity_logs WHERE action = 'task_update')",
+                 ((datetime.now() - timedelta(hours=3)).isoformat(),))
+    conn.commit()
+    conn.close()
+
+    stats = activity_logger.get_activity_stats(days=1)
+
+    assert stats["total_actions"] == 3
+    assert stats["system_errors"] == 1
+    conn = sqlite3.connect(logs_db)
+    assert conn.execute("SELECT is_system, cnt FROM activity_stats_hourly").fetchall() == [(0, 1)]
+    conn.close()
@@ -419,6 +419,13 @@ def init_user_db():
             pass  # Column already exists
 
     # --- RBAC tables ---
+    # Older installs stored the six permission flags as separate columns;
+    # they are now packed into perm_bits and the can_* columns are generated
+    # from it. Move the old table aside so the CREATE below builds the new one.
+    perm_cols = {r[1] for r in conn.execute("PRAGMA table_xinfo(permissions)").fetchall()}
+    if perm_cols and "perm_bits" not in perm_cols:
+        conn.execute("ALTER TABLE permissions RENAME TO permissions_old")
+
     conn.executescript("""
         CREATE TABLE IF NOT EXISTS roles (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -428,22 +435,26 @@ def init_user_db():
             department TEXT,
             description TEXT DEFAULT '',
             is_system INTEGER DEFAULT 1,
-            created_at TEXT NOT NULL
+            created_at TEXT NOT NULL,
+            legacy_staff_role TEXT
         );
 
         CREATE TABLE IF NOT EXISTS permissions (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             role_id INTEGER NOT NULL REFERENCES roles(id),
             module TEXT NOT NULL,
-            can_read INTEGER DEFAULT 0,
-            can_write INTEGER DEFAULT 0,
-            can_edit INTEGER DEFAULT 0,
-            can_delete INTEGER DEFAULT 0,
-            can_export INTEGER DEFAULT 0,
-            can_approve INTEGER DEFAULT 0,
+            -- read=1, write=2, edit=4, delete=8, export=16, approve=32
+            perm_bits INTEGER NOT NULL DEFAULT 0,
             data_scope TEXT DEFAULT 'own',
+            can_read INTEGER GENERATED ALWAYS AS (perm_bits & 1) VIRTUAL,
+            can_write INTEGER GENERATED ALWAYS AS ((perm_bits >> 1) & 1) VIRTUAL,
+            can_edit INTEGER GENERATED ALWAYS AS ((perm_bits >> 2) & 1) VIRTUAL,
+            can_delete INTEGER GENERATED ALWAYS AS ((perm_bits >> 3) & 1) VIRTUAL,
+            can_export INTEGER GENERATED ALWAYS AS ((perm_bits >> 4) & 1) VIRTUAL,
+            can_approve INTEGER GENERATED ALWAYS AS ((perm_bits >> 5) & 1) VIRTUAL,
             UNIQUE(role_id, module)
         );
+        CREATE INDEX IF NOT EXISTS idx_users_role ON users(role_id) WHERE role_id IS NOT NULL;
 
         CREATE TABLE IF NOT EXISTS activity_logs (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -457,10 +468,26 @@ def init_user_db():
             user_agent TEXT,
             created_at TEXT NOT NULL
         );
-        CREATE INDEX IF NOT EXISTS idx_activity_user ON activity_logs(user_id);
-        CREATE INDEX IF NOT EXISTS idx_activity_action ON activity_logs(action);
         CREATE INDEX IF NOT EXISTS idx_activity_created ON activity_logs(created_at);
-        CREATE INDEX IF NOT EXISTS idx_activity_module ON activity_logs(module);
+        -- Composite (filter, created_at) indexes for the log list / stats queries;
+        -- they replace the old single-column user/action/module indexes
+        DROP INDEX IF EXISTS idx_activity_user;
+        DROP INDEX IF EXISTS idx_activity_action;
+        DROP INDEX IF EXISTS idx_activity_module;
+        CREATE INDEX IF NOT EXISTS idx_activity_user_created ON activity_logs(user_id, created_at DESC);
+        CREATE INDEX IF NOT EXISTS idx_activity_action_created ON activity_logs(action, created_at DESC);
+        CREATE INDEX IF NOT EXISTS idx_activity_module_created ON activity_logs(module, created_at DESC) WHERE module IS NOT NULL;
+
+        -- Hourly activity_logs counts for completed hours (see activity_logger.rollup_activity_stats)
+        CREATE TABLE IF NOT EXISTS activity_stats_hourly (
+            hour_start TEXT NOT NULL,
+            action TEXT NOT NULL,
+            module TEXT NOT NULL DEFAULT '',
+            user_id INTEGER NOT NULL,
+            is_system INTEGER NOT NULL DEFAULT 0,
+            cnt INTEGER NOT NULL,
+            PRIMARY KEY (hour_start, action, module, user_id, is_system)
+        );
 
         CREATE TABLE IF NOT EXISTS user_permissions (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -489,9 +516,37 @@ def init_user_db():
             is_active INTEGER DEFAULT 1
         );
         CREATE INDEX IF NOT EXISTS idx_ss_user ON staff_sessions(user_id);
-        CREATE INDEX IF NOT EXISTS idx_ss_active ON staff_sessions(is_active);
+        -- Partial index over live sessions only; replaces the old is_active index
+        DROP INDEX IF EXISTS idx_ss_active;
+        CREATE INDEX IF NOT EXISTS idx_ss_active_user ON staff_sessions(user_id, last_active_at DESC) WHERE is_active = 1;
     """)
 
+    # Checked on the table rather than the rename above so an interrupted
+    # migration is finished on the next start
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'permissions_old'").fetchone():
+        conn.execute("""
+            INSERT OR IGNORE INTO permissions (id, role_id, module, perm_bits, data_scope)
+            SELECT id, role_id, module,
+                   (COALESCE(can_read, 0) != 0)
+                   | ((COALESCE(can_write, 0) != 0) << 1)
+                   | ((COALESCE(can_edit, 0) != 0) << 2)
+                   | ((COALESCE(can_delete, 0) != 0) << 3)
+                   | ((COALESCE(can_export, 0) != 0) << 4)
+                   | ((COALESCE(can_approve, 0) != 0) << 5),
+                   data_scope
+            FROM permissions_old
+        """)
+        conn.execute("DROP TABLE permissions_old")
+
+    # Columns added to RBAC tables after they shipped
+    for col_sql in [
+        "ALTER TABLE roles ADD COLUMN legacy_staff_role TEXT",
+    ]:
+        try:
+            conn.execute(col_sql)
+        except sqlite3.OperationalError:
+            pass  # Column already exists
+
     # Auto-verify all existing users (created before verification was required)
     conn.execute("""
         UPDATE users SET email_verified = 1
@@ -3487,6 +3542,8 @@ def set_staff_role(user_id: int, role: str) -> Dict:
 
     conn.commit()
     conn.close()
+    import admin_rbac
+    admin_rbac.invalidate_permission_cache("role_change", {"user_id": user_id})
     return {"success": True, "role": role}
 
 
@@ -3559,7 +3616,8 @@ def get_staff_members() -> list:
     rows = conn.execute(
         """SELECT u.id, u.email, u.display_name, u.username, u.avatar_color,
                   u.staff_role, u.is_active, u.created_at, u.role_id, u.department,
-                  r.name AS role_name, r.display_name AS role_display_name, r.level AS role_level
+                  r.name AS role_name, r.display_name AS role_display_name, r.level AS role_level,
+                  r.department AS role_department
            FROM users u
            LEFT JOIN roles r ON u.role_id = r.id
            WHERE u.staff_role IS NOT NULL OR u.role_id IS NOT NULL
@@ -3577,6 +3635,14 @@ def get_staff_role(user_id: int):
     return row["staff_role"] if row else None
 
 
+def get_staff_identity(user_id: int):
+    """Get (staff_role, display_name) in one lookup. Returns None if the user doesn't exist."""
+    conn = _get_db()
+    row = conn.execute("SELECT staff_role, display_name FROM users WHERE id = ?", (user_id,)).fetchone()
+    conn.close()
+    return (row["staff_role"], row["display_name"]) if row else None
+
+
 def delete_user(user_id: int) -> Dict:
     """Delete a user account from the database."""
     conn = _get_db()
@@ -3591,6 +3657,8 @@ def delete_user(user_id: int) -> Dict:
     conn.execute("DELETE FROM users WHERE id = ?", (user_id,))
     conn.commit()
     conn.close()
+    import admin_rbac
+    admin_rbac.invalidate_permission_cache("user_deleted", {"user_id": user_id})
     return {"success": True}
 
 